@@ -0,0 +1,233 @@
+"""
+Ce module limite le nombre de requêtes simultanées des points de terminaison
+qui utilisent la base de données (contrôle d'admission).
+
+Les lectures (GET, HEAD) et les écritures ont chacune leur budget : au plus
+ADMISSION_*_LIMIT requêtes en cours, et ADMISSION_*_QUEUE en attente d'une place.
+Une requête qui trouve la file pleine, ou qui attend plus de ADMISSION_QUEUE_TIMEOUT
+secondes, est rejetée aussitôt par un 503 avec l'en-tête Retry-After : quand la base
+ralentit, les requêtes ne s'accumulent pas devant le pool de connexions jusqu'à
+expirer toutes.
+
+Les budgets sont propres à chaque worker : pour un serveur, multiplier par le nombre
+de workers, et garder le total sous la taille du pool (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from .database import TRUE_VALUES
+
+ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', 'false').lower() in TRUE_VALUES
+ADMISSION_READ_LIMIT = int(os.getenv('ADMISSION_READ_LIMIT', '32'))
+ADMISSION_READ_QUEUE = int(os.getenv('ADMISSION_READ_QUEUE', '64'))
+ADMISSION_WRITE_LIMIT = int(os.getenv('ADMISSION_WRITE_LIMIT', '8'))
+ADMISSION_WRITE_QUEUE = int(os.getenv('ADMISSION_WRITE_QUEUE', '16'))
+# Attente maximale d'une place avant le rejet (s).
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '2'))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+
+# Points de terminaison soumis au contrôle, et exceptions : le flux SSE reste
+# ouvert sans utiliser la base.
+ADMISSION_PREFIXES = ("/tasks",)
+ADMISSION_EXEMPT = ("/tasks/changes",)
+READ_METHODS = ("GET", "HEAD")
+
+class Budget:  # pylint: disable=too-many-instance-attributes
+    """
+    Budget de concurrence d'une classe de requêtes, avec sa file d'attente bornée.
+
+    Attributes:
+        name (str): Le nom du budget (read ou write).
+        limit (int): Le nombre maximal de requêtes en cours.
+        queue_size (int): Le nombre maximal de requêtes en attente.
+        timeout (float): L'attente maximale d'une place, en secondes.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int,
+                 timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self._semaphore = None
+        self._loop = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _get_semaphore(self):
+        """
+        Retourne le sémaphore du budget, créé dans la boucle asyncio en cours.
+
+        Avant Python 3.10, un sémaphore est lié à la boucle existant à sa création :
+        il n'est donc pas créé à l'import (dans le processus maître de gunicorn avec
+        preload_app), mais à la première requête du worker.
+
+        Returns:
+            asyncio.Semaphore: Le sémaphore.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit - self.in_flight)
+            self._loop = loop
+        return self._semaphore
+
+    async def acquire(self) -> bool:
+        """
+        Attend une place dans le budget, dans la limite de la file et du délai.
+
+        Returns:
+            bool: True si la requête est admise, False si elle doit être rejetée.
+        """
+        semaphore = self._get_semaphore()
+        if not semaphore.locked():
+            # Place libre : acquise sans suspendre la requête.
+            await semaphore.acquire()
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if self.waiting >= self.queue_size:
+            self.shed += 1
+            return False
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return False
+        finally:
+            self.waiting -= 1
+            waited = time.perf_counter() - start
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        """
+        Libère la place d'une requête terminée.
+        """
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        """
+        Retourne les statistiques du budget.
+
+        Returns:
+            dict: Les limites, les requêtes en cours et en attente, les requêtes admises,
+            rejetées (file pleine ou délai expiré) et les temps d'attente en secondes.
+        """
+        attempts = self.admitted + self.timeouts
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_total,
+            "wait_seconds_avg": self.wait_total / attempts if attempts else 0.0,
+            "wait_seconds_max": self.wait_max,
+        }
+
+class AdmissionController:
+    """
+    Répartit les requêtes entre le budget des lectures et celui des écritures.
+
+    Attributes:
+        budgets (Dict[str, Budget]): Les budgets read et write.
+    """
+
+    def __init__(self, read: Budget = None, write: Budget = None):
+        self.budgets = {
+            "read": read or Budget("read", ADMISSION_READ_LIMIT, ADMISSION_READ_QUEUE),
+            "write": write or Budget("write", ADMISSION_WRITE_LIMIT, ADMISSION_WRITE_QUEUE),
+        }
+
+    @staticmethod
+    def applies(path: str) -> bool:
+        """
+        Indique si un chemin est soumis au contrôle d'admission.
+
+        Args:
+            path (str): Le chemin de la requête.
+
+        Returns:
+            bool: True pour les points de terminaison qui utilisent la base.
+        """
+        return path.startswith(ADMISSION_PREFIXES) and not path.startswith(ADMISSION_EXEMPT)
+
+    def budget(self, method: str) -> Budget:
+        """
+        Choisit le budget d'une requête selon sa méthode.
+
+        Args:
+            method (str): La méthode HTTP.
+
+        Returns:
+            Budget: Le budget des lectures ou celui des écritures.
+        """
+        return self.budgets["read" if method in READ_METHODS else "write"]
+
+    def stats(self):
+        """
+        Retourne les statistiques de chaque budget.
+
+        Returns:
+            dict: Les statistiques, par budget.
+        """
+        return {name: budget.stats() for name, budget in self.budgets.items()}
+
+controller = AdmissionController()
+
+class AdmissionMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Middleware ASGI qui admet ou rejette (503) les requêtes selon leur budget.
+    """
+
+    def __init__(self, app, admission: AdmissionController = None):
+        self.app = app
+        self.admission = admission or controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.admission.applies(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        budget = self.admission.budget(scope["method"])
+        if not await budget.acquire():
+            await _reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            budget.release()
+
+async def _reject(send):
+    """
+    Envoie la réponse 503 d'une requête rejetée.
+
+    Args:
+        send (Callable): La fonction d'envoi ASGI.
+    """
+    body = json.dumps({"detail": "Server overloaded, retry later"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(ADMISSION_RETRY_AFTER).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
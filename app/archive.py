@@ -0,0 +1,184 @@
+"""
+Ce module déplace les tâches terminées depuis longtemps dans la table tasks_archive.
+
+    python -m app.archive [--days 30] [--batch-size 500] [--pause 0.1]
+
+Les tâches terminées depuis plus de ARCHIVE_AFTER_DAYS jours (completed_at) sont
+déplacées par lots de ARCHIVE_BATCH_SIZE, chacun dans sa propre transaction courte,
+avec une pause entre les lots : la table tasks n'est jamais verrouillée longtemps et
+les écritures de l'API continuent pendant l'archivage. Sur PostgreSQL, chaque lot
+est un seul DELETE ... RETURNING dont les lignes sont insérées dans l'archive, et
+les lignes verrouillées par une écriture en cours sont laissées au lot suivant
+(SKIP LOCKED).
+
+Chaque lot publie un événement archived (app.events) : sur PostgreSQL, les workers
+de l'API le reçoivent et retirent les tâches archivées de leur cache.
+
+Les points de terminaison ne servent que la table tasks ; les tâches archivées
+restent lisibles avec include_archived=true.
+"""
+
+import argparse
+import os
+import time
+from datetime import timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from . import cache, database, events, models
+from .controllers import _bump_stats, _is_postgresql, _now
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '30'))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+# Pause entre deux lots, pour laisser passer les écritures de l'API (s).
+ARCHIVE_PAUSE = float(os.getenv('ARCHIVE_PAUSE', '0.1'))
+
+# Colonnes copiées de tasks vers tasks_archive.
+ARCHIVE_FIELDS = tuple(column.name for column in models.Task.__table__.columns)
+
+def _candidates(cutoff, batch_size: int):
+    """
+    Prépare la sélection des IDs du prochain lot à archiver.
+
+    Args:
+        cutoff (datetime): Les tâches terminées avant cette date sont archivées.
+        batch_size (int): Le nombre maximal de tâches du lot.
+
+    Returns:
+        Select: La requête des IDs, par ordre croissant.
+    """
+    table = models.Task.__table__
+    return (
+        select(table.c.id)
+        .where(
+            table.c.completed.is_(True),
+            table.c.completed_at.isnot(None),
+            table.c.completed_at < cutoff,
+        )
+        .order_by(table.c.id)
+        .limit(batch_size)
+    )
+
+def _move_postgresql(db: Session, cutoff, batch_size: int):
+    """
+    Déplace un lot en une seule requête (PostgreSQL uniquement).
+
+    Args:
+        db (Session): La session de la base de données.
+        cutoff (datetime): Les tâches terminées avant cette date sont archivées.
+        batch_size (int): Le nombre maximal de tâches du lot.
+
+    Returns:
+        List[RowMapping]: Les tâches déplacées (id et completed).
+    """
+    table, archive = models.Task.__table__, models.ArchivedTask.__table__
+    candidates = _candidates(cutoff, batch_size).with_for_update(skip_locked=True)
+    moved = (
+        delete(table).where(table.c.id.in_(candidates.scalar_subquery()))
+        .returning(*table.columns).cte("moved")
+    )
+    statement = insert(archive).from_select(
+        ARCHIVE_FIELDS, select(*(moved.c[name] for name in ARCHIVE_FIELDS))
+    ).returning(archive.c.id, archive.c.completed)
+    return db.execute(statement).mappings().all()
+
+def _move(db: Session, cutoff, batch_size: int):
+    """
+    Déplace un lot par un SELECT, un INSERT et un DELETE dans la même transaction.
+
+    Args:
+        db (Session): La session de la base de données.
+        cutoff (datetime): Les tâches terminées avant cette date sont archivées.
+        batch_size (int): Le nombre maximal de tâches du lot.
+
+    Returns:
+        List[RowMapping]: Les tâches déplacées.
+    """
+    table = models.Task.__table__
+    ids = db.execute(_candidates(cutoff, batch_size)).scalars().all()
+    if not ids:
+        return []
+    rows = db.execute(select(table).where(table.c.id.in_(ids))).mappings().all()
+    db.execute(insert(models.ArchivedTask.__table__), [dict(row) for row in rows])
+    db.execute(delete(table).where(table.c.id.in_(ids)))
+    return rows
+
+def archive_batch(db: Session, cutoff, batch_size: int = ARCHIVE_BATCH_SIZE):
+    """
+    Archive un lot de tâches terminées et le valide par un commit.
+
+    Les compteurs de tâches ne portent que sur la table tasks : ils sont diminués
+    des tâches archivées. Sur PostgreSQL, les workers de l'API les retirent de leur
+    cache à la réception de l'événement ARCHIVED (app.events) ; ailleurs, seul le
+    cache du processus courant est invalidé, et celui des workers expire après
+    TASK_CACHE_TTL.
+
+    Args:
+        db (Session): La session de la base de données.
+        cutoff (datetime): Les tâches terminées avant cette date sont archivées.
+        batch_size (int): Le nombre maximal de tâches du lot. Par défaut, ARCHIVE_BATCH_SIZE.
+
+    Returns:
+        int: Le nombre de tâches archivées.
+    """
+    if _is_postgresql(db):
+        moved = _move_postgresql(db, cutoff, batch_size)
+    else:
+        moved = _move(db, cutoff, batch_size)
+    if moved:
+        events.record_archived(db, [row["id"] for row in moved])
+        _bump_stats(db, total=-len(moved), completed=-sum(1 for row in moved if row["completed"]))
+    db.commit()
+    for row in moved:
+        cache.task_cache.delete(row["id"])
+    return len(moved)
+
+def archive_tasks(session_factory=None, days: int = ARCHIVE_AFTER_DAYS,
+                  batch_size: int = ARCHIVE_BATCH_SIZE, pause: float = ARCHIVE_PAUSE):
+    """
+    Archive, lot par lot, toutes les tâches terminées depuis plus de days jours.
+
+    Args:
+        session_factory (Optional[Callable[[], Session]]): La fabrique de sessions.
+            Par défaut, database.SessionLocal.
+        days (int): L'ancienneté minimale des tâches archivées, en jours.
+        batch_size (int): Le nombre de tâches par lot.
+        pause (float): La pause entre deux lots, en secondes.
+
+    Returns:
+        int: Le nombre total de tâches archivées.
+    """
+    session_factory = session_factory or database.SessionLocal
+    cutoff = _now() - timedelta(days=days)
+    total = 0
+    while True:
+        with session_factory() as db:
+            moved = archive_batch(db, cutoff, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+        time.sleep(pause)
+
+def main(argv=None):
+    """
+    Point d'entrée de python -m app.archive.
+
+    Args:
+        argv (Optional[List[str]]): Les arguments. Par défaut, ceux du processus.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="Ancienneté minimale des tâches terminées archivées, en jours.")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE,
+                        help="Nombre de tâches par lot.")
+    parser.add_argument("--pause", type=float, default=ARCHIVE_PAUSE,
+                        help="Pause entre deux lots, en secondes.")
+    args = parser.parse_args(argv)
+    database.init_engine()
+    events.instrument_sessions()
+    total = archive_tasks(days=args.days, batch_size=args.batch_size, pause=args.pause)
+    print(f"Tâches archivées : {total}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Ce module fournit les versions asynchrones des contrôleurs de tâches.
+Elles reprennent le comportement de app.controllers sur une AsyncSession :
+mêmes événements (app.events), même cache et mêmes vérifications de version (If-Match).
+"""
+
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import cache, events, models, schemas
+from .controllers import (
+    VersionMismatch, _as_dict, _bulk_insert_statements, _count_completed, _delete_statement,
+    _insert_values, _is_postgresql, _patch_values, _set_completed_at, _snapshot, _stats_statement,
+    _task_values, _update_statement
+)
+
+async def _bump_stats(db: AsyncSession, total: int = 0, completed: int = 0):
+    """
+    Met à jour les compteurs de tâches dans la transaction en cours.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        total (int): La variation du nombre total de tâches. Par défaut, 0.
+        completed (int): La variation du nombre de tâches terminées. Par défaut, 0.
+    """
+    if total or completed:
+        await db.execute(_stats_statement(total, completed))
+
+async def get_task(db: AsyncSession, task_id: int):
+    """
+    Récupère une tâche par son ID, en passant par le cache des tâches.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        task_id (int): L'ID de la tâche à récupérer.
+
+    Returns:
+        Task: L'objet tâche si trouvé, sinon None.
+    """
+    cached = cache.task_cache.get(task_id)
+    if cached is not None:
+        return models.Task(**cached)
+    result = await db.execute(select(models.Task).where(models.Task.id == task_id))
+    db_task = result.scalars().first()
+    if db_task is not None:
+        cache.task_cache.set(task_id, _as_dict(db_task))
+    return db_task
+
+async def get_tasks(
+    db: AsyncSession, skip: int = 0, limit: int = 10, after_id: Optional[int] = None
+):
+    """
+    Récupère une liste de tâches, triées par ID, avec pagination optionnelle.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        skip (int): Le nombre de tâches à ignorer. Par défaut, 0.
+        limit (int): Le nombre maximum de tâches à retourner. Par défaut, 10.
+        after_id (Optional[int]): Ne retourne que les tâches d'ID supérieur. Par défaut, None.
+
+    Returns:
+        List[Task]: Une liste d'objets tâche.
+    """
+    query = select(models.Task)
+    if after_id is not None:
+        query = query.where(models.Task.id > after_id)
+    query = query.order_by(models.Task.id)
+    if skip:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
+
+async def create_task(db: AsyncSession, task: schemas.TaskCreate):
+    """
+    Crée une nouvelle tâche dans la base de données.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        task (schemas.TaskCreate): Les données de la tâche à créer.
+
+    Returns:
+        Task: L'objet tâche créé.
+    """
+    db_task = models.Task(**_insert_values(task))
+    db.add(db_task)
+    await db.flush()
+    events.record(db, events.CREATED, db_task)
+    await _bump_stats(db, total=1, completed=int(bool(task.completed)))
+    await db.commit()
+    return db_task
+
+async def create_tasks(db: AsyncSession, tasks: List[schemas.TaskCreate]):
+    """
+    Crée plusieurs tâches dans une seule transaction.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        tasks (List[schemas.TaskCreate]): Les données des tâches à créer.
+
+    Returns:
+        List[Task]: Les objets tâche créés, avec leurs IDs générés.
+    """
+    if not tasks:
+        return []
+    if _is_postgresql(db):
+        created = []
+        for statement in _bulk_insert_statements(tasks):
+            result = await db.execute(statement)
+            created.extend(_snapshot(row) for row in result.all())
+        events.record_created(db, created)
+        await _bump_stats(db, total=len(created), completed=_count_completed(created))
+        await db.commit()
+        return created
+    db_tasks = [models.Task(**_insert_values(task)) for task in tasks]
+    db.add_all(db_tasks)
+    await db.flush()
+    events.record_created(db, db_tasks)
+    await _bump_stats(db, total=len(db_tasks), completed=_count_completed(db_tasks))
+    await db.commit()
+    return db_tasks
+
+async def _check_version(
+    db: AsyncSession, task_id: int, db_task, expected_version: Optional[int]
+):
+    """
+    Vérifie la version d'une tâche avant son écriture, comme controllers._check_version.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        task_id (int): L'ID de la tâche.
+        db_task: La tâche lue ou écrite, ou None.
+        expected_version (Optional[int]): La version attendue, ou None pour ne pas vérifier.
+
+    Raises:
+        VersionMismatch: Si la tâche existe à une autre version.
+    """
+    if expected_version is None:
+        return
+    if db_task is None:
+        result = await db.execute(select(models.Task.id).where(models.Task.id == task_id))
+        if result.first() is not None:
+            raise VersionMismatch(task_id)
+    elif db_task.version != expected_version:
+        raise VersionMismatch(task_id)
+
+async def delete_task(db: AsyncSession, task_id: int, expected_version: Optional[int] = None):
+    """
+    Supprime une tâche par son ID et l'invalide dans le cache.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        task_id (int): L'ID de la tâche à supprimer.
+        expected_version (Optional[int]): Ne supprime la tâche que si elle est
+            à cette version (If-Match). Par défaut, None.
+
+    Raises:
+        VersionMismatch: Si la tâche n'est pas à la version attendue.
+
+    Returns:
+        Task: L'objet tâche supprimé si trouvé, sinon None.
+    """
+    if _is_postgresql(db):
+        result = await db.execute(_delete_statement(task_id, expected_version))
+        row = result.first()
+        db_task = _snapshot(row) if row else None
+        await _check_version(db, task_id, db_task, expected_version)
+    else:
+        result = await db.execute(select(models.Task).where(models.Task.id == task_id))
+        db_task = result.scalars().first()
+        await _check_version(db, task_id, db_task, expected_version)
+        if db_task:
+            await db.delete(db_task)
+    if db_task:
+        events.record(db, events.DELETED, db_task)
+        await _bump_stats(db, total=-1, completed=-int(bool(db_task.completed)))
+        await db.commit()
+        cache.task_cache.delete(task_id)
+    return db_task
+
+async def _update_task(
+    db: AsyncSession, task_id: int, values: dict, expected_version: Optional[int] = None
+):
+    """
+    Modifie les colonnes d'une tâche, incrémente sa version et rafraîchit son entrée
+    dans le cache.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        task_id (int): L'ID de la tâche à mettre à jour.
+        values (dict): Les valeurs des colonnes à modifier.
+        expected_version (Optional[int]): Ne modifie la tâche que si elle est
+            à cette version (If-Match). Par défaut, None.
+
+    Raises:
+        VersionMismatch: Si la tâche n'est pas à la version attendue.
+
+    Returns:
+        Task: L'objet tâche mis à jour si trouvé, sinon None.
+    """
+    if _is_postgresql(db):
+        result = await db.execute(_update_statement(task_id, values, expected_version))
+        row = result.first()
+        db_task = _snapshot(row) if row else None
+        previous_completed = row.previous_completed if row else None
+        await _check_version(db, task_id, db_task, expected_version)
+    else:
+        result = await db.execute(select(models.Task).where(models.Task.id == task_id))
+        db_task = result.scalars().first()
+        await _check_version(db, task_id, db_task, expected_version)
+        previous_completed = db_task.completed if db_task else None
+        if db_task:
+            for key, value in values.items():
+                setattr(db_task, key, value)
+            _set_completed_at(db_task, previous_completed)
+            db_task.version = (db_task.version or 0) + 1
+    if db_task:
+        events.record(db, events.UPDATED, db_task)
+        delta = int(bool(db_task.completed)) - int(bool(previous_completed))
+        await _bump_stats(db, completed=delta)
+        await db.commit()
+        cache.task_cache.set(task_id, _as_dict(db_task))
+    return db_task
+
+async def update_task(
+    db: AsyncSession, task_id: int, updated_task: schemas.TaskCreate,
+    expected_version: Optional[int] = None,
+):
+    """
+    Met à jour une tâche existante par son ID.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        task_id (int): L'ID de la tâche à mettre à jour.
+        updated_task (schemas.TaskCreate): Les nouvelles données de la tâche.
+        expected_version (Optional[int]): Ne modifie la tâche que si elle est
+            à cette version (If-Match). Par défaut, None.
+
+    Raises:
+        VersionMismatch: Si la tâche n'est pas à la version attendue.
+
+    Returns:
+        Task: L'objet tâche mis à jour si trouvé, sinon None.
+    """
+    return await _update_task(db, task_id, _task_values(updated_task), expected_version)
+
+async def patch_task(
+    db: AsyncSession, task_id: int, task_patch: schemas.TaskUpdate,
+    expected_version: Optional[int] = None,
+):
+    """
+    Met à jour uniquement les champs envoyés d'une tâche existante.
+
+    Args:
+        db (AsyncSession): La session asynchrone de la base de données.
+        task_id (int): L'ID de la tâche à mettre à jour.
+        task_patch (schemas.TaskUpdate): Les champs à modifier.
+        expected_version (Optional[int]): Ne modifie la tâche que si elle est
+            à cette version (If-Match). Par défaut, None.
+
+    Raises:
+        VersionMismatch: Si la tâche n'est pas à la version attendue.
+
+    Returns:
+        Task: L'objet tâche mis à jour si trouvé, sinon None.
+    """
+    values = _patch_values(task_patch)
+    if not values:
+        db_task = await get_task(db, task_id)
+        await _check_version(db, task_id, db_task, expected_version)
+        return db_task
+    return await _update_task(db, task_id, values, expected_version)
@@ -0,0 +1,306 @@
+"""
+Ce module définit la variante asynchrone de l'API de gestion des tâches.
+Les points de terminaison sont des coroutines qui utilisent un moteur SQLAlchemy
+asynchrone (asyncpg ou aiosqlite) au lieu du pool de threads de Starlette.
+
+Elle est sélectionnée en lançant le serveur sur app.async_main:app,
+par exemple avec APP_MODULE=app.async_main:app dans l'image Docker.
+"""
+
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Depends, Header, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import cache, etags, events, init_db, responses, schemas, async_controllers
+from .controllers import VersionMismatch
+from .database import get_async_db, get_async_engine
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Démarre l'écoute des notifications et libère le moteur asynchrone à l'arrêt.
+
+    Le moteur est créé au premier usage, sans connexion au démarrage :
+    le schéma est créé à part, par python -m app.init_db. Comme dans app.main,
+    sur PostgreSQL et lorsque le cache des tâches est actif, l'écoute des
+    notifications invalide le cache de ce worker après les écritures des autres.
+
+    Args:
+        _app (FastAPI): L'application démarrée.
+    """
+    if cache.TASK_CACHE_SIZE > 0:
+        events.start_listener()
+    yield
+    events.stop_listener()
+    await get_async_engine().dispose()
+
+
+app = FastAPI(
+    title="Tasks Api",
+    description="Tasks Api créée pour un projet d'intégration continue (mode asynchrone)",
+    summary="L'application préférée de Deadpool. Assez dit.",
+    version="0.0.1",
+    lifespan=lifespan,
+)
+
+events.instrument_sessions()
+
+if responses.GZIP_ENABLED:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=responses.GZIP_MINIMUM_SIZE,
+        compresslevel=responses.GZIP_COMPRESSLEVEL,
+    )
+
+def _expected_version(if_match: Optional[str], task_id: int):
+    """
+    Lit la version attendue d'une tâche dans l'en-tête If-Match.
+
+    Args:
+        if_match (Optional[str]): La valeur de l'en-tête If-Match.
+        task_id (int): L'ID de la tâche modifiée.
+
+    Raises:
+        HTTPException: Si l'en-tête ne désigne pas cette tâche.
+
+    Returns:
+        Optional[int]: La version attendue, ou None pour ne pas la vérifier.
+    """
+    try:
+        return etags.expected_version(if_match, task_id)
+    except ValueError as error:
+        raise HTTPException(status_code=412, detail="Precondition failed") from error
+
+@app.get("/", response_model=dict, tags=["Health Check"])
+async def api_status():
+    """
+    Vérifie l'état de l'API.
+
+    Returns:
+        dict: Un dictionnaire avec le statut de l'API.
+    """
+    return {"status": "running"}
+
+@app.get("/ready", response_model=dict, tags=["Health Check"])
+async def api_ready():
+    """
+    Vérifie que l'API peut servir des requêtes : la base répond et son schéma est à jour.
+
+    Returns:
+        dict: Le statut "ready", ou une réponse 503 avec la raison de l'indisponibilité.
+    """
+    try:
+        async with get_async_engine().connect() as connection:
+            missing = await connection.run_sync(init_db.missing_schema)
+    except SQLAlchemyError as error:
+        detail = str(getattr(error, "orig", None) or error)
+        return JSONResponse(status_code=503, content={"status": "unavailable", "detail": detail})
+    if missing:
+        return JSONResponse(status_code=503, content={"status": "outdated", "missing": missing})
+    return {"status": "ready"}
+
+@app.get("/cache/stats", response_model=dict, tags=["Monitoring"])
+async def get_cache_stats():
+    """
+    Retourne les compteurs du cache des tâches.
+
+    Returns:
+        dict: Les compteurs hits, misses, evictions et la taille du cache.
+    """
+    return cache.task_cache.stats()
+
+@app.post("/tasks/", response_model=schemas.Task, tags=["Tasks"])
+async def create_task(task: schemas.TaskCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Crée une nouvelle tâche.
+
+    Args:
+        task (schemas.TaskCreate): Les données de la tâche à créer.
+        db (AsyncSession): La session asynchrone de la base de données.
+
+    Returns:
+        schemas.Task: La tâche créée.
+    """
+    return await async_controllers.create_task(db=db, task=task)
+
+@app.post("/tasks/bulk", response_model=List[schemas.Task], tags=["Tasks"])
+async def create_tasks(tasks: List[schemas.TaskCreate], db: AsyncSession = Depends(get_async_db)):
+    """
+    Crée plusieurs tâches en une seule transaction.
+
+    Args:
+        tasks (List[schemas.TaskCreate]): Les données des tâches à créer.
+        db (AsyncSession): La session asynchrone de la base de données.
+
+    Returns:
+        List[schemas.Task]: Les tâches créées.
+    """
+    return await async_controllers.create_tasks(db=db, tasks=tasks)
+
+@app.get("/tasks/", response_model=List[schemas.Task], tags=["Tasks"])
+async def get_tasks(
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Récupère une liste de tâches avec pagination.
+
+    Args:
+        response (Response): La réponse HTTP, pour l'en-tête X-Next-Cursor.
+        skip (int): Le nombre de tâches à ignorer. Par défaut, 0.
+        limit (int): Le nombre maximum de tâches à retourner. Par défaut, 10.
+        cursor (Optional[int]): L'ID de la dernière tâche de la page précédente. Par défaut, None.
+        db (AsyncSession): La session asynchrone de la base de données.
+
+    Returns:
+        List[schemas.Task]: Une liste de tâches.
+    """
+    tasks = await async_controllers.get_tasks(db=db, skip=skip, limit=limit, after_id=cursor)
+    if tasks and len(tasks) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(tasks[-1].id)
+    return tasks
+
+@app.get("/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
+async def get_task(
+    task_id: int, response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Récupère une tâche par son ID.
+
+    La réponse porte l'ETag de la tâche, à renvoyer dans If-Match pour la modifier.
+
+    Args:
+        task_id (int): L'ID de la tâche à récupérer.
+        response (Response): La réponse HTTP, pour l'en-tête ETag.
+        db (AsyncSession): La session asynchrone de la base de données.
+
+    Raises:
+        HTTPException: Si la tâche n'est pas trouvée.
+
+    Returns:
+        schemas.Task: La tâche trouvée.
+    """
+    db_task = await async_controllers.get_task(db, task_id=task_id)
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    response.headers["ETag"] = etags.task_etag(db_task)
+    return db_task
+
+@app.put("/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
+async def update_task(
+    task_id: int,
+    updated_task: schemas.TaskCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Met à jour une tâche existante.
+
+    Avec l'en-tête If-Match, la tâche n'est modifiée que si elle est toujours
+    à la version de l'ETag envoyé.
+
+    Args:
+        task_id (int): L'ID de la tâche à mettre à jour.
+        updated_task (schemas.TaskCreate): Les nouvelles données de la tâche.
+        response (Response): La réponse HTTP, pour l'en-tête ETag.
+        if_match (Optional[str]): L'ETag attendu de la tâche. Par défaut, None.
+        db (AsyncSession): La session asynchrone de la base de données.
+
+    Raises:
+        HTTPException: Si la tâche n'est pas trouvée, ou si elle a été modifiée (412).
+
+    Returns:
+        schemas.Task: La tâche mise à jour.
+    """
+    expected_version = _expected_version(if_match, task_id)
+    try:
+        db_task = await async_controllers.update_task(
+            db, task_id=task_id, updated_task=updated_task, expected_version=expected_version
+        )
+    except VersionMismatch as error:
+        raise HTTPException(status_code=412, detail="Precondition failed") from error
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    response.headers["ETag"] = etags.task_etag(db_task)
+    return db_task
+
+@app.patch("/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
+async def patch_task(
+    task_id: int,
+    task_patch: schemas.TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Met à jour uniquement les champs envoyés d'une tâche existante.
+
+    Avec l'en-tête If-Match, la tâche n'est modifiée que si elle est toujours
+    à la version de l'ETag envoyé.
+
+    Args:
+        task_id (int): L'ID de la tâche à mettre à jour.
+        task_patch (schemas.TaskUpdate): Les champs à modifier.
+        response (Response): La réponse HTTP, pour l'en-tête ETag.
+        if_match (Optional[str]): L'ETag attendu de la tâche. Par défaut, None.
+        db (AsyncSession): La session asynchrone de la base de données.
+
+    Raises:
+        HTTPException: Si la tâche n'est pas trouvée, ou si elle a été modifiée (412).
+
+    Returns:
+        schemas.Task: La tâche mise à jour.
+    """
+    expected_version = _expected_version(if_match, task_id)
+    try:
+        db_task = await async_controllers.patch_task(
+            db, task_id=task_id, task_patch=task_patch, expected_version=expected_version
+        )
+    except VersionMismatch as error:
+        raise HTTPException(status_code=412, detail="Precondition failed") from error
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    response.headers["ETag"] = etags.task_etag(db_task)
+    return db_task
+
+@app.delete("/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
+async def delete_task(
+    task_id: int, if_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Supprime une tâche par son ID.
+
+    Avec l'en-tête If-Match, la tâche n'est supprimée que si elle est toujours
+    à la version de l'ETag envoyé.
+
+    Args:
+        task_id (int): L'ID de la tâche à supprimer.
+        if_match (Optional[str]): L'ETag attendu de la tâche. Par défaut, None.
+        db (AsyncSession): La session asynchrone de la base de données.
+
+    Raises:
+        HTTPException: Si la tâche n'est pas trouvée, ou si elle a été modifiée (412).
+
+    Returns:
+        schemas.Task: La tâche supprimée.
+    """
+    expected_version = _expected_version(if_match, task_id)
+    try:
+        db_task = await async_controllers.delete_task(
+            db, task_id=task_id, expected_version=expected_version
+        )
+    except VersionMismatch as error:
+        raise HTTPException(status_code=412, detail="Precondition failed") from error
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return db_task
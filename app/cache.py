@@ -0,0 +1,135 @@
+"""
+Ce module fournit le cache des tâches lues par ID.
+Il définit l'interface des backends de cache et une implémentation LRU en mémoire,
+bornée en taille et avec expiration (TTL), utilisée par défaut.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+TASK_CACHE_SIZE = int(os.getenv('TASK_CACHE_SIZE', '1024'))
+TASK_CACHE_TTL = float(os.getenv('TASK_CACHE_TTL', '60'))
+
+class CacheBackend:
+    """
+    Interface d'un backend de cache.
+
+    Les valeurs stockées sont des dictionnaires de types simples, afin qu'un
+    backend partagé (Redis, memcached...) puisse les sérialiser.
+    """
+
+    def get(self, key):
+        """
+        Récupère une valeur du cache.
+
+        Args:
+            key: La clé de la valeur.
+
+        Returns:
+            La valeur si elle est présente et valide, sinon None.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """
+        Enregistre une valeur dans le cache.
+
+        Args:
+            key: La clé de la valeur.
+            value: La valeur à enregistrer.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """
+        Invalide une valeur du cache.
+
+        Args:
+            key: La clé de la valeur à invalider.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Vide le cache et remet ses compteurs à zéro.
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Retourne les compteurs du cache.
+
+        Returns:
+            dict: Les compteurs hits, misses, evictions et la taille du cache.
+        """
+        raise NotImplementedError
+
+class LRUCache(CacheBackend):  # pylint: disable=too-many-instance-attributes
+    """
+    Cache LRU en mémoire, borné en taille, avec expiration des entrées.
+
+    Attributes:
+        maxsize (int): Le nombre maximum d'entrées. 0 désactive le cache.
+        ttl (float): La durée de vie d'une entrée, en secondes.
+    """
+
+    def __init__(self, maxsize: int = TASK_CACHE_SIZE, ttl: float = TASK_CACHE_TTL,
+                 clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self._evictions += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+# Cache des tâches par ID. Il peut être remplacé par tout autre CacheBackend.
+task_cache = LRUCache()
@@ -3,35 +3,391 @@ Ce module fournit les contrôleurs pour gérer les opérations de tâches.
 Il comprend des fonctions pour obtenir, créer, supprimer et mettre à jour des tâches dans la bdd.
 """
 
+import csv
+import io
+import re
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional, Tuple
+from sqlalchemy import (
+    Numeric, and_, case, cast, delete, func, insert, literal_column, or_, select, update
+)
 from sqlalchemy.orm import Session
-from . import models, schemas
+from . import cache, database, events, models, schemas
 
-def get_task(db: Session, task_id: int):
+BULK_INSERT_CHUNK_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000
+# Colonnes de l'export, dans l'ordre de l'en-tête CSV.
+EXPORT_COLUMNS = ("id", "title", "description", "completed", "completed_at")
+
+# Champs retournés par la liste des tâches, dans l'ordre de schemas.Task.
+LIST_FIELDS = ("title", "description", "completed", "id", "version", "completed_at")
+LIST_COLUMNS = tuple(models.Task.__table__.c[name] for name in LIST_FIELDS)
+# Champs toujours lus par une projection : le curseur et l'ETag de la page en dépendent.
+KEY_FIELDS = ("id", "version")
+
+class VersionMismatch(Exception):
+    """
+    Levée lorsque la version d'une tâche ne correspond pas à la version attendue
+    (en-tête If-Match) : la tâche a été modifiée entre-temps.
+    """
+
+def _is_postgresql(db: Session):
     """
-    Récupère une tâche par son ID.
+    Indique si la base de données est PostgreSQL, qui supporte RETURNING et COPY.
+
+    Args:
+        db (Session): La session de la base de données.
+
+    Returns:
+        bool: True pour PostgreSQL, sinon False.
+    """
+    return db.get_bind().dialect.name == "postgresql"
+
+def _as_dict(db_task):
+    """
+    Extrait les colonnes d'une tâche dans un dictionnaire.
+
+    Args:
+        db_task: L'objet tâche (ou la ligne) à lire.
+
+    Returns:
+        dict: Les valeurs des colonnes de la tâche.
+    """
+    return {column.name: getattr(db_task, column.name) for column in models.Task.__table__.columns}
+
+def _snapshot(db_task):
+    """
+    Copie une tâche dans un objet détaché, lisible après le commit sans nouveau SELECT.
+
+    Args:
+        db_task: L'objet tâche (ou la ligne) à copier.
+
+    Returns:
+        Task: Un objet tâche transitoire avec les mêmes valeurs.
+    """
+    return models.Task(**_as_dict(db_task))
+
+def _now():
+    """
+    Retourne la date courante, utilisée pour completed_at.
+
+    Returns:
+        datetime: La date courante, en UTC.
+    """
+    return datetime.now(timezone.utc)
+
+def get_task(db: Session, task_id: int, include_archived: bool = False):
+    """
+    Récupère une tâche par son ID, en passant par le cache des tâches.
+
+    Pour une session de database.get_read_db, un client qui vient d'écrire
+    (READ_FROM_PINNED) lit sur le primaire sans passer par le cache, et une tâche
+    lue sur un réplica (READ_FROM_REPLICA), peut-être en retard, n'est pas mise en cache.
 
     Args:
         db (Session): La session de la base de données.
         task_id (int): L'ID de la tâche à récupérer.
+        include_archived (bool): Cherche aussi dans les tâches archivées. Par défaut, False.
 
     Returns:
-        Task: L'objet tâche si trouvé, sinon None.
+        Task: L'objet tâche (ou ArchivedTask) si trouvé, sinon None.
     """
-    return db.query(models.Task).filter(models.Task.id == task_id).first()
+    read_from = db.info.get(database.READ_FROM_KEY)
+    if read_from != database.READ_FROM_PINNED:
+        cached = cache.task_cache.get(task_id)
+        if cached is not None:
+            return models.Task(**cached)
+    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    if db_task is not None and read_from != database.READ_FROM_REPLICA:
+        cache.task_cache.set(task_id, _as_dict(db_task))
+    if db_task is None and include_archived:
+        db_task = db.query(models.ArchivedTask).filter(models.ArchivedTask.id == task_id).first()
+    return db_task
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 10):
+def _list_fields(fields: Optional[List[str]]):
     """
-    Récupère une liste de tâches avec pagination optionnelle.
+    Valide les champs demandés pour la liste des tâches.
+
+    Args:
+        fields (Optional[List[str]]): Les champs demandés, ou None pour tous.
+
+    Raises:
+        ValueError: Si un champ demandé n'existe pas.
+
+    Returns:
+        Tuple[str, ...]: Les champs à lire, dans l'ordre de LIST_FIELDS, avec KEY_FIELDS.
+    """
+    if not fields:
+        return LIST_FIELDS
+    unknown = set(fields) - set(LIST_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in LIST_FIELDS if name in fields or name in KEY_FIELDS)
+
+def _filter_tasks(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    db: Session, table, names, after_id: Optional[int], completed: Optional[bool],
+    title_prefix: Optional[str],
+):
+    """
+    Prépare la lecture filtrée des colonnes d'une table de tâches.
+
+    Args:
+        db (Session): La session de la base de données.
+        table (Table): La table tasks ou tasks_archive.
+        names (Tuple[str, ...]): Les colonnes à lire.
+        after_id (Optional[int]): Ne lit que les tâches d'ID supérieur.
+        completed (Optional[bool]): Ne lit que les tâches dans cet état.
+        title_prefix (Optional[str]): Ne lit que les tâches dont le titre commence par ce texte.
+
+    Returns:
+        Query: La requête, sans tri ni pagination.
+    """
+    query = db.query(*(table.c[name] for name in names))
+    if after_id is not None:
+        query = query.filter(table.c.id > after_id)
+    if completed is not None:
+        query = query.filter(table.c.completed.is_(completed))
+    if title_prefix:
+        query = query.filter(table.c.title.startswith(title_prefix, autoescape=True))
+    return query
+
+def get_tasks(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    db: Session,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: Optional[int] = None,
+    completed: Optional[bool] = None,
+    title_prefix: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    include_archived: bool = False,
+):
+    """
+    Récupère une liste de tâches, triées par ID, avec pagination et filtres optionnels.
+
+    La pagination par curseur (after_id) parcourt l'index de la clé primaire
+    directement : son coût ne dépend pas de la profondeur de la page, contrairement
+    à skip qui oblige la base à lire puis ignorer les lignes sautées. Le filtre
+    completed=False utilise l'index partiel ix_tasks_pending.
+
+    Seules les colonnes sont lues, sans construire d'objets ORM : les lignes sont
+    retournées sous forme de dictionnaires, prêtes à être encodées en JSON.
+    Avec fields, seules les colonnes demandées sont lues, plus id et version.
+    Avec include_archived, les tâches archivées sont ajoutées à la liste (UNION ALL).
 
     Args:
         db (Session): La session de la base de données.
         skip (int): Le nombre de tâches à ignorer. Par défaut, 0.
         limit (int): Le nombre maximum de tâches à retourner. Par défaut, 10.
+        after_id (Optional[int]): Ne retourne que les tâches d'ID supérieur. Par défaut, None.
+        completed (Optional[bool]): Ne retourne que les tâches dans cet état. Par défaut, None.
+        title_prefix (Optional[str]): Ne retourne que les tâches dont le titre commence
+            par ce texte. Par défaut, None.
+        fields (Optional[List[str]]): Les champs à lire, parmi LIST_FIELDS.
+            Par défaut, None pour tous les champs.
+        include_archived (bool): Inclut les tâches archivées. Par défaut, False.
+
+    Raises:
+        ValueError: Si un champ demandé n'existe pas.
+
+    Returns:
+        List[dict]: Les tâches, avec les champs de schemas.Task, ou ceux demandés.
+    """
+    names = _list_fields(fields)
+    query = _filter_tasks(db, models.Task.__table__, names, after_id, completed, title_prefix)
+    if include_archived and completed is not False:
+        query = query.union_all(_filter_tasks(
+            db, models.ArchivedTask.__table__, names, after_id, completed, title_prefix
+        ))
+    query = query.order_by(models.Task.id)
+    if skip:
+        query = query.offset(skip)
+    return [dict(zip(names, row)) for row in query.limit(limit).all()]
+
+def _stats_statement(total: int, completed: int):
+    """
+    Prépare l'incrémentation des compteurs de tâches.
+
+    Args:
+        total (int): La variation du nombre total de tâches.
+        completed (int): La variation du nombre de tâches terminées.
+
+    Returns:
+        Update: La requête de mise à jour des compteurs.
+    """
+    table = models.TaskStats.__table__
+    return update(table).where(table.c.id == models.STATS_ID).values(
+        total=table.c.total + total, completed=table.c.completed + completed
+    )
+
+def _bump_stats(db: Session, total: int = 0, completed: int = 0):
+    """
+    Met à jour les compteurs de tâches dans la transaction en cours.
+
+    Args:
+        db (Session): La session de la base de données.
+        total (int): La variation du nombre total de tâches. Par défaut, 0.
+        completed (int): La variation du nombre de tâches terminées. Par défaut, 0.
+    """
+    if total or completed:
+        db.execute(_stats_statement(total, completed))
+
+def _count_completed(tasks):
+    """
+    Compte les tâches terminées.
+
+    Args:
+        tasks (Iterable): Les tâches (schémas, objets ou lignes).
+
+    Returns:
+        int: Le nombre de tâches terminées.
+    """
+    return sum(1 for task in tasks if task.completed)
+
+def get_stats(db: Session):
+    """
+    Récupère les compteurs de tâches, sans COUNT(*) sur la table des tâches.
+
+    La ligne de compteurs est créée par python -m app.init_db, puis tenue à jour
+    par les écritures. Tant qu'elle manque, les tâches sont comptées à chaque appel.
+
+    Args:
+        db (Session): La session de la base de données.
+
+    Returns:
+        dict: Les nombres total, completed et pending de tâches.
+    """
+    stats = db.query(models.TaskStats).filter(models.TaskStats.id == models.STATS_ID).first()
+    if stats is None:
+        total, completed = db.query(
+            func.count(models.Task.id), func.count(models.Task.id).filter(models.Task.completed)
+        ).one()
+    else:
+        total, completed = stats.total, stats.completed
+    return {"total": total, "completed": completed, "pending": total - completed}
+
+def _search_rank(db: Session, query: str):
+    """
+    Construit le filtre et le score de pertinence d'une recherche.
+
+    Sur PostgreSQL, la recherche utilise le document plein texte (index GIN
+    ix_tasks_search) avec correspondance par préfixe de chaque mot, ainsi que la
+    similarité trigramme du titre (index ix_tasks_title_trgm). Ailleurs, elle se
+    replie sur LIKE : un titre qui commence par la requête est mieux classé qu'un
+    titre qui la contient, lui-même mieux classé qu'une description.
+
+    Args:
+        db (Session): La session de la base de données.
+        query (str): Le texte recherché.
+
+    Returns:
+        Tuple[ColumnElement, ColumnElement]: Le filtre et le score des tâches trouvées.
+    """
+    if _is_postgresql(db):
+        words = re.findall(r"\w+", query)
+        document = literal_column(
+            f"to_tsvector('{models.SEARCH_CONFIG}', "
+            "coalesce(tasks.title, '') || ' ' || coalesce(tasks.description, ''))"
+        )
+        ts_query = func.to_tsquery(
+            literal_column(f"'{models.SEARCH_CONFIG}'"), " & ".join(f"{word}:*" for word in words)
+        )
+        title_match = models.Task.title.op("%")(query)
+        condition = or_(document.op("@@")(ts_query), title_match) if words else title_match
+        score = func.ts_rank(document, ts_query) + func.similarity(models.Task.title, query)
+        # Arrondi en numeric : le score doit être comparé exactement par la pagination.
+        return condition, func.round(cast(score, Numeric), 6)
+    condition = or_(
+        models.Task.title.contains(query, autoescape=True),
+        models.Task.description.contains(query, autoescape=True),
+    )
+    rank = case(
+        (models.Task.title.startswith(query, autoescape=True), 3),
+        (models.Task.title.contains(query, autoescape=True), 2),
+        else_=1,
+    )
+    return condition, rank
+
+def _parse_search_cursor(cursor: str):
+    """
+    Décode le curseur de pagination d'une recherche.
+
+    Args:
+        cursor (str): Le curseur, au format "<score>:<id>".
+
+    Raises:
+        ValueError: Si le curseur est invalide.
+
+    Returns:
+        Tuple[Decimal, int]: Le score et l'ID de la dernière tâche de la page précédente.
+    """
+    rank, _, task_id = cursor.rpartition(":")
+    try:
+        return Decimal(rank), int(task_id)
+    except (InvalidOperation, ValueError) as error:
+        raise ValueError(f"Invalid cursor: {cursor}") from error
+
+def search_tasks(db: Session, query: str, limit: int = 10, cursor: Optional[str] = None):
+    """
+    Recherche des tâches par texte, triées par pertinence puis par ID.
+
+    La pagination est par curseur sur le couple (score, ID), pour que les pages
+    profondes coûtent autant que la première.
+
+    Args:
+        db (Session): La session de la base de données.
+        query (str): Le texte recherché.
+        limit (int): Le nombre maximum de tâches à retourner. Par défaut, 10.
+        cursor (Optional[str]): Le curseur retourné avec la page précédente. Par défaut, None.
+
+    Raises:
+        ValueError: Si le curseur est invalide.
+
+    Returns:
+        Tuple[List[dict], Optional[str]]: Les tâches trouvées avec leur score,
+        et le curseur de la page suivante si la page est complète.
+    """
+    condition, rank = _search_rank(db, query)
+    matches = select(*models.Task.__table__.columns, rank.label("rank")).where(condition).subquery()
+    statement = select(matches)
+    if cursor is not None:
+        last_rank, last_id = _parse_search_cursor(cursor)
+        statement = statement.where(or_(
+            matches.c.rank < last_rank,
+            and_(matches.c.rank == last_rank, matches.c.id > last_id),
+        ))
+    statement = statement.order_by(matches.c.rank.desc(), matches.c.id).limit(limit)
+    results = [dict(row._mapping) for row in db.execute(statement)]  # pylint: disable=protected-access
+    next_cursor = None
+    if results and len(results) == limit:
+        next_cursor = f"{results[-1]['rank']}:{results[-1]['id']}"
+    return results, next_cursor
+
+def iter_tasks(db: Session, chunk_size: int = EXPORT_CHUNK_SIZE,
+               columns: Tuple[str, ...] = EXPORT_COLUMNS):
+    """
+    Parcourt toutes les tâches, triées par ID, sans les charger toutes en mémoire.
+
+    Seules les colonnes demandées sont sélectionnées (pas d'objets ORM) et les lignes
+    sont lues par paquets de chunk_size via un curseur côté serveur (stream_results)
+    lorsque le pilote le permet.
+
+    Args:
+        db (Session): La session de la base de données.
+        chunk_size (int): Le nombre de lignes lues à la fois. Par défaut, EXPORT_CHUNK_SIZE.
+        columns (Tuple[str, ...]): Les colonnes sélectionnées, dans l'ordre. Par défaut,
+            EXPORT_COLUMNS.
 
     Returns:
-        List[Task]: Une liste d'objets tâche.
+        Iterator[Row]: Les lignes des tâches, avec les colonnes demandées.
     """
-    return db.query(models.Task).offset(skip).limit(limit).all()
+    table = models.Task.__table__
+    return (
+        db.query(*(table.c[name] for name in columns))
+        .order_by(models.Task.id)
+        .execution_options(stream_results=True)
+        .yield_per(chunk_size)
+    )
 
 def create_task(db: Session, task: schemas.TaskCreate):
     """
@@ -44,46 +400,379 @@ def create_task(db: Session, task: schemas.TaskCreate):
     Returns:
         Task: L'objet tâche créé.
     """
-    db_task = models.Task(title=task.title, description=task.description, completed=task.completed)
+    db_task = models.Task(**_insert_values(task))
     db.add(db_task)
+    db.flush()
+    events.record(db, events.CREATED, db_task)
+    _bump_stats(db, total=1, completed=int(bool(task.completed)))
     db.commit()
     db.refresh(db_task)
     return db_task
 
-def delete_task(db: Session, task_id: int):
+def _bulk_insert_statements(tasks: List[schemas.TaskCreate]):
+    """
+    Prépare les INSERT multi-lignes avec RETURNING d'une création en masse.
+
+    Args:
+        tasks (List[schemas.TaskCreate]): Les données des tâches à créer.
+
+    Returns:
+        List[Insert]: Une requête par paquet de BULK_INSERT_CHUNK_SIZE tâches.
+    """
+    table = models.Task.__table__
+    values = [_insert_values(task) for task in tasks]
+    return [
+        insert(table).values(values[start:start + BULK_INSERT_CHUNK_SIZE]).returning(*table.columns)
+        for start in range(0, len(values), BULK_INSERT_CHUNK_SIZE)
+    ]
+
+def _task_values(task: schemas.TaskCreate):
+    """
+    Convertit les données d'une tâche en valeurs de colonnes.
+
+    Args:
+        task (schemas.TaskCreate): Les données de la tâche.
+
+    Returns:
+        dict: Les valeurs des colonnes title, description et completed.
+    """
+    return {"title": task.title, "description": task.description, "completed": task.completed}
+
+def _insert_values(task: schemas.TaskCreate):
+    """
+    Convertit les données d'une nouvelle tâche en valeurs de colonnes, avec completed_at.
+
+    Args:
+        task (schemas.TaskCreate): Les données de la tâche.
+
+    Returns:
+        dict: Les valeurs des colonnes title, description, completed et completed_at.
+    """
+    return {**_task_values(task), "completed_at": _now() if task.completed else None}
+
+def _set_completed_at(db_task, previous_completed):
+    """
+    Met à jour la date de fin d'une tâche modifiée : elle est fixée quand la tâche
+    est terminée, conservée tant qu'elle le reste, et effacée sinon.
+
+    Args:
+        db_task: La tâche modifiée.
+        previous_completed (bool): L'état de la tâche avant la modification.
+    """
+    if not db_task.completed:
+        db_task.completed_at = None
+    elif not previous_completed or db_task.completed_at is None:
+        db_task.completed_at = _now()
+
+def create_tasks(db: Session, tasks: List[schemas.TaskCreate]):
+    """
+    Crée plusieurs tâches dans une seule transaction.
+
+    Sur PostgreSQL, les tâches sont insérées par INSERT multi-lignes avec RETURNING,
+    par paquets de BULK_INSERT_CHUNK_SIZE lignes. Ailleurs, elles sont insérées
+    par un seul flush. Dans les deux cas, un seul commit est effectué et aucune
+    tâche n'est rechargée individuellement.
+
+    Args:
+        db (Session): La session de la base de données.
+        tasks (List[schemas.TaskCreate]): Les données des tâches à créer.
+
+    Returns:
+        List[Task]: Les objets tâche créés, avec leurs IDs générés.
+    """
+    if not tasks:
+        return []
+    if _is_postgresql(db):
+        created = []
+        for statement in _bulk_insert_statements(tasks):
+            created.extend(_snapshot(row) for row in db.execute(statement).all())
+        events.record_created(db, created)
+        _bump_stats(db, total=len(created), completed=_count_completed(created))
+        db.commit()
+        return created
+    db_tasks = [models.Task(**_insert_values(task)) for task in tasks]
+    db.add_all(db_tasks)
+    db.flush()
+    created = [_snapshot(db_task) for db_task in db_tasks]
+    events.record_created(db, created)
+    _bump_stats(db, total=len(created), completed=_count_completed(created))
+    db.commit()
+    return created
+
+def _copy_tasks(db: Session, tasks: List[schemas.TaskCreate]):
+    """
+    Insère des tâches avec COPY FROM STDIN (PostgreSQL uniquement).
+
+    Args:
+        db (Session): La session de la base de données.
+        tasks (List[schemas.TaskCreate]): Les données des tâches à insérer.
+    """
+    buffer = io.StringIO()
+    now = _now().isoformat()
+    # NULL est écrit \N, pour le distinguer d'une chaîne vide.
+    csv.writer(buffer).writerows(
+        (
+            task.title, "\\N" if task.description is None else task.description, task.completed,
+            now if task.completed else "\\N",
+        )
+        for task in tasks
+    )
+    buffer.seek(0)
+    with db.connection().connection.cursor() as cursor:
+        cursor.copy_expert(
+            "COPY tasks (title, description, completed, completed_at) "
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+
+def import_tasks(db: Session, tasks: List[schemas.TaskCreate]):
+    """
+    Insère un bloc de tâches importées et le valide par un commit.
+
+    Sur PostgreSQL, le bloc est écrit avec COPY FROM STDIN. Ailleurs, il est écrit
+    par un seul executemany. Les tâches créées ne sont pas relues.
+
+    Args:
+        db (Session): La session de la base de données.
+        tasks (List[schemas.TaskCreate]): Les données des tâches à insérer.
+
+    Returns:
+        int: Le nombre de tâches insérées.
+    """
+    if not tasks:
+        return 0
+    if _is_postgresql(db):
+        _copy_tasks(db, tasks)
+    else:
+        db.execute(insert(models.Task.__table__), [_insert_values(task) for task in tasks])
+    events.record_created(db, count=len(tasks))
+    _bump_stats(db, total=len(tasks), completed=_count_completed(tasks))
+    db.commit()
+    return len(tasks)
+
+def _patch_values(task_patch: schemas.TaskUpdate):
+    """
+    Extrait les champs envoyés d'une mise à jour partielle.
+
+    Le titre et l'état ne peuvent pas être remis à NULL : un null envoyé pour
+    ces champs est ignoré. La description peut être effacée.
+
+    Args:
+        task_patch (schemas.TaskUpdate): Les champs à modifier.
+
+    Returns:
+        dict: Les valeurs des colonnes à modifier.
+    """
+    return {
+        key: value for key, value in task_patch.dict(exclude_unset=True).items()
+        if value is not None or key == "description"
+    }
+
+def _update_statement(task_id: int, values: dict, expected_version: Optional[int] = None):
+    """
+    Prépare l'UPDATE ... RETURNING d'une tâche, qui incrémente aussi sa version.
+
+    La ligne est d'abord verrouillée (SELECT ... FOR UPDATE dans la CTE previous),
+    qui retourne aussi son état avant la modification, nécessaire aux compteurs de
+    tâches : deux modifications simultanées de la même tâche sont sérialisées, et la
+    seconde relit l'état validé par la première. Si l'état change, completed_at est
+    mis à jour comme par _set_completed_at.
+
+    Args:
+        task_id (int): L'ID de la tâche à mettre à jour.
+        values (dict): Les valeurs des colonnes à modifier.
+        expected_version (Optional[int]): Ne modifie la tâche que si elle est
+            à cette version. Par défaut, None.
+
+    Returns:
+        Update: La requête de mise à jour.
+    """
+    table = models.Task.__table__
+    previous = (
+        select(table.c.id, table.c.completed)
+        .where(table.c.id == task_id)
+        .with_for_update()
+        .cte("previous")
+    )
+    if "completed" in values:
+        values = {**values, "completed_at": case(
+            (table.c.completed.is_(True), func.coalesce(table.c.completed_at, _now())),
+            else_=_now(),
+        ) if values["completed"] else None}
+    statement = (
+        update(table)
+        .where(table.c.id == previous.c.id)
+        .values(**values, version=table.c.version + 1)
+        .returning(*table.columns, previous.c.completed.label("previous_completed"))
+    )
+    if expected_version is not None:
+        statement = statement.where(table.c.version == expected_version)
+    return statement
+
+def _delete_statement(task_id: int, expected_version: Optional[int] = None):
+    """
+    Prépare le DELETE ... RETURNING d'une tâche.
+
+    Args:
+        task_id (int): L'ID de la tâche à supprimer.
+        expected_version (Optional[int]): Ne supprime la tâche que si elle est
+            à cette version. Par défaut, None.
+
+    Returns:
+        Delete: La requête de suppression.
     """
-    Supprime une tâche par son ID.
+    table = models.Task.__table__
+    statement = delete(table).where(table.c.id == task_id).returning(*table.columns)
+    if expected_version is not None:
+        statement = statement.where(table.c.version == expected_version)
+    return statement
+
+def _check_version(db: Session, task_id: int, db_task, expected_version: Optional[int]):
+    """
+    Vérifie la version d'une tâche avant son écriture.
+
+    Sur PostgreSQL, db_task est la ligne retournée par l'écriture conditionnelle :
+    si elle est absente alors que la tâche existe, la version ne correspondait pas.
+
+    Args:
+        db (Session): La session de la base de données.
+        task_id (int): L'ID de la tâche.
+        db_task: La tâche lue ou écrite, ou None.
+        expected_version (Optional[int]): La version attendue, ou None pour ne pas vérifier.
+
+    Raises:
+        VersionMismatch: Si la tâche existe à une autre version.
+    """
+    if expected_version is None:
+        return
+    if db_task is None:
+        if db.query(models.Task.id).filter(models.Task.id == task_id).first() is not None:
+            raise VersionMismatch(task_id)
+    elif db_task.version != expected_version:
+        raise VersionMismatch(task_id)
+
+def delete_task(db: Session, task_id: int, expected_version: Optional[int] = None):
+    """
+    Supprime une tâche par son ID et l'invalide dans le cache.
+
+    Sur PostgreSQL, la suppression est un seul DELETE ... RETURNING.
 
     Args:
         db (Session): La session de la base de données.
         task_id (int): L'ID de la tâche à supprimer.
+        expected_version (Optional[int]): Ne supprime la tâche que si elle est
+            à cette version (If-Match). Par défaut, None.
+
+    Raises:
+        VersionMismatch: Si la tâche n'est pas à la version attendue.
 
     Returns:
         Task: L'objet tâche supprimé si trouvé, sinon None.
     """
-    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    if _is_postgresql(db):
+        row = db.execute(_delete_statement(task_id, expected_version)).first()
+        db_task = _snapshot(row) if row else None
+        _check_version(db, task_id, db_task, expected_version)
+    else:
+        db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
+        _check_version(db, task_id, db_task, expected_version)
+        if db_task:
+            db.delete(db_task)
     if db_task:
-        db.delete(db_task)
+        events.record(db, events.DELETED, db_task)
+        _bump_stats(db, total=-1, completed=-int(bool(db_task.completed)))
         db.commit()
+        cache.task_cache.delete(task_id)
     return db_task
 
-def update_task(db: Session, task_id: int, updated_task: schemas.TaskCreate):
+def _update_task(db: Session, task_id: int, values: dict, expected_version: Optional[int] = None):
     """
-    Met à jour une tâche existante par son ID.
+    Modifie les colonnes d'une tâche, incrémente sa version et rafraîchit son entrée
+    dans le cache.
+
+    Sur PostgreSQL, la modification est un seul UPDATE ... RETURNING. Ailleurs,
+    la tâche est lue puis modifiée, et copiée avant le commit pour ne pas être relue.
 
     Args:
         db (Session): La session de la base de données.
         task_id (int): L'ID de la tâche à mettre à jour.
-        updated_task (schemas.TaskCreate): Les nouvelles données de la tâche.
+        values (dict): Les valeurs des colonnes à modifier.
+        expected_version (Optional[int]): Ne modifie la tâche que si elle est
+            à cette version (If-Match). Par défaut, None.
+
+    Raises:
+        VersionMismatch: Si la tâche n'est pas à la version attendue.
 
     Returns:
         Task: L'objet tâche mis à jour si trouvé, sinon None.
     """
-    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    if _is_postgresql(db):
+        row = db.execute(_update_statement(task_id, values, expected_version)).first()
+        db_task = _snapshot(row) if row else None
+        previous_completed = row.previous_completed if row else None
+        _check_version(db, task_id, db_task, expected_version)
+    else:
+        db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
+        _check_version(db, task_id, db_task, expected_version)
+        previous_completed = db_task.completed if db_task else None
+        if db_task:
+            for key, value in values.items():
+                setattr(db_task, key, value)
+            _set_completed_at(db_task, previous_completed)
+            db_task.version = (db_task.version or 0) + 1
+            db_task = _snapshot(db_task)
     if db_task:
-        db_task.title = updated_task.title
-        db_task.description = updated_task.description
-        db_task.completed = updated_task.completed
+        events.record(db, events.UPDATED, db_task)
+        _bump_stats(db, completed=int(bool(db_task.completed)) - int(bool(previous_completed)))
         db.commit()
-        db.refresh(db_task)
+        cache.task_cache.set(task_id, _as_dict(db_task))
     return db_task
+
+def update_task(
+    db: Session, task_id: int, updated_task: schemas.TaskCreate,
+    expected_version: Optional[int] = None,
+):
+    """
+    Met à jour une tâche existante par son ID et rafraîchit son entrée dans le cache.
+
+    Args:
+        db (Session): La session de la base de données.
+        task_id (int): L'ID de la tâche à mettre à jour.
+        updated_task (schemas.TaskCreate): Les nouvelles données de la tâche.
+        expected_version (Optional[int]): Ne modifie la tâche que si elle est
+            à cette version (If-Match). Par défaut, None.
+
+    Raises:
+        VersionMismatch: Si la tâche n'est pas à la version attendue.
+
+    Returns:
+        Task: L'objet tâche mis à jour si trouvé, sinon None.
+    """
+    return _update_task(db, task_id, _task_values(updated_task), expected_version)
+
+def patch_task(
+    db: Session, task_id: int, task_patch: schemas.TaskUpdate,
+    expected_version: Optional[int] = None,
+):
+    """
+    Met à jour uniquement les champs envoyés d'une tâche existante.
+
+    Args:
+        db (Session): La session de la base de données.
+        task_id (int): L'ID de la tâche à mettre à jour.
+        task_patch (schemas.TaskUpdate): Les champs à modifier.
+        expected_version (Optional[int]): Ne modifie la tâche que si elle est
+            à cette version (If-Match). Par défaut, None.
+
+    Raises:
+        VersionMismatch: Si la tâche n'est pas à la version attendue.
+
+    Returns:
+        Task: L'objet tâche mis à jour si trouvé, sinon None.
+    """
+    values = _patch_values(task_patch)
+    if not values:
+        db_task = get_task(db, task_id)
+        _check_version(db, task_id, db_task, expected_version)
+        return db_task
+    return _update_task(db, task_id, values, expected_version)
@@ -2,15 +2,255 @@
 Ce module configure la connexion à la bdd.
 """
 
+import itertools
 import os
+import threading
+import time
+from functools import lru_cache
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+
+TRUE_VALUES = ("1", "true", "yes", "on")
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Réplicas en lecture, séparés par des virgules. Sans réplica, les lectures vont au primaire.
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+]
+# Durée pendant laquelle un réplica en erreur est écarté (s).
+DB_REPLICA_COOLDOWN = float(os.getenv('DB_REPLICA_COOLDOWN', '30'))
+# Durée pendant laquelle un client lit sur le primaire après une écriture (s),
+# à régler au-dessus du retard de réplication.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '5'))
+PRIMARY_COOKIE = "db_primary"
+# Origine des lectures d'une session de get_read_db, dans session.info[READ_FROM_KEY] :
+# un réplica, ou le primaire imposé par PRIMARY_COOKIE.
+READ_FROM_KEY = "read_from"
+READ_FROM_REPLICA = "replica"
+READ_FROM_PINNED = "pinned"
+
+# Configuration du pool de connexions.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '-1'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'false').lower() in TRUE_VALUES
+# Derrière PgBouncer (mode transaction), le pool est délégué à PgBouncer.
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'false').lower() in TRUE_VALUES
+
+# Pilotes asynchrones utilisés par le mode async, selon le backend de DATABASE_URL.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+class TimedQueuePool(QueuePool):
+    """
+    Pool de connexions qui mesure l'attente des requêtes pour obtenir une connexion.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._wait_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self._wait_count += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def wait_stats(self):
+        """
+        Retourne les statistiques d'attente du pool.
+
+        Returns:
+            dict: Le nombre d'obtentions de connexion, les temps d'attente total,
+            moyen et maximum en secondes, et le nombre d'expirations du délai.
+        """
+        with self._wait_lock:
+            average = self._wait_total / self._wait_count if self._wait_count else 0.0
+            return {
+                "checkouts": self._wait_count,
+                "wait_seconds_total": self._wait_total,
+                "wait_seconds_avg": average,
+                "wait_seconds_max": self._wait_max,
+                "timeouts": self._timeouts,
+            }
+
+def get_engine_options(url=None, asynchronous: bool = False):
+    """
+    Construit les options du moteur et de son pool à partir de l'environnement.
+
+    Args:
+        url (Optional[str]): L'URL de la base de données. Par défaut, DATABASE_URL.
+        asynchronous (bool): Options pour le moteur asynchrone. Par défaut, False.
+
+    Returns:
+        dict: Les options à passer à create_engine ou create_async_engine.
+    """
+    url = make_url(url or DATABASE_URL)
+    if url.get_backend_name() == "sqlite":
+        # SQLite utilise ses propres pools, sans taille configurable. La dépendance get_db
+        # et le point de terminaison peuvent s'exécuter dans deux threads du pool de Starlette.
+        return {} if asynchronous else {"connect_args": {"check_same_thread": False}}
+    if DB_PGBOUNCER:
+        options = {"poolclass": NullPool}
+        if asynchronous:
+            # PgBouncer en mode transaction ne supporte pas les requêtes préparées d'asyncpg.
+            options["connect_args"] = {"statement_cache_size": 0}
+        return options
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if not asynchronous:
+        options["poolclass"] = TimedQueuePool
+    return options
+
+@lru_cache(maxsize=None)
+def get_engine():
+    """
+    Crée, au premier appel, le moteur de la base de données.
+
+    Le moteur n'ouvre aucune connexion à sa création : importer l'application
+    et démarrer un worker ne dépendent pas de la disponibilité de la base.
+
+    Returns:
+        Engine: Le moteur de la base de données.
+    """
+    return create_engine(DATABASE_URL, **get_engine_options())
+
+# Fabrique de sessions, liée au moteur par init_engine au démarrage de l'application.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+class ReplicaSession(Session):  # pylint: disable=too-few-public-methods
+    """
+    Session de lecture liée à un réplica.
+
+    Si une requête échoue sur le réplica (OperationalError), celui-ci est écarté des
+    lectures suivantes et la requête est rejouée une fois sur le primaire : la requête
+    HTTP aboutit malgré la panne du réplica.
+    """
+
+    def execute(self, statement, *args, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Exécute une requête sur le réplica, ou sur le primaire si le réplica échoue.
+
+        Returns:
+            Result: Le résultat de la requête.
+        """
+        try:
+            return super().execute(statement, *args, **kwargs)
+        except OperationalError:
+            if self.info.get(READ_FROM_KEY) != READ_FROM_REPLICA:
+                raise
+            get_replica_router().mark_unhealthy(self.get_bind())
+            self.rollback()
+            self.bind = get_engine()  # pylint: disable=attribute-defined-outside-init
+            del self.info[READ_FROM_KEY]
+            return super().execute(statement, *args, **kwargs)
+
+# Fabrique des sessions de lecture sur un réplica, utilisée par get_read_db.
+ReplicaSessionLocal = sessionmaker(class_=ReplicaSession, autocommit=False, autoflush=False)
+
+def init_engine():
+    """
+    Crée le moteur et y lie la fabrique de sessions. L'appel est idempotent.
+
+    Returns:
+        Engine: Le moteur de la base de données.
+    """
+    bind = get_engine()
+    SessionLocal.configure(bind=bind)
+    return bind
+
+def dispose_engine():
+    """
+    Ferme les connexions du pool du moteur et de ceux des réplicas.
+    """
+    get_engine().dispose()
+    for replica in get_replica_router().engines:
+        replica.dispose()
+
+class ReplicaRouter:
+    """
+    Répartit les lectures entre les réplicas, à tour de rôle.
+
+    Un réplica en erreur est écarté pendant cooldown secondes ; si tous le sont,
+    les lectures vont au primaire.
+
+    Attributes:
+        engines (List[Engine]): Les moteurs des réplicas.
+        cooldown (float): La durée d'exclusion d'un réplica en erreur, en secondes.
+    """
+
+    def __init__(self, engines, cooldown: float = DB_REPLICA_COOLDOWN, clock=time.monotonic):
+        self.engines = list(engines)
+        self.cooldown = cooldown
+        self._clock = clock
+        self._turn = itertools.count()
+        self._unhealthy_until = {}
+
+    def choose(self):
+        """
+        Choisit le prochain réplica disponible.
+
+        Returns:
+            Optional[Engine]: Le moteur du réplica, ou None pour lire sur le primaire.
+        """
+        now = self._clock()
+        for _ in self.engines:
+            replica = self.engines[next(self._turn) % len(self.engines)]
+            if self._unhealthy_until.get(replica, 0) <= now:
+                return replica
+        return None
+
+    def mark_unhealthy(self, replica):
+        """
+        Écarte un réplica en erreur pendant la durée de cooldown.
+
+        Args:
+            replica (Engine): Le moteur du réplica.
+        """
+        self._unhealthy_until[replica] = self._clock() + self.cooldown
+
+@lru_cache(maxsize=None)
+def get_replica_router():
+    """
+    Crée, au premier appel, les moteurs des réplicas et leur répartiteur.
+
+    Les connexions des réplicas sont vérifiées avant usage (pool_pre_ping),
+    pour détecter un réplica redémarré ou injoignable.
+
+    Returns:
+        ReplicaRouter: Le répartiteur des lectures.
+    """
+    return ReplicaRouter(
+        create_engine(url, **{**get_engine_options(url), "pool_pre_ping": True})
+        for url in DATABASE_REPLICA_URLS
+    )
 
 Base = declarative_base()
 
@@ -26,3 +266,137 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """
+    Obtient une session de lecture, sur un réplica si possible, et garantit sa fermeture.
+
+    Un client qui vient d'écrire (cookie PRIMARY_COOKIE) lit sur le primaire, pour
+    voir ses propres écritures malgré le retard de réplication. Une lecture qui échoue
+    sur un réplica est rejouée sur le primaire (ReplicaSession). L'origine des lectures
+    est notée dans session.info[READ_FROM_KEY], pour que le cache des tâches n'en serve
+    ni n'en garde de périmées.
+
+    Args:
+        request (Request): La requête HTTP, pour le cookie PRIMARY_COOKIE.
+
+    Returns:
+        Generator[Session, None, None]: Un générateur de session de base de données.
+    """
+    replica = None
+    pinned = bool(DATABASE_REPLICA_URLS) and PRIMARY_COOKIE in request.cookies
+    if DATABASE_REPLICA_URLS and not pinned:
+        replica = get_replica_router().choose()
+    if replica is not None:
+        db = ReplicaSessionLocal(bind=replica)
+        db.info[READ_FROM_KEY] = READ_FROM_REPLICA
+    else:
+        db = SessionLocal()
+        if pinned:
+            db.info[READ_FROM_KEY] = READ_FROM_PINNED
+    try:
+        yield db
+    finally:
+        db.close()
+
+class StickyPrimaryMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Middleware ASGI qui, après une écriture réussie, pose le cookie PRIMARY_COOKIE :
+    les lectures du client vont au primaire pendant DB_REPLICA_STICKY_SECONDS.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, app, max_age: int = DB_REPLICA_STICKY_SECONDS):
+        self.app = app
+        self.cookie = f"{PRIMARY_COOKIE}=1; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in self.SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", self.cookie.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+def get_async_database_url(url=None):
+    """
+    Convertit une URL de base de données vers son pilote asynchrone.
+
+    Args:
+        url (Optional[str]): L'URL à convertir. Par défaut, DATABASE_URL.
+
+    Returns:
+        URL: L'URL utilisant asyncpg pour PostgreSQL ou aiosqlite pour SQLite.
+    """
+    url = make_url(url or DATABASE_URL)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername)
+
+@lru_cache(maxsize=None)
+def get_async_engine():
+    """
+    Crée, au premier appel, le moteur asynchrone de la base de données.
+
+    Returns:
+        AsyncEngine: Le moteur asynchrone.
+    """
+    # Import local : le pilote asynchrone n'est requis qu'en mode async.
+    from sqlalchemy.ext.asyncio import create_async_engine  # pylint: disable=import-outside-toplevel
+    return create_async_engine(get_async_database_url(), **get_engine_options(asynchronous=True))
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker():
+    """
+    Crée, au premier appel, la fabrique de sessions asynchrones.
+
+    Les objets ne sont pas expirés au commit, ce qui évite un SELECT
+    supplémentaire pour relire une tâche qui vient d'être écrite.
+
+    Returns:
+        sessionmaker: La fabrique de sessions asynchrones.
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession  # pylint: disable=import-outside-toplevel
+    return sessionmaker(
+        bind=get_async_engine(), class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+async def get_async_db():
+    """
+    Obtient une session asynchrone et garantit sa fermeture après utilisation.
+
+    Returns:
+        AsyncGenerator[AsyncSession, None]: Un générateur de session asynchrone.
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+def get_pool_stats(bind=None):
+    """
+    Retourne l'état du pool de connexions d'un moteur.
+
+    Args:
+        bind (Optional[Engine]): Le moteur. Par défaut, le moteur principal.
+
+    Returns:
+        dict: La classe du pool et, pour un QueuePool, les connexions ouvertes,
+        utilisées, disponibles et en débordement, ainsi que les temps d'attente.
+    """
+    pool = (bind or get_engine()).pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.wait_stats())
+    return stats
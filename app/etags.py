@@ -0,0 +1,103 @@
+"""
+Ce module calcule les ETags des tâches et évalue les en-têtes conditionnels.
+
+L'ETag d'une tâche est fort et vaut "<id>-<version>" : la version est incrémentée
+à chaque écriture. L'ETag d'une liste est l'empreinte des couples (id, version)
+de ses tâches : il peut être comparé sans sérialiser la liste.
+"""
+
+import hashlib
+from typing import Optional, Sequence
+
+def task_etag(task) -> str:
+    """
+    Calcule l'ETag d'une tâche.
+
+    Args:
+        task: La tâche (objet ou dictionnaire de colonnes).
+
+    Returns:
+        str: L'ETag fort, entre guillemets.
+    """
+    if isinstance(task, dict):
+        task_id, version = task["id"], task["version"]
+    else:
+        task_id, version = task.id, task.version
+    return f'"{task_id}-{version or 0}"'
+
+def list_etag(tasks, fields: Optional[Sequence[str]] = None) -> str:
+    """
+    Calcule l'ETag d'une liste de tâches.
+
+    Args:
+        tasks (List[dict]): Les tâches de la liste, avec leurs champs id et version.
+        fields (Optional[Sequence[str]]): Les champs de la projection, qui change
+            la représentation. Par défaut, None pour tous les champs.
+
+    Returns:
+        str: L'ETag fort, entre guillemets.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if fields:
+        digest.update(f"{','.join(fields)};".encode())
+    for task in tasks:
+        digest.update(f"{task['id']}-{task['version'] or 0},".encode())
+    return f'"{digest.hexdigest()}"'
+
+def _parse(header: str):
+    """
+    Découpe la valeur d'un en-tête If-Match ou If-None-Match.
+
+    Args:
+        header (str): La valeur de l'en-tête.
+
+    Returns:
+        List[Tuple[bool, str]]: Pour chaque ETag, s'il est faible et sa valeur entre guillemets.
+    """
+    tags = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        weak = tag.startswith("W/")
+        tags.append((weak, tag[2:] if weak else tag))
+    return tags
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """
+    Évalue un en-tête If-None-Match, avec la comparaison faible de la RFC 9110.
+
+    Args:
+        header (Optional[str]): La valeur de l'en-tête If-None-Match.
+        etag (str): L'ETag actuel de la ressource.
+
+    Returns:
+        bool: True si le client a déjà cette version (réponse 304), sinon False.
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag == etag for _, tag in _parse(header))
+
+def expected_version(header: Optional[str], task_id: int) -> Optional[int]:
+    """
+    Extrait d'un en-tête If-Match la version attendue d'une tâche.
+
+    La comparaison est forte : les ETags faibles sont ignorés.
+
+    Args:
+        header (Optional[str]): La valeur de l'en-tête If-Match.
+        task_id (int): L'ID de la tâche modifiée.
+
+    Raises:
+        ValueError: Si l'en-tête ne contient aucun ETag fort pour cette tâche.
+
+    Returns:
+        Optional[int]: La version attendue, ou None si l'en-tête est absent ou vaut *.
+    """
+    if not header or header.strip() == "*":
+        return None
+    for weak, tag in _parse(header):
+        tag_id, _, version = tag.strip('"').partition("-")
+        if not weak and tag_id == str(task_id) and version.isdigit():
+            return int(version)
+    raise ValueError(f"If-Match does not match task {task_id}")
@@ -0,0 +1,410 @@
+"""
+Ce module diffuse les modifications des tâches aux clients de GET /tasks/changes (SSE).
+
+Les contrôleurs enregistrent leurs événements (created, updated, deleted) dans la session
+avec record ; ils ne sont diffusés qu'après le commit, et abandonnés en cas de rollback.
+
+- Sur PostgreSQL, les événements sont envoyés par pg_notify dans la transaction.
+  Chaque worker écoute le canal EVENTS_CHANNEL (LISTEN) dans un thread et relaie
+  les notifications à ses clients : tous les workers voient tous les événements,
+  dans l'ordre des commits.
+- Ailleurs (SQLite, un seul processus), les événements sont diffusés en mémoire
+  après le commit.
+
+Les notifications reçues invalident aussi le cache des tâches du worker (app.cache) :
+une tâche modifiée ou supprimée par un autre worker, ou par python -m app.archive,
+n'est pas servie depuis le cache au-delà du délai de livraison de la notification.
+
+Chaque worker garde les EVENTS_HISTORY derniers événements : un client qui se
+reconnecte avec l'en-tête Last-Event-ID reçoit ceux qu'il a manqués. Si cet ID
+n'est plus dans l'historique, un événement reset lui demande de relire la liste.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from collections import deque
+from functools import lru_cache
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from . import cache, database, models
+
+EVENTS_CHANNEL = os.getenv('EVENTS_CHANNEL', 'task_changes')
+EVENTS_HISTORY = int(os.getenv('EVENTS_HISTORY', '1000'))
+# Événements en attente au-delà desquels un client trop lent est déconnecté.
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '1000'))
+# Au-delà de ce nombre de tâches créées par une transaction (POST /tasks/bulk, import),
+# un seul événement bulk_created est diffusé à la place d'un événement par tâche.
+EVENTS_BULK_THRESHOLD = int(os.getenv('EVENTS_BULK_THRESHOLD', '100'))
+# Intervalle des commentaires keep-alive envoyés aux clients sans événement (s).
+EVENTS_KEEPALIVE = float(os.getenv('EVENTS_KEEPALIVE', '15'))
+
+# Taille maximale d'une notification PostgreSQL (8000 octets), avec une marge.
+NOTIFY_MAX_BYTES = 7900
+PENDING_KEY = "task_events"
+CREATED, UPDATED, DELETED = "created", "updated", "deleted"
+BULK_CREATED = "bulk_created"
+ARCHIVED = "archived"
+# IDs par événement ARCHIVED, pour rester sous NOTIFY_MAX_BYTES.
+ARCHIVED_IDS_PER_EVENT = 500
+TASK_COLUMNS = tuple(column.name for column in models.Task.__table__.columns)
+
+logger = logging.getLogger(__name__)
+
+def record(db: Session, kind: str, task):
+    """
+    Enregistre un événement dans la session, pour le diffuser après le commit.
+
+    Args:
+        db (Session): La session de la base de données.
+        kind (str): Le type d'événement : CREATED, UPDATED ou DELETED.
+        task: La tâche modifiée (objet ou ligne), lisible après le commit.
+    """
+    values = {name: getattr(task, name) for name in TASK_COLUMNS}
+    db.info.setdefault(PENDING_KEY, []).append(
+        {"id": uuid.uuid4().hex, "type": kind, "task": jsonable_encoder(values)}
+    )
+
+def record_created(db: Session, tasks=None, count: Optional[int] = None):
+    """
+    Enregistre la création d'un lot de tâches : un événement par tâche jusqu'à
+    EVENTS_BULK_THRESHOLD tâches, sinon un seul événement BULK_CREATED, qui demande
+    aux clients de relire la liste.
+
+    Args:
+        db (Session): La session de la base de données.
+        tasks (Optional[List]): Les tâches créées, avec leurs IDs. Par défaut, None
+            lorsqu'elles ne sont pas relues (import).
+        count (Optional[int]): Le nombre de tâches créées. Par défaut, len(tasks).
+    """
+    count = len(tasks) if count is None else count
+    if not count:
+        return
+    if tasks is not None and count <= EVENTS_BULK_THRESHOLD:
+        for task in tasks:
+            record(db, CREATED, task)
+        return
+    item = {"id": uuid.uuid4().hex, "type": BULK_CREATED, "count": count}
+    if tasks:
+        item.update(first_id=tasks[0].id, last_id=tasks[-1].id)
+    db.info.setdefault(PENDING_KEY, []).append(item)
+
+def record_archived(db: Session, task_ids):
+    """
+    Enregistre l'archivage d'un lot de tâches, en événements ARCHIVED d'au plus
+    ARCHIVED_IDS_PER_EVENT IDs.
+
+    Args:
+        db (Session): La session de la base de données.
+        task_ids (List[int]): Les IDs des tâches archivées.
+    """
+    for start in range(0, len(task_ids), ARCHIVED_IDS_PER_EVENT):
+        db.info.setdefault(PENDING_KEY, []).append({
+            "id": uuid.uuid4().hex, "type": ARCHIVED,
+            "task_ids": list(task_ids[start:start + ARCHIVED_IDS_PER_EVENT]),
+        })
+
+def _notify_payload(item: dict) -> str:
+    """
+    Encode un événement pour pg_notify, sans les champs de la tâche s'il est trop long.
+
+    Args:
+        item (dict): L'événement.
+
+    Returns:
+        str: L'événement en JSON.
+    """
+    payload = json.dumps(item)
+    if len(payload.encode()) > NOTIFY_MAX_BYTES:
+        task = {"id": item["task"]["id"], "version": item["task"].get("version")}
+        payload = json.dumps({**item, "task": task, "partial": True})
+    return payload
+
+def _is_postgresql(session: Session):
+    """
+    Indique si la session écrit dans PostgreSQL.
+
+    Args:
+        session (Session): La session de la base de données.
+
+    Returns:
+        bool: True pour PostgreSQL, sinon False.
+    """
+    return session.get_bind().dialect.name == "postgresql"
+
+# Toutes les notifications d'une transaction sont envoyées en une seule requête, dans l'ordre.
+NOTIFY_STATEMENT = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) "
+    "WITH ORDINALITY AS pending(payload, position) ORDER BY position"
+)
+
+def _before_commit(session: Session):
+    pending = session.info.get(PENDING_KEY)
+    if pending and _is_postgresql(session):
+        session.execute(NOTIFY_STATEMENT, {
+            "channel": EVENTS_CHANNEL, "payloads": [_notify_payload(item) for item in pending],
+        })
+
+def _after_commit(session: Session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending and not _is_postgresql(session):
+        for item in pending:
+            broker.publish(item)
+
+def _after_soft_rollback(session: Session, _previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+
+def instrument_sessions():
+    """
+    Pose les hooks de diffusion sur toutes les sessions SQLAlchemy. L'appel est idempotent.
+    """
+    if not event.contains(Session, "after_commit", _after_commit):
+        event.listen(Session, "before_commit", _before_commit)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+class _Subscriber:  # pylint: disable=too-few-public-methods
+    """
+    File d'événements d'un client, lue dans sa boucle asyncio.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+class EventBroker:
+    """
+    Diffuse les événements aux clients connectés au worker et garde les derniers.
+
+    Les événements peuvent être publiés depuis n'importe quel thread.
+
+    Attributes:
+        queue_size (int): Les événements en attente au-delà desquels un client est déconnecté.
+    """
+
+    def __init__(self, history: int = EVENTS_HISTORY, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, item: dict):
+        """
+        Ajoute un événement à l'historique et le transmet à chaque client.
+
+        Args:
+            item (dict): L'événement, avec ses champs id, type et task.
+        """
+        with self._lock:
+            self._history.append(item)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(self._deliver, subscriber, item)
+            except RuntimeError:
+                # La boucle du client est fermée.
+                self.unsubscribe(subscriber)
+
+    def _deliver(self, subscriber: _Subscriber, item: dict):
+        if subscriber.overflowed:
+            return
+        if subscriber.queue.qsize() >= self.queue_size:
+            # Le client se reconnectera avec Last-Event-ID et reprendra dans l'historique.
+            subscriber.overflowed = True
+            item = None
+        subscriber.queue.put_nowait(item)
+
+    def subscribe(self, last_event_id: Optional[str] = None):
+        """
+        Inscrit un client, depuis sa boucle asyncio.
+
+        Args:
+            last_event_id (Optional[str]): L'ID du dernier événement reçu par le client.
+
+        Returns:
+            Tuple[_Subscriber, Optional[List[dict]]]: L'inscription, et les événements
+            manqués depuis last_event_id, ou None s'il n'est plus dans l'historique.
+        """
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            missed = [] if last_event_id is None else self._since(last_event_id)
+            self._subscribers.add(subscriber)
+        return subscriber, missed
+
+    def _since(self, last_event_id: str):
+        history = list(self._history)
+        for position, item in enumerate(history):
+            if item["id"] == last_event_id:
+                return history[position + 1:]
+        return None
+
+    def unsubscribe(self, subscriber: _Subscriber):
+        """
+        Désinscrit un client.
+
+        Args:
+            subscriber (_Subscriber): L'inscription retournée par subscribe.
+        """
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+broker = EventBroker()
+
+def invalidate_cache(item: dict):
+    """
+    Retire du cache du worker les tâches modifiées, supprimées ou archivées par un événement.
+
+    Args:
+        item (dict): L'événement reçu.
+    """
+    if item["type"] in (UPDATED, DELETED):
+        cache.task_cache.delete(item["task"]["id"])
+    for task_id in item.get("task_ids", ()):
+        cache.task_cache.delete(task_id)
+
+def format_event(item: dict) -> str:
+    """
+    Met un événement au format Server-Sent Events.
+
+    Args:
+        item (dict): L'événement.
+
+    Returns:
+        str: Le message SSE, avec son id, son type et ses données JSON.
+    """
+    data = {key: value for key, value in item.items() if key != "id"}
+    return f"id: {item['id']}\nevent: {item['type']}\ndata: {json.dumps(data)}\n\n"
+
+async def stream(request, last_event_id: Optional[str] = None, event_broker: EventBroker = None):
+    """
+    Produit le flux SSE d'un client jusqu'à sa déconnexion.
+
+    Args:
+        request (Request): La requête HTTP, pour détecter la déconnexion du client.
+        last_event_id (Optional[str]): L'ID du dernier événement reçu (Last-Event-ID).
+        event_broker (Optional[EventBroker]): Le diffuseur. Par défaut, broker.
+
+    Yields:
+        str: Les messages SSE.
+    """
+    event_broker = event_broker or broker
+    subscriber, missed = event_broker.subscribe(last_event_id)
+    try:
+        yield f"retry: {int(EVENTS_KEEPALIVE * 1000)}\n\n"
+        if missed is None:
+            yield f"event: reset\ndata: {json.dumps({'last_event_id': last_event_id})}\n\n"
+        for item in missed or ():
+            yield format_event(item)
+        while not await request.is_disconnected():
+            try:
+                item = await asyncio.wait_for(subscriber.queue.get(), EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield format_event(item)
+    finally:
+        event_broker.unsubscribe(subscriber)
+
+class PostgresListener:
+    """
+    Relaie au diffuseur du worker les notifications PostgreSQL du canal EVENTS_CHANNEL,
+    après avoir invalidé les tâches concernées dans le cache du worker.
+
+    L'écoute se fait dans un thread, sur une connexion détachée du pool et rouverte
+    après une erreur.
+
+    Attributes:
+        engine (Engine): Le moteur de la base de données.
+        event_broker (EventBroker): Le diffuseur du worker.
+    """
+
+    def __init__(self, engine, event_broker: EventBroker = None, channel: str = EVENTS_CHANNEL):
+        self.engine = engine
+        self.event_broker = event_broker or broker
+        self.channel = channel
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """
+        Démarre l'écoute, si elle n'est pas déjà démarrée.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="pg-listen", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Arrête l'écoute.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stopping.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("LISTEN %s interrupted, reconnecting", self.channel)
+                self._stopping.wait(1)
+
+    def _listen(self):
+        connection = self.engine.raw_connection()
+        connection.detach()
+        try:
+            dbapi_connection = connection.connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            while not self._stopping.is_set():
+                if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    item = json.loads(notify.payload)
+                    invalidate_cache(item)
+                    self.event_broker.publish(item)
+        finally:
+            connection.close()
+
+@lru_cache(maxsize=None)
+def get_listener():
+    """
+    Crée, au premier appel, l'écoute des notifications du worker.
+
+    Returns:
+        PostgresListener: L'écoute, sur le moteur principal.
+    """
+    return PostgresListener(database.get_engine())
+
+def start_listener():
+    """
+    Démarre, sur PostgreSQL, l'écoute des notifications du worker. L'appel est idempotent.
+    """
+    if database.get_engine().dialect.name == "postgresql":
+        get_listener().start()
+
+def stop_listener():
+    """
+    Arrête l'écoute des notifications, si elle a été démarrée.
+    """
+    get_listener().stop()
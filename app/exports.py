@@ -0,0 +1,87 @@
+"""
+Ce module sérialise les tâches pour l'export en flux (NDJSON ou CSV).
+Les lignes sont regroupées en blocs afin de limiter le nombre d'écritures
+sur la connexion, sans jamais construire l'export complet en mémoire.
+"""
+
+import csv
+import io
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from . import controllers
+from .schemas import FileFormat
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+EXPORT_COLUMNS = controllers.EXPORT_COLUMNS
+
+MEDIA_TYPES = {
+    FileFormat.NDJSON: "application/x-ndjson",
+    FileFormat.CSV: "text/csv",
+}
+
+def _ndjson_lines(rows):
+    """
+    Sérialise des lignes de tâches en NDJSON, les dates au format ISO 8601.
+
+    Args:
+        rows (List[Row]): Les lignes à sérialiser.
+
+    Returns:
+        str: Un objet JSON par ligne.
+    """
+    records = [dict(row._mapping) for row in rows]  # pylint: disable=protected-access
+    if orjson is None:
+        return "".join(json.dumps(record) + "\n" for record in jsonable_encoder(records))
+    return "".join(orjson.dumps(record).decode() + "\n" for record in records)  # pylint: disable=no-member
+
+def _csv_lines(rows):
+    """
+    Sérialise des lignes de tâches en CSV.
+
+    Args:
+        rows (List[Row]): Les lignes à sérialiser.
+
+    Returns:
+        str: Les lignes CSV, sans en-tête.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+def stream_tasks(session_factory, export_format: FileFormat,
+                 chunk_size: int = controllers.EXPORT_CHUNK_SIZE):
+    """
+    Génère l'export de toutes les tâches, bloc par bloc.
+
+    La session est ouverte et fermée par le générateur lui-même, car il est
+    consommé pendant l'envoi de la réponse, après le retour du point de terminaison.
+
+    Args:
+        session_factory (Callable[[], Session]): La fabrique de sessions.
+        export_format (FileFormat): Le format de l'export.
+        chunk_size (int): Le nombre de tâches par bloc envoyé. Par défaut, EXPORT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str]: Les blocs de l'export.
+    """
+    serialize = _csv_lines if export_format == FileFormat.CSV else _ndjson_lines
+    db = session_factory()
+    try:
+        if export_format == FileFormat.CSV:
+            yield _csv_lines([EXPORT_COLUMNS])
+        rows = []
+        for row in controllers.iter_tasks(db, chunk_size=chunk_size, columns=EXPORT_COLUMNS):
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                yield serialize(rows)
+                rows = []
+        if rows:
+            yield serialize(rows)
+    finally:
+        db.close()
@@ -0,0 +1,146 @@
+"""
+Ce module regroupe les créations de tâches simultanées en une seule transaction.
+
+Lorsque GROUP_COMMIT est activé, chaque POST /tasks/ dépose sa tâche dans une file.
+Un thread d'écriture vide la file par lots : dès que GROUP_COMMIT_MAX_BATCH tâches
+sont en attente, ou GROUP_COMMIT_WINDOW_MS millisecondes après la première, le lot
+est inséré par controllers.create_tasks (INSERT multi-lignes et un seul commit).
+Chaque appelant reçoit sa propre tâche créée, ou l'erreur du lot.
+
+La fenêtre ajoute au plus GROUP_COMMIT_WINDOW_MS de latence à une création isolée,
+en échange d'un commit par lot plutôt que par tâche sous forte charge.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import List, Tuple
+
+from . import controllers, database, schemas
+from .database import TRUE_VALUES
+
+GROUP_COMMIT = os.getenv('GROUP_COMMIT', 'false').lower() in TRUE_VALUES
+# Attente maximale d'un lot après sa première tâche (ms).
+GROUP_COMMIT_WINDOW_MS = float(os.getenv('GROUP_COMMIT_WINDOW_MS', '2'))
+# Nombre de tâches au-delà duquel un lot est écrit sans attendre la fin de la fenêtre.
+GROUP_COMMIT_MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', '100'))
+
+_STOP = object()
+
+class GroupCommitter:
+    """
+    Regroupe les créations de tâches et les écrit par lots, dans un thread dédié.
+
+    Attributes:
+        window (float): L'attente maximale d'un lot après sa première tâche, en secondes.
+        max_batch (int): Le nombre maximal de tâches par lot.
+    """
+
+    def __init__(self, window: float = GROUP_COMMIT_WINDOW_MS / 1000,
+                 max_batch: int = GROUP_COMMIT_MAX_BATCH, session_factory=None):
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._session_factory = session_factory
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, task: schemas.TaskCreate):
+        """
+        Ajoute une tâche au prochain lot et attend son écriture.
+
+        Args:
+            task (schemas.TaskCreate): Les données de la tâche à créer.
+
+        Raises:
+            Exception: L'erreur levée par l'écriture du lot.
+
+        Returns:
+            Task: La tâche créée, avec son ID généré.
+        """
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="group-commit", daemon=True
+                )
+                self._thread.start()
+            self._queue.put((task, future))
+        return future.result()
+
+    def close(self):
+        """
+        Écrit les tâches en attente puis arrête le thread d'écriture.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join()
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        """
+        Constitue un lot à partir de sa première tâche.
+
+        Args:
+            first (Tuple[schemas.TaskCreate, Future]): La première tâche du lot.
+
+        Returns:
+            Tuple[List, bool]: Le lot, et True si l'arrêt a été demandé.
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        """
+        Boucle du thread d'écriture : attend une tâche, constitue le lot et l'écrit.
+        """
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+            self._flush(batch)
+
+    def _flush(self, batch: List):
+        """
+        Écrit un lot de tâches en une transaction et transmet le résultat à chaque appelant.
+
+        Args:
+            batch (List[Tuple[schemas.TaskCreate, Future]]): Les tâches du lot.
+        """
+        session_factory = self._session_factory or database.SessionLocal
+        try:
+            with session_factory() as db:
+                created = controllers.create_tasks(db, [task for task, _ in batch])
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        for (_, future), db_task in zip(batch, created):
+            future.set_result(db_task)
+
+@lru_cache(maxsize=None)
+def get_group_committer():
+    """
+    Crée, au premier appel, le regroupeur de créations du processus.
+
+    Returns:
+        GroupCommitter: Le regroupeur, configuré par l'environnement.
+    """
+    return GroupCommitter()
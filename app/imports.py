@@ -0,0 +1,174 @@
+"""
+Ce module lit un import de tâches en flux (NDJSON ou CSV).
+Le corps de la requête est découpé en lignes au fil de sa réception, validé
+avec schemas.TaskCreate et livré par blocs, sans jamais être chargé en entier.
+"""
+
+import csv
+import json
+import os
+
+from pydantic import ValidationError
+
+from .schemas import FileFormat, TaskCreate
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', '1000'))
+
+class InvalidRecord:  # pylint: disable=too-few-public-methods
+    """
+    Ligne rejetée avant sa validation, par exemple parce que son JSON est invalide.
+
+    Attributes:
+        reason (str): La raison du rejet.
+    """
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+async def _iter_lines(body):
+    """
+    Découpe un flux d'octets en lignes de texte.
+
+    Args:
+        body (AsyncIterator[bytes]): Le corps de la requête.
+
+    Returns:
+        AsyncIterator[Tuple[int, Union[str, InvalidRecord]]]: Les lignes, avec leur numéro
+        à partir de 1, ou InvalidRecord pour celles qui ne sont pas en UTF-8.
+    """
+    pending = b""
+    line_number = 0
+    async for data in body:
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, _decode(line)
+    if pending:
+        yield line_number + 1, _decode(pending)
+
+def _decode(line: bytes):
+    """
+    Décode une ligne en UTF-8.
+
+    Args:
+        line (bytes): La ligne brute.
+
+    Returns:
+        Union[str, InvalidRecord]: Le texte de la ligne, ou InvalidRecord s'il n'est pas en UTF-8.
+    """
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as error:
+        return InvalidRecord(f"Invalid UTF-8: {error}")
+
+async def _iter_csv_records(lines):
+    """
+    Regroupe des lignes CSV en enregistrements.
+
+    Un champ entre guillemets peut contenir des retours à la ligne : un enregistrement
+    est complet lorsque son nombre de guillemets est pair.
+
+    Args:
+        lines (AsyncIterator[Tuple[int, Union[str, InvalidRecord]]]): Les lignes numérotées.
+
+    Returns:
+        AsyncIterator[Tuple[int, Union[dict, InvalidRecord]]]: Les enregistrements, avec le
+        numéro de leur première ligne.
+    """
+    header = None
+    record, record_line = [], 0
+    async for line_number, line in lines:
+        if not record:
+            record_line = line_number
+        if isinstance(line, InvalidRecord):
+            # L'enregistrement en cours est rejeté en entier.
+            record = []
+            yield record_line, line
+            continue
+        record.append(line)
+        text = "\n".join(record)
+        if text.count('"') % 2:
+            continue
+        record = []
+        if not text:
+            continue
+        values = next(csv.reader([text]), [])
+        if header is None:
+            header = values
+            continue
+        yield record_line, {key: value for key, value in zip(header, values) if value != ""}
+
+async def _iter_ndjson_records(lines):
+    """
+    Décode des lignes NDJSON en enregistrements.
+
+    Args:
+        lines (AsyncIterator[Tuple[int, Union[str, InvalidRecord]]]): Les lignes numérotées.
+
+    Returns:
+        AsyncIterator[Tuple[int, Union[Any, InvalidRecord]]]: Les valeurs JSON, ou
+        InvalidRecord pour les lignes invalides, avec leur numéro de ligne.
+    """
+    async for line_number, line in lines:
+        if isinstance(line, InvalidRecord):
+            yield line_number, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as error:
+            yield line_number, InvalidRecord(f"Invalid JSON: {error}")
+
+def _validate(record):
+    """
+    Valide un enregistrement avec schemas.TaskCreate.
+
+    Args:
+        record (Union[Any, InvalidRecord]): L'enregistrement décodé, ou InvalidRecord.
+
+    Returns:
+        Tuple[Optional[TaskCreate], Optional[str]]: La tâche valide, ou la raison du rejet.
+    """
+    if isinstance(record, InvalidRecord):
+        return None, record.reason
+    if not isinstance(record, dict):
+        return None, "Expected a JSON object"
+    try:
+        return TaskCreate(**record), None
+    except ValidationError as error:
+        return None, str(error)
+
+async def iter_task_chunks(body, file_format: FileFormat, chunk_size: int = IMPORT_CHUNK_SIZE):
+    """
+    Lit, valide et regroupe par blocs les tâches d'un import.
+
+    Args:
+        body (AsyncIterator[bytes]): Le corps de la requête.
+        file_format (FileFormat): Le format du fichier importé.
+        chunk_size (int): Le nombre de lignes par bloc. Par défaut, IMPORT_CHUNK_SIZE.
+
+    Returns:
+        AsyncIterator[Tuple[List[TaskCreate], List[Tuple[int, str]]]]: Pour chaque bloc,
+        les tâches valides et les lignes rejetées (numéro de ligne, raison).
+    """
+    lines = _iter_lines(body)
+    if file_format == FileFormat.CSV:
+        records = _iter_csv_records(lines)
+    else:
+        records = _iter_ndjson_records(lines)
+    tasks, rejected, size = [], [], 0
+    async for line_number, record in records:
+        task, error = _validate(record)
+        if task is not None:
+            tasks.append(task)
+        else:
+            rejected.append((line_number, error))
+        size += 1
+        if size >= chunk_size:
+            yield tasks, rejected
+            tasks, rejected, size = [], [], 0
+    if size:
+        yield tasks, rejected
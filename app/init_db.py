@@ -0,0 +1,195 @@
+"""
+Ce module initialise et met à jour le schéma de la base de données.
+
+Il est exécuté une seule fois par déploiement, avant le démarrage des workers :
+    python -m app.init_db
+
+Les tables absentes sont créées, puis les colonnes et les index ajoutés aux modèles
+depuis la création des tables existantes, dont, sur PostgreSQL, l'extension pg_trgm
+et les index de recherche. Sur PostgreSQL, un verrou consultatif
+sérialise les exécutions simultanées.
+"""
+
+from sqlalchemy import func, insert, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+
+from . import database, models
+
+# Clé du verrou consultatif PostgreSQL de l'initialisation ("task" en ASCII).
+INIT_LOCK_KEY = 0x7461736B
+
+# Étapes de mise à jour des bases créées par une version précédente.
+UPGRADES = (
+    # La description n'est plus indexée : la recherche utilise ix_tasks_search.
+    "DROP INDEX IF EXISTS ix_tasks_description",
+    # Les tâches terminées avant l'ajout de completed_at sont datées de la mise à jour,
+    # pour être archivées après le délai habituel.
+    "UPDATE tasks SET completed_at = CURRENT_TIMESTAMP WHERE completed AND completed_at IS NULL",
+)
+
+def missing_schema(connection):
+    """
+    Liste les tables et colonnes des modèles absentes de la base.
+
+    Args:
+        connection (Connection): Une connexion à la base de données.
+
+    Returns:
+        List[str]: Les tables (table) et colonnes (table.colonne) manquantes.
+    """
+    inspector = inspect(connection)
+    missing = []
+    for table in models.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            missing.append(table.name)
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(
+            f"{table.name}.{column.name}" for column in table.columns if column.name not in existing
+        )
+    if connection.dialect.name == "postgresql" and "tasks" not in missing:
+        missing.extend(_missing_search_objects(connection))
+    if "task_stats" not in missing and not _has_stats(connection):
+        missing.append("row:task_stats")
+    return missing
+
+def _has_stats(connection):
+    """
+    Indique si la ligne de compteurs de tâches existe.
+
+    Args:
+        connection (Connection): Une connexion à la base de données.
+
+    Returns:
+        bool: True si la ligne STATS_ID existe.
+    """
+    table = models.TaskStats.__table__
+    return connection.execute(
+        select(table.c.id).where(table.c.id == models.STATS_ID)
+    ).first() is not None
+
+def _seed_stats(connection):
+    """
+    Crée la ligne de compteurs de tâches à partir d'un comptage complet, si elle manque.
+
+    Les écritures mettent les compteurs à jour par UPDATE : elles doivent trouver la
+    ligne. Sur PostgreSQL, les écritures de tâches sont suspendues (LOCK SHARE) le temps
+    du comptage, pour qu'aucune ne soit validée entre le comptage et l'INSERT.
+
+    Args:
+        connection (Connection): Une connexion à la base de données, dans une transaction.
+    """
+    if _has_stats(connection):
+        return
+    tasks = models.Task.__table__
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("LOCK TABLE tasks IN SHARE MODE"))
+    total, completed = connection.execute(
+        select(func.count(tasks.c.id), func.count(tasks.c.id).filter(tasks.c.completed))
+    ).one()
+    connection.execute(insert(models.TaskStats.__table__).values(
+        id=models.STATS_ID, total=total, completed=completed
+    ))
+
+def _missing_search_objects(connection):
+    """
+    Liste l'extension et les index de recherche absents (PostgreSQL uniquement).
+
+    Args:
+        connection (Connection): Une connexion à la base de données.
+
+    Returns:
+        List[str]: L'extension (extension:nom) et les index (tasks.nom) manquants.
+    """
+    missing = []
+    extension = connection.execute(
+        text("SELECT 1 FROM pg_extension WHERE extname = :name"),
+        {"name": models.SEARCH_EXTENSION},
+    ).first()
+    if extension is None:
+        missing.append(f"extension:{models.SEARCH_EXTENSION}")
+    existing = set(connection.execute(
+        text("SELECT indexname FROM pg_indexes "
+             "WHERE schemaname = current_schema() AND tablename = 'tasks'")
+    ).scalars())
+    missing.extend(f"tasks.{name}" for name in models.SEARCH_INDEXES if name not in existing)
+    return missing
+
+def _create_search_objects(connection):
+    """
+    Crée l'extension et les index de recherche absents (PostgreSQL uniquement).
+
+    Args:
+        connection (Connection): Une connexion à la base de données, dans une transaction.
+    """
+    connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {models.SEARCH_EXTENSION}"))
+    for statement in models.SEARCH_INDEXES.values():
+        connection.execute(text(statement))
+
+def _add_missing_columns(connection):
+    """
+    Ajoute aux tables existantes les colonnes définies depuis leur création.
+
+    Args:
+        connection (Connection): Une connexion à la base de données, dans une transaction.
+
+    Returns:
+        List[str]: Les colonnes ajoutées (table.colonne).
+    """
+    added = []
+    for name in missing_schema(connection):
+        table_name, _, column_name = name.partition(".")
+        if not column_name:
+            continue
+        table = models.Base.metadata.tables[table_name]
+        column = CreateColumn(table.c[column_name]).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column}"))
+        added.append(name)
+    return added
+
+def _create_missing_indexes(connection):
+    """
+    Crée les index des modèles absents des tables existantes.
+
+    Args:
+        connection (Connection): Une connexion à la base de données, dans une transaction.
+    """
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+def init_schema(bind=None):
+    """
+    Crée les tables absentes et applique les mises à jour du schéma.
+
+    Args:
+        bind (Optional[Engine]): Le moteur. Par défaut, le moteur principal.
+
+    Returns:
+        List[str]: Les colonnes ajoutées (table.colonne).
+    """
+    bind = bind or database.get_engine()
+    with bind.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": INIT_LOCK_KEY})
+        models.Base.metadata.create_all(bind=connection)
+        added = _add_missing_columns(connection)
+        _create_missing_indexes(connection)
+        if connection.dialect.name == "postgresql":
+            _create_search_objects(connection)
+        for statement in UPGRADES:
+            connection.execute(text(statement))
+        _seed_stats(connection)
+    return added
+
+def main():
+    """
+    Point d'entrée de python -m app.init_db.
+    """
+    added = init_schema()
+    if added:
+        print(f"Colonnes ajoutées : {', '.join(added)}")
+    print("Schéma de la base de données à jour.")
+
+if __name__ == "__main__":
+    main()
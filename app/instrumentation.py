@@ -0,0 +1,176 @@
+"""
+Ce module compte les requêtes SQL et le temps passé en base pour chaque requête HTTP.
+Les totaux sont renvoyés dans l'en-tête Server-Timing, et chaque requête SQL plus lente
+que SLOW_QUERY_MS est journalisée avec son plan d'exécution (EXPLAIN).
+
+Le mode est activé par SQL_INSTRUMENTATION, afin de repérer les requêtes en trop
+(un refresh après commit, un N+1...) avant la production.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .database import TRUE_VALUES
+
+SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', 'false').lower() in TRUE_VALUES
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+
+# Opérations dont le plan est journalisé, et préfixe EXPLAIN selon le dialecte.
+# Une requête WITH se termine par l'une des quatre autres : elle est toujours expliquée.
+EXPLAINED_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN "}
+EXPLAIN_SAVEPOINT = "instrumentation_explain"
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+logger = logging.getLogger(__name__)
+
+class QueryStats:  # pylint: disable=too-few-public-methods
+    """
+    Compteurs SQL d'une requête HTTP.
+
+    Attributes:
+        count (int): Le nombre de requêtes SQL exécutées.
+        duration (float): Le temps passé en base, en secondes.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def server_timing(self):
+        """
+        Formate les compteurs pour l'en-tête Server-Timing.
+
+        Returns:
+            str: La valeur de l'en-tête, en millisecondes.
+        """
+        return f'db;desc="{self.count} queries";dur={self.duration * 1000:.2f}'
+
+_current_stats: ContextVar = ContextVar("query_stats", default=None)
+
+@contextmanager
+def track():
+    """
+    Compte les requêtes SQL exécutées dans le bloc.
+
+    Le contexte est copié dans le pool de threads de Starlette : les requêtes
+    d'un point de terminaison synchrone sont comptées avec celles de la requête HTTP.
+
+    Returns:
+        ContextManager[QueryStats]: Les compteurs, mis à jour au fil du bloc.
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def _explain(conn, statement, parameters):
+    """
+    Récupère le plan d'exécution d'une requête.
+
+    Le plan est demandé sur un curseur DBAPI brut, pour ne pas repasser par les hooks,
+    dans un SAVEPOINT : sur PostgreSQL, un EXPLAIN en erreur annulerait sinon toute
+    la transaction en cours de la requête HTTP.
+
+    Args:
+        conn (Connection): La connexion qui a exécuté la requête.
+        statement (str): La requête SQL.
+        parameters: Les paramètres DBAPI de la requête.
+
+    Returns:
+        str: Le plan, une ligne par étape.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name, "EXPLAIN ")
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+        except Exception:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            raise
+        finally:
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+    finally:
+        cursor.close()
+
+def _log_slow_query(conn, statement, parameters, executemany, elapsed):
+    """
+    Journalise une requête lente, avec son plan si elle peut être expliquée.
+
+    Args:
+        conn (Connection): La connexion qui a exécuté la requête.
+        statement (str): La requête SQL.
+        parameters: Les paramètres DBAPI de la requête.
+        executemany (bool): Si la requête a été exécutée pour plusieurs jeux de paramètres.
+        elapsed (float): La durée de la requête, en secondes.
+    """
+    plan = ""
+    operation = next(iter(statement.split(None, 1)), "").upper()
+    if not executemany and operation in EXPLAINED_OPERATIONS:
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as error:  # pylint: disable=broad-except
+            plan = f"EXPLAIN failed: {error}"
+    logger.warning("Slow query (%.1f ms): %s\n%s", elapsed * 1000, statement, plan)
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("instrumentation_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, _cursor, statement, parameters, _context, executemany):
+    elapsed = time.perf_counter() - conn.info["instrumentation_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        _log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+def _handle_error(context):
+    connection = context.connection
+    starts = connection.info.get("instrumentation_start_time") if connection else None
+    if starts:
+        starts.pop()
+
+def instrument_sql():
+    """
+    Pose les hooks de comptage sur tous les moteurs SQLAlchemy. L'appel est idempotent.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+class QueryStatsMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Middleware ASGI qui compte les requêtes SQL de chaque requête HTTP
+    et ajoute l'en-tête Server-Timing à la réponse.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track() as stats:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((SERVER_TIMING_HEADER, stats.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -3,15 +3,45 @@ Ce module définit les points de terminaison de l'API FastAPI pour gérer les t
 Il inclut des opérations pour créer, lire, mettre à jour et supprimer des tâches.
 """
 
-from typing import List
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from . import models, schemas, controllers
-from .database import engine, get_db
+from . import (
+    admission, cache, database, etags, events, exports, group_commit, imports, init_db,
+    instrumentation, metrics, responses, schemas, controllers,
+)
+from .database import get_db, get_read_db
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Lie la fabrique de sessions au moteur au démarrage et ferme le pool à l'arrêt.
 
+    Aucune connexion n'est ouverte pendant le démarrage : le schéma est créé à part,
+    par python -m app.init_db, et la disponibilité de la base est exposée par /ready.
+    Sur PostgreSQL, lorsque le cache des tâches est actif, l'écoute des notifications
+    est démarrée dans son thread, pour que les écritures des autres workers
+    invalident le cache de celui-ci.
 
-models.Base.metadata.create_all(bind=engine)
+    Args:
+        _app (FastAPI): L'application démarrée.
+    """
+    database.init_engine()
+    if cache.TASK_CACHE_SIZE > 0:
+        events.start_listener()
+    yield
+    events.stop_listener()
+    if group_commit.GROUP_COMMIT:
+        group_commit.get_group_committer().close()
+    database.dispose_engine()
 
 
 app = FastAPI(
@@ -19,8 +49,36 @@ app = FastAPI(
     description="Tasks Api créée pour un projet d'intégration continue",
     summary="L'application préférée de Deadpool. Assez dit.",
     version="0.0.1",
+    lifespan=lifespan,
 )
 
+metrics.instrument_sql()
+metrics.registry.add_collector(metrics.collect_cache)
+metrics.registry.add_collector(metrics.collect_pool)
+
+# Placé sous MetricsMiddleware, pour que les requêtes rejetées soient mesurées.
+if admission.ADMISSION_CONTROL:
+    metrics.registry.add_collector(metrics.collect_admission)
+    app.add_middleware(admission.AdmissionMiddleware)
+
+app.add_middleware(metrics.MetricsMiddleware, routes=app.routes)
+
+events.instrument_sessions()
+
+if database.DATABASE_REPLICA_URLS:
+    app.add_middleware(database.StickyPrimaryMiddleware)
+
+if instrumentation.SQL_INSTRUMENTATION:
+    instrumentation.instrument_sql()
+    app.add_middleware(instrumentation.QueryStatsMiddleware)
+
+if responses.GZIP_ENABLED:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=responses.GZIP_MINIMUM_SIZE,
+        compresslevel=responses.GZIP_COMPRESSLEVEL,
+    )
+
 @app.get("/", response_model=dict, tags=["Health Check"])
 def api_status():
     """
@@ -31,11 +89,76 @@ def api_status():
     """
     return {"status": "running"}
 
+@app.get("/ready", response_model=dict, tags=["Health Check"])
+def api_ready():
+    """
+    Vérifie que l'API peut servir des requêtes : la base répond et son schéma est à jour.
+
+    Contrairement à /, qui indique seulement que le processus est vivant,
+    ce point de terminaison interroge la base de données.
+
+    Returns:
+        dict: Le statut "ready", ou une réponse 503 avec la raison de l'indisponibilité.
+    """
+    try:
+        with database.get_engine().connect() as connection:
+            missing = init_db.missing_schema(connection)
+    except SQLAlchemyError as error:
+        detail = str(getattr(error, "orig", None) or error)
+        return JSONResponse(status_code=503, content={"status": "unavailable", "detail": detail})
+    if missing:
+        return JSONResponse(status_code=503, content={"status": "outdated", "missing": missing})
+    return {"status": "ready"}
+
+@app.get("/cache/stats", response_model=dict, tags=["Monitoring"])
+def get_cache_stats():
+    """
+    Retourne les compteurs du cache des tâches.
+
+    Returns:
+        dict: Les compteurs hits, misses, evictions et la taille du cache.
+    """
+    return cache.task_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoring"])
+def get_metrics():
+    """
+    Exporte les métriques de l'API au format texte de Prometheus.
+
+    Returns:
+        PlainTextResponse: Les latences et requêtes en cours par route, les durées
+        des requêtes SQL, et l'état du cache et du pool de connexions.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/db/pool", response_model=dict, tags=["Monitoring"])
+def get_pool_stats():
+    """
+    Retourne l'état du pool de connexions à la base de données.
+
+    Returns:
+        dict: Les connexions utilisées, en débordement et les temps d'attente du pool.
+    """
+    return database.get_pool_stats()
+
+@app.get("/admission/stats", response_model=dict, tags=["Monitoring"])
+def get_admission_stats():
+    """
+    Retourne l'état du contrôle d'admission, par budget (lectures et écritures).
+
+    Returns:
+        dict: Les requêtes en cours, en attente, admises, rejetées et les temps d'attente.
+    """
+    return {"enabled": admission.ADMISSION_CONTROL, **admission.controller.stats()}
+
 @app.post("/tasks/", response_model=schemas.Task, tags=["Tasks"])
 def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
     """
     Crée une nouvelle tâche.
 
+    Avec GROUP_COMMIT, la tâche est écrite avec les créations simultanées,
+    en une seule transaction (voir app.group_commit).
+
     Args:
         task (schemas.TaskCreate): Les données de la tâche à créer.
         db (Session): La session de la base de données.
@@ -43,30 +166,256 @@ def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
     Returns:
         schemas.Task: La tâche créée.
     """
+    if group_commit.GROUP_COMMIT:
+        return group_commit.get_group_committer().submit(task)
     return controllers.create_task(db=db, task=task)
 
+@app.post("/tasks/bulk", response_model=List[schemas.Task], tags=["Tasks"])
+def create_tasks(tasks: List[schemas.TaskCreate], db: Session = Depends(get_db)):
+    """
+    Crée plusieurs tâches en une seule transaction.
+
+    Args:
+        tasks (List[schemas.TaskCreate]): Les données des tâches à créer.
+        db (Session): La session de la base de données.
+
+    Returns:
+        List[schemas.Task]: Les tâches créées.
+    """
+    return controllers.create_tasks(db=db, tasks=tasks)
+
 @app.get("/tasks/", response_model=List[schemas.Task], tags=["Tasks"])
-def get_tasks(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+def get_tasks(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[int] = None,
+    completed: Optional[bool] = None,
+    title_prefix: Optional[str] = None,
+    include_archived: bool = False,
+    fields: Optional[str] = Query(
+        None, description="Champs à retourner, séparés par des virgules (id est toujours inclus).",
+        examples=["id,title,completed"],
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+):
     """
-    Récupère une liste de tâches avec pagination.
+    Récupère une liste de tâches avec pagination et filtres optionnels.
+
+    Si la page est complète, l'en-tête X-Next-Cursor contient le curseur
+    à passer dans le paramètre cursor pour obtenir la page suivante.
+
+    Les lignes lues par controllers.get_tasks sont encodées directement en JSON,
+    sans validation pydantic : le format de la réponse reste celui de schemas.Task.
+    La réponse porte l'ETag de la page. Si l'en-tête If-None-Match contient
+    cet ETag, la réponse est un 304 sans corps et la page n'est pas sérialisée.
+    La liste est lue sur un réplica lorsqu'il y en a.
+
+    Avec fields (par exemple id,title,completed), seules ces colonnes sont lues
+    et retournées, ce qui allège les pages aux longues descriptions.
 
     Args:
         skip (int): Le nombre de tâches à ignorer. Par défaut, 0.
         limit (int): Le nombre maximum de tâches à retourner. Par défaut, 10.
+        cursor (Optional[int]): L'ID de la dernière tâche de la page précédente. Par défaut, None.
+        completed (Optional[bool]): Ne retourne que les tâches dans cet état. Par défaut, None.
+        title_prefix (Optional[str]): Ne retourne que les tâches dont le titre commence
+            par ce texte. Par défaut, None.
+        include_archived (bool): Inclut les tâches archivées. Par défaut, False.
+        fields (Optional[str]): Les champs à retourner, séparés par des virgules.
+            Par défaut, None pour tous les champs.
+        if_none_match (Optional[str]): Les ETags déjà connus du client. Par défaut, None.
+        db (Session): La session de la base de données.
+
+    Raises:
+        HTTPException: Si un champ demandé n'existe pas.
+
+    Returns:
+        FastJSONResponse: Une liste de tâches.
+    """
+    requested = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+    try:
+        tasks = controllers.get_tasks(
+            db=db, skip=skip, limit=limit, after_id=cursor,
+            completed=completed, title_prefix=title_prefix, fields=requested,
+            include_archived=include_archived,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from error
+    headers = {"ETag": etags.list_etag(tasks, requested)}
+    if tasks and len(tasks) == limit:
+        headers[NEXT_CURSOR_HEADER] = str(tasks[-1]["id"])
+    if etags.none_match(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if requested and "version" not in requested:
+        for task in tasks:
+            del task["version"]
+    return responses.FastJSONResponse(tasks, headers=headers)
+
+@app.get("/tasks/stats", response_model=schemas.TaskStats, tags=["Tasks"])
+def get_stats(db: Session = Depends(get_db)):
+    """
+    Retourne le nombre total de tâches, de tâches terminées et de tâches en cours.
+
+    Args:
+        db (Session): La session de la base de données.
+
+    Returns:
+        schemas.TaskStats: Les compteurs de tâches.
+    """
+    return controllers.get_stats(db)
+
+@app.get("/tasks/search", response_model=List[schemas.TaskSearchResult], tags=["Tasks"])
+def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1),
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Recherche des tâches par texte dans le titre et la description.
+
+    Les résultats sont triés par pertinence. Si la page est complète, l'en-tête
+    X-Next-Cursor contient le curseur de la page suivante.
+
+    Args:
+        response (Response): La réponse HTTP, pour l'en-tête X-Next-Cursor.
+        q (str): Le texte recherché.
+        limit (int): Le nombre maximum de tâches à retourner. Par défaut, 10.
+        cursor (Optional[str]): Le curseur retourné avec la page précédente. Par défaut, None.
+        db (Session): La session de la base de données.
+
+    Raises:
+        HTTPException: Si le curseur est invalide.
+
+    Returns:
+        List[schemas.TaskSearchResult]: Les tâches trouvées, avec leur score.
+    """
+    try:
+        tasks, next_cursor = controllers.search_tasks(db, query=q, limit=limit, cursor=cursor)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from error
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return tasks
+
+@app.get("/tasks/changes", response_class=StreamingResponse, tags=["Tasks"])
+async def task_changes(request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    Diffuse les créations, modifications et suppressions de tâches (Server-Sent Events).
+
+    Chaque événement porte un ID : un client reconnecté avec l'en-tête Last-Event-ID
+    reçoit d'abord les événements manqués (voir app.events).
+
+    Args:
+        request (Request): La requête HTTP.
+        last_event_id (Optional[str]): L'ID du dernier événement reçu.
+
+    Returns:
+        StreamingResponse: Le flux text/event-stream.
+    """
+    events.start_listener()
+    return StreamingResponse(
+        events.stream(request, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/tasks/export", response_class=StreamingResponse, tags=["Tasks"])
+def export_tasks(format: schemas.FileFormat = schemas.FileFormat.NDJSON):  # pylint: disable=redefined-builtin
+    """
+    Exporte toutes les tâches en flux, au format NDJSON ou CSV.
+
+    La mémoire utilisée reste constante quelle que soit la taille de la table.
+
+    Args:
+        format (schemas.FileFormat): Le format de l'export. Par défaut, ndjson.
+
+    Returns:
+        StreamingResponse: Le flux de l'export.
+    """
+    return StreamingResponse(
+        exports.stream_tasks(database.SessionLocal, format),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
+
+@app.post("/tasks/import", response_model=schemas.ImportReport, tags=["Tasks"])
+async def import_tasks(
+    request: Request,
+    format: schemas.FileFormat = schemas.FileFormat.NDJSON,  # pylint: disable=redefined-builtin
+    db: Session = Depends(get_db),
+):
+    """
+    Importe des tâches depuis un fichier NDJSON ou CSV envoyé en flux.
+
+    Le corps est lu, validé et écrit par blocs : la mémoire utilisée ne dépend
+    pas de la taille du fichier. Chaque bloc est validé par son propre commit.
+
+    Args:
+        request (Request): La requête, dont le corps est lu en flux.
+        format (schemas.FileFormat): Le format du fichier. Par défaut, ndjson.
         db (Session): La session de la base de données.
 
     Returns:
-        List[schemas.Task]: Une liste de tâches.
+        schemas.ImportReport: La progression par bloc et les lignes rejetées.
+    """
+    report = schemas.ImportReport()
+    chunk_number = 0
+    async for tasks, rejected in imports.iter_task_chunks(request.stream(), format):
+        chunk_number += 1
+        inserted = await run_in_threadpool(controllers.import_tasks, db, tasks)
+        report.chunks.append(
+            schemas.ImportChunk(chunk=chunk_number, inserted=inserted, rejected=len(rejected))
+        )
+        report.inserted += inserted
+        report.rejected += len(rejected)
+        room = imports.IMPORT_MAX_ERRORS - len(report.errors)
+        report.errors.extend(
+            schemas.ImportRejection(line=line, error=error) for line, error in rejected[:room]
+        )
+    return report
+
+def _expected_version(if_match: Optional[str], task_id: int):
+    """
+    Lit la version attendue d'une tâche dans l'en-tête If-Match.
+
+    Args:
+        if_match (Optional[str]): La valeur de l'en-tête If-Match.
+        task_id (int): L'ID de la tâche modifiée.
+
+    Raises:
+        HTTPException: Si l'en-tête ne désigne pas cette tâche.
+
+    Returns:
+        Optional[int]: La version attendue, ou None pour ne pas la vérifier.
     """
-    return controllers.get_tasks(db=db, skip=skip, limit=limit)
+    try:
+        return etags.expected_version(if_match, task_id)
+    except ValueError as error:
+        raise HTTPException(status_code=412, detail="Precondition failed") from error
 
 @app.get("/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
-def get_task(task_id: int, db: Session = Depends(get_db)):
+def get_task(
+    task_id: int,
+    response: Response,
+    include_archived: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+):
     """
     Récupère une tâche par son ID.
 
+    La réponse porte l'ETag de la tâche. Si l'en-tête If-None-Match contient
+    cet ETag, la réponse est un 304 sans corps. La tâche est lue sur un réplica
+    lorsqu'il y en a.
+
     Args:
         task_id (int): L'ID de la tâche à récupérer.
+        response (Response): La réponse HTTP, pour l'en-tête ETag.
+        include_archived (bool): Cherche aussi dans les tâches archivées. Par défaut, False.
+        if_none_match (Optional[str]): Les ETags déjà connus du client. Par défaut, None.
         db (Session): La session de la base de données.
 
     Raises:
@@ -75,48 +424,119 @@ def get_task(task_id: int, db: Session = Depends(get_db)):
     Returns:
         schemas.Task: La tâche trouvée.
     """
-    db_task = controllers.get_task(db, task_id=task_id)
+    db_task = controllers.get_task(db, task_id=task_id, include_archived=include_archived)
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    etag = etags.task_etag(db_task)
+    if etags.none_match(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return db_task
 
 @app.put("/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
-def update_task(task_id: int, updated_task: schemas.TaskCreate, db: Session = Depends(get_db)):
+def update_task(
+    task_id: int,
+    updated_task: schemas.TaskCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     Met à jour une tâche existante.
 
+    Avec l'en-tête If-Match, la tâche n'est modifiée que si elle est toujours
+    à la version de l'ETag envoyé.
+
     Args:
         task_id (int): L'ID de la tâche à mettre à jour.
         updated_task (schemas.TaskCreate): Les nouvelles données de la tâche.
+        response (Response): La réponse HTTP, pour l'en-tête ETag.
+        if_match (Optional[str]): L'ETag attendu de la tâche. Par défaut, None.
         db (Session): La session de la base de données.
 
     Raises:
-        HTTPException: Si la tâche n'est pas trouvée.
+        HTTPException: Si la tâche n'est pas trouvée, ou si elle a été modifiée (412).
+
+    Returns:
+        schemas.Task: La tâche mise à jour.
+    """
+    expected_version = _expected_version(if_match, task_id)
+    try:
+        db_task = controllers.update_task(
+            db, task_id=task_id, updated_task=updated_task, expected_version=expected_version
+        )
+    except controllers.VersionMismatch as error:
+        raise HTTPException(status_code=412, detail="Precondition failed") from error
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    response.headers["ETag"] = etags.task_etag(db_task)
+    return db_task
+
+@app.patch("/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
+def patch_task(
+    task_id: int,
+    task_patch: schemas.TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Met à jour uniquement les champs envoyés d'une tâche existante.
+
+    Avec l'en-tête If-Match, la tâche n'est modifiée que si elle est toujours
+    à la version de l'ETag envoyé.
+
+    Args:
+        task_id (int): L'ID de la tâche à mettre à jour.
+        task_patch (schemas.TaskUpdate): Les champs à modifier.
+        response (Response): La réponse HTTP, pour l'en-tête ETag.
+        if_match (Optional[str]): L'ETag attendu de la tâche. Par défaut, None.
+        db (Session): La session de la base de données.
+
+    Raises:
+        HTTPException: Si la tâche n'est pas trouvée, ou si elle a été modifiée (412).
 
     Returns:
         schemas.Task: La tâche mise à jour.
     """
-    db_task = controllers.update_task(db, task_id=task_id, updated_task=updated_task)
+    expected_version = _expected_version(if_match, task_id)
+    try:
+        db_task = controllers.patch_task(
+            db, task_id=task_id, task_patch=task_patch, expected_version=expected_version
+        )
+    except controllers.VersionMismatch as error:
+        raise HTTPException(status_code=412, detail="Precondition failed") from error
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    response.headers["ETag"] = etags.task_etag(db_task)
     return db_task
 
 @app.delete("/tasks/{task_id}", response_model=schemas.Task, tags=["Tasks"])
-def delete_task(task_id: int, db: Session = Depends(get_db)):
+def delete_task(
+    task_id: int, if_match: Optional[str] = Header(None), db: Session = Depends(get_db)
+):
     """
     Supprime une tâche par son ID.
 
+    Avec l'en-tête If-Match, la tâche n'est supprimée que si elle est toujours
+    à la version de l'ETag envoyé.
+
     Args:
         task_id (int): L'ID de la tâche à supprimer.
+        if_match (Optional[str]): L'ETag attendu de la tâche. Par défaut, None.
         db (Session): La session de la base de données.
 
     Raises:
-        HTTPException: Si la tâche n'est pas trouvée.
+        HTTPException: Si la tâche n'est pas trouvée, ou si elle a été modifiée (412).
 
     Returns:
         schemas.Task: La tâche supprimée.
     """
-    db_task = controllers.delete_task(db, task_id=task_id)
+    expected_version = _expected_version(if_match, task_id)
+    try:
+        db_task = controllers.delete_task(db, task_id=task_id, expected_version=expected_version)
+    except controllers.VersionMismatch as error:
+        raise HTTPException(status_code=412, detail="Precondition failed") from error
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
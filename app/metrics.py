@@ -0,0 +1,426 @@
+"""
+Ce module collecte les métriques de l'API au format texte de Prometheus.
+Il fournit des compteurs, jauges et histogrammes légers, un middleware ASGI qui
+mesure chaque requête par route, et des hooks SQLAlchemy qui mesurent chaque requête SQL.
+
+Les métriques sont propres à chaque processus : avec plusieurs workers,
+chacun expose les siennes.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from . import admission, cache, database
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SQL_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE", "COPY", "BEGIN", "COMMIT", "ROLLBACK")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    """
+    Échappe une valeur de label pour le format texte de Prometheus.
+
+    Args:
+        value: La valeur du label.
+
+    Returns:
+        str: La valeur échappée.
+    """
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=""):
+    """
+    Formate les labels d'un échantillon.
+
+    Args:
+        names (Tuple[str]): Les noms des labels.
+        values (Tuple): Les valeurs des labels.
+        extra (str): Un label supplémentaire déjà formaté. Par défaut, "".
+
+    Returns:
+        str: Les labels entre accolades, ou une chaîne vide.
+    """
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+class _Value:
+    """
+    Valeur d'un compteur ou d'une jauge, pour une combinaison de labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        """
+        Incrémente la valeur.
+
+        Args:
+            amount (float): L'incrément. Par défaut, 1.
+        """
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        """
+        Décrémente la valeur.
+
+        Args:
+            amount (float): Le décrément. Par défaut, 1.
+        """
+        with self._lock:
+            self.value -= amount
+
+class _HistogramValue:  # pylint: disable=too-few-public-methods
+    """
+    Histogramme cumulatif, pour une combinaison de labels.
+    """
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Enregistre une observation.
+
+        Args:
+            value (float): La valeur observée.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+class Metric:
+    """
+    Métrique nommée, déclinée par combinaison de valeurs de labels.
+
+    Attributes:
+        name (str): Le nom de la métrique.
+        documentation (str): La description de la métrique.
+        kind (str): Le type Prometheus : counter, gauge ou histogram.
+        labelnames (Tuple[str]): Les noms des labels.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames=(), buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._buckets = tuple(buckets) if buckets else None
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """
+        Retourne la valeur associée à une combinaison de labels.
+
+        Args:
+            *values: Les valeurs des labels, dans l'ordre de labelnames.
+
+        Returns:
+            Union[_Value, _HistogramValue]: La valeur à mettre à jour.
+        """
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = _HistogramValue(self._buckets) if self._buckets else _Value()
+                    self._children[values] = child
+        return child
+
+    def render(self):
+        """
+        Sérialise la métrique au format texte de Prometheus.
+
+        Returns:
+            List[str]: Les lignes de la métrique.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.copy().items()):
+            if isinstance(child, _HistogramValue):
+                cumulative = 0
+                for bound, count in zip(child.buckets + (float("inf"),), child.counts):
+                    cumulative += count
+                    le_label = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                    labels = _format_labels(self.labelnames, values, le_label)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, values)
+                lines.append(f"{self.name}_sum{labels} {child.sum}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+            else:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {child.value}")
+        return lines
+
+class Registry:
+    """
+    Ensemble des métriques exposées par /metrics.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames=()):
+        """
+        Déclare un compteur.
+
+        Args:
+            name (str): Le nom de la métrique.
+            documentation (str): La description de la métrique.
+            labelnames (Tuple[str]): Les noms des labels. Par défaut, aucun.
+
+        Returns:
+            Metric: Le compteur.
+        """
+        return self._register(Metric(name, documentation, "counter", labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()):
+        """
+        Déclare une jauge.
+
+        Args:
+            name (str): Le nom de la métrique.
+            documentation (str): La description de la métrique.
+            labelnames (Tuple[str]): Les noms des labels. Par défaut, aucun.
+
+        Returns:
+            Metric: La jauge.
+        """
+        return self._register(Metric(name, documentation, "gauge", labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=HTTP_BUCKETS):
+        """
+        Déclare un histogramme.
+
+        Args:
+            name (str): Le nom de la métrique.
+            documentation (str): La description de la métrique.
+            labelnames (Tuple[str]): Les noms des labels. Par défaut, aucun.
+            buckets (Tuple[float]): Les bornes des intervalles. Par défaut, HTTP_BUCKETS.
+
+        Returns:
+            Metric: L'histogramme.
+        """
+        return self._register(Metric(name, documentation, "histogram", labelnames, buckets))
+
+    def add_collector(self, collector):
+        """
+        Ajoute une source de métriques calculées au moment de l'export.
+
+        Args:
+            collector (Callable[[], Iterable[Tuple[str, str, str, float]]]): Une fonction
+                qui retourne des tuples (nom, type, description, valeur).
+        """
+        self._collectors.append(collector)
+
+    def _register(self, metric: Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Sérialise toutes les métriques au format texte de Prometheus.
+
+        Returns:
+            str: Le contenu de la réponse /metrics.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, value in collector():
+                lines.extend((f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"))
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP, par route.", ("method", "route")
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Requêtes HTTP en cours de traitement, par route.",
+    ("method", "route"),
+)
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Requêtes HTTP traitées, par route et statut.",
+    ("method", "route", "status"),
+)
+HTTP_EXCEPTIONS = registry.counter(
+    "http_request_exceptions_total", "Requêtes HTTP interrompues par une exception, par route.",
+    ("method", "route"),
+)
+SQL_STATEMENT_DURATION = registry.histogram(
+    "db_statement_duration_seconds", "Durée des requêtes SQL, par opération.", ("operation",),
+    buckets=SQL_BUCKETS,
+)
+SQL_ERRORS = registry.counter(
+    "db_statement_errors_total", "Requêtes SQL en erreur, par opération.", ("operation",)
+)
+
+def _route_name(routes, scope):
+    """
+    Retrouve le modèle de chemin de la route appelée, pour limiter le nombre de labels.
+
+    Args:
+        routes (List[BaseRoute]): Les routes de l'application.
+        scope (dict): Le scope ASGI de la requête.
+
+    Returns:
+        str: Le chemin de la route (par exemple /tasks/{task_id}), ou "unmatched".
+    """
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+class MetricsMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Middleware ASGI qui mesure la durée, le nombre et les requêtes en cours par route.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        labels = (scope["method"], _route_name(self.routes, scope))
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(*labels)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            HTTP_EXCEPTIONS.labels(*labels).inc()
+            raise
+        finally:
+            HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(*labels, str(status["code"])).inc()
+            in_flight.dec()
+
+def _operation(statement: str):
+    """
+    Extrait l'opération d'une requête SQL.
+
+    Args:
+        statement (str): La requête SQL.
+
+    Returns:
+        str: Le premier mot-clé de la requête s'il est connu, sinon OTHER.
+    """
+    words = statement.lstrip()[:8].split(None, 1)
+    keyword = words[0].upper() if words else ""
+    return keyword if keyword in SQL_OPERATIONS else "OTHER"
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, _cursor, statement, _parameters, _context, _executemany):
+    start = conn.info["query_start_time"].pop()
+    SQL_STATEMENT_DURATION.labels(_operation(statement)).observe(time.perf_counter() - start)
+
+def _handle_error(context):
+    starts = context.connection.info.get("query_start_time") if context.connection else None
+    if starts:
+        starts.pop()
+    SQL_ERRORS.labels(_operation(context.statement or "")).inc()
+
+def instrument_sql():
+    """
+    Mesure la durée de chaque requête SQL de tous les moteurs SQLAlchemy.
+
+    Les hooks sont posés sur la classe Engine : ils couvrent aussi les moteurs
+    créés plus tard. L'appel est idempotent.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+def collect_cache():
+    """
+    Exporte les compteurs du cache des tâches.
+
+    Returns:
+        List[Tuple[str, str, str, float]]: Les métriques du cache.
+    """
+    stats = cache.task_cache.stats()
+    return [
+        ("task_cache_hits_total", "counter", "Lectures servies par le cache.", stats["hits"]),
+        ("task_cache_misses_total", "counter", "Lectures absentes du cache.", stats["misses"]),
+        ("task_cache_evictions_total", "counter", "Entrées évincées du cache.", stats["evictions"]),
+        ("task_cache_size", "gauge", "Entrées présentes dans le cache.", stats["size"]),
+    ]
+
+def collect_pool():
+    """
+    Exporte l'état du pool de connexions du moteur principal.
+
+    Returns:
+        List[Tuple[str, str, str, float]]: Les métriques numériques du pool, aucune
+        si la base de données n'est pas configurée (DATABASE_URL).
+    """
+    if not database.DATABASE_URL:
+        return []
+    return [
+        (f"db_pool_{key}", "gauge", f"Pool de connexions : {key}.", value)
+        for key, value in database.get_pool_stats().items()
+        if isinstance(value, (int, float))
+    ]
+
+# Type Prometheus des statistiques d'un budget d'admission.
+ADMISSION_METRICS = {
+    "in_flight": "gauge",
+    "waiting": "gauge",
+    "admitted": "counter",
+    "shed": "counter",
+    "timeouts": "counter",
+    "wait_seconds_total": "counter",
+    "wait_seconds_max": "gauge",
+}
+
+def collect_admission():
+    """
+    Exporte les budgets du contrôle d'admission.
+
+    Returns:
+        List[Tuple[str, str, str, float]]: Les métriques de chaque budget.
+    """
+    metrics = []
+    for name, stats in admission.controller.stats().items():
+        for key, kind in ADMISSION_METRICS.items():
+            suffix = "_total" if kind == "counter" and not key.endswith("_total") else ""
+            metrics.append((
+                f"admission_{name}_{key}{suffix}", kind,
+                f"Contrôle d'admission ({name}) : {key}.", stats[key],
+            ))
+    return metrics
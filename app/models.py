@@ -2,9 +2,13 @@
 Ce module définit les modèles de base de données pour l'application.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, DDL, DateTime, Index, Integer, String, Boolean, event, func
 from .database import Base
 
+# Configuration de recherche plein texte PostgreSQL : sans racinisation,
+# car les tâches sont rédigées en plusieurs langues.
+SEARCH_CONFIG = "simple"
+
 class Task(Base): # pylint: disable=too-few-public-methods
     """
     Modèle représentant une tâche dans la base de données.
@@ -14,10 +18,92 @@ class Task(Base): # pylint: disable=too-few-public-methods
         title (str): Le titre de la tâche.
         description (str): La description de la tâche.
         completed (bool): Indique si la tâche est terminée.
+        version (int): La version de la tâche, incrémentée à chaque écriture (ETag).
+        completed_at (datetime): La date à laquelle la tâche a été terminée, sinon None.
     """
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    description = Column(String, index=True)
+    description = Column(String)
     completed = Column(Boolean, default=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    completed_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Index partiel des tâches en cours, pour lister ou compter les tâches non terminées
+        # sans parcourir les tâches terminées.
+        Index(
+            "ix_tasks_pending", "id",
+            postgresql_where=completed.is_(False), sqlite_where=completed.is_(False),
+        ),
+        # Index partiel des tâches terminées, parcouru par l'archivage (app.archive).
+        Index(
+            "ix_tasks_completed_at", "completed_at",
+            postgresql_where=completed_at.isnot(None), sqlite_where=completed_at.isnot(None),
+        ),
+    )
+
+class ArchivedTask(Base): # pylint: disable=too-few-public-methods
+    """
+    Modèle d'une tâche terminée déplacée hors de la table tasks par l'archivage.
+    La tâche garde son ID d'origine.
+
+    Attributes:
+        id (int): L'identifiant de la tâche.
+        title (str): Le titre de la tâche.
+        description (str): La description de la tâche.
+        completed (bool): Toujours True.
+        version (int): La version de la tâche au moment de l'archivage.
+        completed_at (datetime): La date à laquelle la tâche a été terminée.
+        archived_at (datetime): La date de l'archivage.
+    """
+    __tablename__ = "tasks_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    description = Column(String)
+    completed = Column(Boolean, nullable=False, default=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    completed_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class TaskStats(Base): # pylint: disable=too-few-public-methods
+    """
+    Modèle des compteurs de tâches, tenus à jour par les contrôleurs d'écriture.
+    La table contient une seule ligne, d'ID STATS_ID.
+
+    Attributes:
+        id (int): L'identifiant de la ligne de compteurs.
+        total (int): Le nombre total de tâches.
+        completed (int): Le nombre de tâches terminées.
+    """
+    __tablename__ = "task_stats"
+
+    id = Column(Integer, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+
+STATS_ID = 1
+
+# Index de recherche, propres à PostgreSQL : un index GIN sur le document plein texte
+# et un index trigramme sur le titre pour les recherches par préfixe ou approchées.
+# Les DDL sont idempotentes : elles accompagnent la création de la table tasks, et
+# init_db les rejoue sur les bases existantes.
+SEARCH_EXTENSION = "pg_trgm"
+SEARCH_INDEXES = {
+    "ix_tasks_search": (
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks USING gin "
+        f"(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '') || ' ' || coalesce(description, '')))"
+    ),
+    "ix_tasks_title_trgm": (
+        "CREATE INDEX IF NOT EXISTS ix_tasks_title_trgm ON tasks USING gin (title gin_trgm_ops)"
+    ),
+}
+
+event.listen(
+    Task.__table__, "before_create",
+    DDL(f"CREATE EXTENSION IF NOT EXISTS {SEARCH_EXTENSION}").execute_if(dialect="postgresql"),
+)
+for _statement in SEARCH_INDEXES.values():
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,39 @@
+"""
+Ce module fournit une réponse JSON rapide pour les listes de tâches.
+Les listes sont encodées avec orjson lorsqu'il est installé, et avec le module json
+de la bibliothèque standard sinon : le contenu de la réponse est le même.
+
+Il configure aussi la compression gzip des réponses, appliquée par GZipMiddleware
+aux réponses de plus de GZIP_MINIMUM_SIZE octets lorsque le client l'accepte.
+"""
+
+import os
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from .database import TRUE_VALUES
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+GZIP_ENABLED = os.getenv('GZIP_ENABLED', 'true').lower() in TRUE_VALUES
+# Taille en dessous de laquelle une réponse n'est pas compressée (octets).
+GZIP_MINIMUM_SIZE = int(os.getenv('GZIP_MINIMUM_SIZE', '1000'))
+# Niveau de compression, de 1 (rapide) à 9 (compact).
+GZIP_COMPRESSLEVEL = int(os.getenv('GZIP_COMPRESSLEVEL', '5'))
+
+class FastJSONResponse(JSONResponse):
+    """
+    Réponse JSON encodée avec orjson, sans passer par la validation pydantic.
+
+    Le contenu doit déjà être composé de types simples (dict, list, str, int, bool, None,
+    datetime), par exemple les lignes retournées par controllers.get_tasks.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content)  # pylint: disable=no-member
@@ -2,9 +2,18 @@
 Ce module définit les schémas de données utilisés par l'application.
 """
 
-from typing import Optional
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel
 
+class FileFormat(str, Enum):
+    """
+    Formats disponibles pour l'export et l'import des tâches.
+    """
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 class TaskBase(BaseModel):
     """
     Schéma de base pour une tâche.
@@ -23,17 +32,96 @@ class TaskCreate(TaskBase):
     Schéma pour la création d'une tâche.
     """
 
+class TaskUpdate(BaseModel):
+    """
+    Schéma pour la mise à jour partielle d'une tâche.
+    Seuls les champs envoyés sont modifiés.
+
+    Attributes:
+        title (Optional[str]): Le nouveau titre de la tâche.
+        description (Optional[str]): La nouvelle description de la tâche.
+        completed (Optional[bool]): Le nouvel état de la tâche.
+    """
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+
 class Task(TaskBase):  # pylint: disable=too-few-public-methods
     """
     Schéma pour une tâche avec ID.
     
     Attributes:
         id (int): L'identifiant unique de la tâche.
+        version (Optional[int]): La version de la tâche, incrémentée à chaque écriture.
+        completed_at (Optional[datetime]): La date à laquelle la tâche a été terminée.
     """
     id: int
+    version: Optional[int] = None
+    completed_at: Optional[datetime] = None
 
     class Config:  # pylint: disable=too-few-public-methods
         """
         Configuration pour utiliser les objets ORM.
         """
         orm_mode = True
+
+class ImportChunk(BaseModel):
+    """
+    Progression d'un bloc de l'import de tâches.
+
+    Attributes:
+        chunk (int): Le numéro du bloc, à partir de 1.
+        inserted (int): Le nombre de tâches insérées par ce bloc.
+        rejected (int): Le nombre de lignes rejetées dans ce bloc.
+    """
+    chunk: int
+    inserted: int
+    rejected: int
+
+class ImportRejection(BaseModel):
+    """
+    Ligne rejetée par l'import de tâches.
+
+    Attributes:
+        line (int): Le numéro de la ligne dans le fichier importé.
+        error (str): La raison du rejet.
+    """
+    line: int
+    error: str
+
+class ImportReport(BaseModel):
+    """
+    Rapport de l'import de tâches.
+
+    Attributes:
+        inserted (int): Le nombre total de tâches insérées.
+        rejected (int): Le nombre total de lignes rejetées.
+        chunks (List[ImportChunk]): La progression de chaque bloc.
+        errors (List[ImportRejection]): Les lignes rejetées, limitées aux premières.
+    """
+    inserted: int = 0
+    rejected: int = 0
+    chunks: List[ImportChunk] = []
+    errors: List[ImportRejection] = []
+
+class TaskSearchResult(Task):  # pylint: disable=too-few-public-methods
+    """
+    Schéma pour une tâche trouvée par une recherche.
+
+    Attributes:
+        rank (float): Le score de pertinence de la tâche.
+    """
+    rank: float
+
+class TaskStats(BaseModel):
+    """
+    Schéma des compteurs de tâches.
+
+    Attributes:
+        total (int): Le nombre total de tâches.
+        completed (int): Le nombre de tâches terminées.
+        pending (int): Le nombre de tâches en cours.
+    """
+    total: int
+    completed: int
+    pending: int
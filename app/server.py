@@ -0,0 +1,176 @@
+"""
+Ce module lance l'API en production, avec plusieurs processus.
+
+    python -m app.server
+
+Le nombre de workers suit les CPU disponibles pour le conteneur (affinité et quota
+cgroup), ou WEB_CONCURRENCY. Avec gunicorn, l'application est importée une fois
+dans le processus maître (preload) puis partagée par fork : c'est sans risque car
+l'import n'ouvre aucune connexion, chaque worker crée son moteur au démarrage.
+Sans gunicorn, le superviseur multi-processus d'uvicorn est utilisé.
+
+Chaque worker a son propre cache des tâches (app.cache) : sur PostgreSQL, les workers
+s'invalident mutuellement par le canal LISTEN/NOTIFY des événements (app.events).
+
+uvloop et httptools sont utilisés lorsqu'ils sont installés. Sur SIGTERM, les workers
+cessent d'accepter des connexions et terminent les requêtes en cours pendant
+GRACEFUL_TIMEOUT secondes au plus.
+"""
+
+import math
+import os
+from importlib.util import find_spec
+from pathlib import Path
+
+from .database import TRUE_VALUES
+
+APP_MODULE = os.getenv('APP_MODULE', 'app.main:app')
+HOST = os.getenv('HOST', '0.0.0.0')
+PORT = int(os.getenv('PORT', '8000'))
+
+# Nombre de workers : WEB_CONCURRENCY, sinon WORKERS_PER_CORE par CPU, au plus MAX_WORKERS.
+WEB_CONCURRENCY = os.getenv('WEB_CONCURRENCY')
+WORKERS_PER_CORE = float(os.getenv('WORKERS_PER_CORE', '1'))
+MAX_WORKERS = os.getenv('MAX_WORKERS')
+
+KEEP_ALIVE = int(os.getenv('KEEP_ALIVE', '5'))
+BACKLOG = int(os.getenv('BACKLOG', '2048'))
+GRACEFUL_TIMEOUT = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+WORKER_TIMEOUT = int(os.getenv('WORKER_TIMEOUT', '120'))
+PRELOAD_APP = os.getenv('PRELOAD_APP', 'true').lower() in TRUE_VALUES
+# Adresses des proxys dont les en-têtes X-Forwarded-* sont acceptés, séparées par des
+# virgules ("*" pour toutes, seulement si l'API n'est joignable qu'à travers le proxy).
+FORWARDED_ALLOW_IPS = os.getenv('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+CGROUP_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+
+def available_cpus(cpu_max: Path = CGROUP_CPU_MAX):
+    """
+    Compte les CPU utilisables par le processus.
+
+    Le nombre de CPU de la machine est réduit par l'affinité du processus
+    et par le quota CPU du conteneur (cgroup v2), s'il y en a un.
+
+    Args:
+        cpu_max (Path): Le fichier du quota cgroup. Par défaut, CGROUP_CPU_MAX.
+
+    Returns:
+        int: Le nombre de CPU, au moins 1.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = cpu_max.read_text(encoding="utf-8").split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+def worker_count():
+    """
+    Calcule le nombre de workers à partir de l'environnement et des CPU disponibles.
+
+    Returns:
+        int: Le nombre de workers, au moins 1.
+    """
+    if WEB_CONCURRENCY:
+        return max(1, int(WEB_CONCURRENCY))
+    workers = max(1, int(WORKERS_PER_CORE * available_cpus()))
+    if MAX_WORKERS:
+        workers = min(workers, int(MAX_WORKERS))
+    return workers
+
+def _worker_class():
+    """
+    Choisit la classe de worker uvicorn pour gunicorn.
+
+    Returns:
+        str: Le chemin de la classe, celle du paquet uvicorn-worker si elle est installée.
+    """
+    if find_spec("uvicorn_worker"):
+        return "uvicorn_worker.UvicornWorker"
+    return "uvicorn.workers.UvicornWorker"
+
+def gunicorn_options():
+    """
+    Construit la configuration de gunicorn.
+
+    Returns:
+        dict: Les réglages gunicorn.
+    """
+    options = {
+        "bind": f"{HOST}:{PORT}",
+        "workers": worker_count(),
+        "worker_class": _worker_class(),
+        "preload_app": PRELOAD_APP,
+        "keepalive": KEEP_ALIVE,
+        "backlog": BACKLOG,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "timeout": WORKER_TIMEOUT,
+        "forwarded_allow_ips": FORWARDED_ALLOW_IPS,
+    }
+    # Battement de cœur des workers en mémoire : /tmp peut être un disque lent en conteneur.
+    if Path("/dev/shm").is_dir():
+        options["worker_tmp_dir"] = "/dev/shm"
+    return options
+
+def uvicorn_options():
+    """
+    Construit la configuration d'uvicorn, utilisée sans gunicorn.
+
+    Returns:
+        dict: Les arguments de uvicorn.run.
+    """
+    return {
+        "host": HOST,
+        "port": PORT,
+        "workers": worker_count(),
+        "loop": "uvloop" if find_spec("uvloop") else "asyncio",
+        "http": "httptools" if find_spec("httptools") else "h11",
+        "backlog": BACKLOG,
+        "timeout_keep_alive": KEEP_ALIVE,
+        "timeout_graceful_shutdown": GRACEFUL_TIMEOUT,
+        "proxy_headers": True,
+        "forwarded_allow_ips": FORWARDED_ALLOW_IPS,
+    }
+
+def _run_gunicorn(options: dict):
+    """
+    Lance gunicorn avec des workers uvicorn.
+
+    Args:
+        options (dict): Les réglages gunicorn.
+    """
+    # pylint: disable=import-outside-toplevel
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.importer import import_from_string
+
+    class Application(BaseApplication):  # pylint: disable=abstract-method
+        """
+        Application gunicorn configurée par ce module plutôt que par la ligne de commande.
+        """
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return import_from_string(APP_MODULE)
+
+    Application().run()
+
+def main():
+    """
+    Point d'entrée de python -m app.server : gunicorn s'il est installé, sinon uvicorn.
+    """
+    if find_spec("gunicorn") and os.name == "posix":
+        _run_gunicorn(gunicorn_options())
+    else:
+        import uvicorn  # pylint: disable=import-outside-toplevel
+        uvicorn.run(APP_MODULE, **uvicorn_options())
+
+if __name__ == "__main__":
+    main()
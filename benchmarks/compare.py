@@ -0,0 +1,95 @@
+"""
+Ce module compare deux résultats de benchmarks.run, par exemple avant et après un commit.
+
+Un scénario régresse si sa latence p95 augmente, ou si son débit baisse,
+de plus du seuil donné. Le code de sortie vaut 1 en cas de régression.
+
+Exemple :
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+DEFAULT_THRESHOLD = 10.0
+
+def _change(before: float, after: float):
+    """
+    Calcule la variation relative entre deux valeurs.
+
+    Args:
+        before (float): La valeur de référence.
+        after (float): La nouvelle valeur.
+
+    Returns:
+        float: La variation, en pourcentage.
+    """
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD):
+    """
+    Compare les scénarios communs à deux résultats.
+
+    Args:
+        baseline (dict): Les résultats de référence.
+        current (dict): Les nouveaux résultats.
+        threshold (float): La variation tolérée, en pourcentage. Par défaut, DEFAULT_THRESHOLD.
+
+    Returns:
+        List[dict]: Pour chaque scénario, les variations de p95 et du débit,
+        et si elles dépassent le seuil.
+    """
+    rows = []
+    for name, before in baseline["scenarios"].items():
+        after = current["scenarios"].get(name)
+        if after is None:
+            continue
+        p95_change = _change(before["p95_ms"], after["p95_ms"])
+        rps_change = _change(before["rps"], after["rps"])
+        rows.append({
+            "scenario": name,
+            "p95_before": before["p95_ms"],
+            "p95_after": after["p95_ms"],
+            "p95_change": round(p95_change, 1),
+            "rps_before": before["rps"],
+            "rps_after": after["rps"],
+            "rps_change": round(rps_change, 1),
+            "errors": after["errors"],
+            "regression": p95_change > threshold or rps_change < -threshold
+            or after["errors"] > before["errors"],
+        })
+    return rows
+
+def main(argv=None):
+    """
+    Affiche la comparaison de deux fichiers de résultats.
+
+    Args:
+        argv (Optional[List[str]]): Les arguments. Par défaut, ceux du processus.
+
+    Returns:
+        int: 1 si un scénario régresse, sinon 0.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("baseline", type=Path, help="Résultats de référence.")
+    parser.add_argument("current", type=Path, help="Nouveaux résultats.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Variation tolérée, en pourcentage.")
+    args = parser.parse_args(argv)
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    print(f"{baseline['meta']['commit']} -> {current['meta']['commit']}")
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        print(f"{row['scenario']:<18} p95 {row['p95_before']:>8.2f} -> {row['p95_after']:>8.2f} ms "
+              f"({row['p95_change']:+6.1f}%)  rps {row['rps_before']:>8.1f} -> "
+              f"{row['rps_after']:>8.1f} ({row['rps_change']:+6.1f}%)"
+              f"{'  REGRESSION' if row['regression'] else ''}")
+    return int(any(row["regression"] for row in rows))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,83 +1,486 @@
-import requests
+"""
+Ce module publie les notes de version sur Trello : une carte par commit, dans la liste
+LIST_NAME du board TRELLO_BOARD_ID.
+
+    python generate_release_note.py                      # le dernier commit (HEAD)
+    python generate_release_note.py v1.2.0..HEAD         # tous les commits d'une version
+    python generate_release_note.py HEAD~20..HEAD --stub # hors ligne, sur un Trello local
+
+Les appels passent par une seule session HTTP (connexions réutilisées), avec des délais
+d'attente et des nouvelles tentatives sur les erreurs réseau et les réponses 429/5xx.
+Les cartes d'une plage de commits sont créées en parallèle, par au plus --workers
+requêtes simultanées, avec des positions croissantes à la fin de la liste : elles y
+restent dans l'ordre des commits. L'ID de la liste est gardé dans TRELLO_LIST_CACHE :
+le board n'est relu que si la liste a changé.
+"""
+
+import argparse
+import json
 import os
-from dotenv import load_dotenv
-from datetime import datetime
-from git import Repo  # Import GitPython's Repo
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TRELLO_API_URL = os.getenv('TRELLO_API_URL', 'https://api.trello.com/1')
+LIST_NAME = os.getenv('TRELLO_LIST_NAME', 'Releases')  # Nom de la liste où les cartes sont ajoutées
+LIST_CACHE = Path(os.getenv('TRELLO_LIST_CACHE', '.trello_lists.json'))
+
+# Délais de connexion et de lecture (s), nouvelles tentatives et requêtes simultanées.
+REQUEST_TIMEOUT = (3.05, 10)
+MAX_RETRIES = 3
+MAX_WORKERS = 4
+
+# Écart entre les positions de deux cartes successives (celui de Trello).
+POSITION_STEP = 16384
+
+# Réponses qui justifient une nouvelle tentative.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class TrelloRetry(Retry):
+    """
+    Politique de nouvelles tentatives des appels Trello.
+
+    Les GET sont rejoués sur les erreurs RETRY_STATUSES. Une création de carte (POST)
+    n'est rejouée que sur un 429 (la requête a été refusée, pas traitée) ou une erreur
+    de connexion, pour ne pas créer deux fois la même carte.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429:
+            method = "GET"
+        return super().is_retry(method, status_code, has_retry_after)
+
+def make_session(api_key: str, token: str, retries: int = MAX_RETRIES,
+                 pool_size: int = MAX_WORKERS):
+    """
+    Crée la session HTTP authentifiée, partagée par tous les appels.
 
-load_dotenv()
+    Args:
+        api_key (str): La clé de l'API Trello.
+        token (str): Le jeton de l'API Trello.
+        retries (int): Le nombre maximal de nouvelles tentatives. Par défaut, MAX_RETRIES.
+        pool_size (int): Le nombre de connexions gardées ouvertes. Par défaut, MAX_WORKERS.
 
-# Chargement des variables d'environnement
-TRELLO_API_KEY = os.getenv('TRELLO_API_KEY')
-TRELLO_TOKEN = os.getenv('TRELLO_API_TOKEN')  
-BOARD_ID = os.getenv('TRELLO_BOARD_ID')
-LIST_NAME = "Releases"  # Nom de la liste où la carte sera ajoutée
+    Returns:
+        requests.Session: La session.
+    """
+    retry = TrelloRetry(
+        total=retries, backoff_factor=0.5, status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}), respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.params = {"key": api_key, "token": token}
+    session.headers["Authorization"] = f"Bearer {token}"
+    return session
 
-TRELLO_LISTS_URL = f"https://api.trello.com/1/boards/{BOARD_ID}/lists"
-TRELLO_CARDS_URL = "https://api.trello.com/1/cards"
+def _read_cache(cache_path: Path):
+    """
+    Lit le cache des IDs de listes.
 
-params = {
-    'key': TRELLO_API_KEY,
-    'token': TRELLO_TOKEN,
-}
+    Args:
+        cache_path (Path): Le fichier du cache.
 
-headers = {
-    'Authorization': f'Bearer {TRELLO_TOKEN}',
-}
+    Returns:
+        dict: Les IDs de listes, par "board/nom", vide si le cache est absent ou illisible.
+    """
+    try:
+        return json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
 
-try:
-    # Récupérer l'ID de la liste "Releases"
-    lists_response = requests.get(TRELLO_LISTS_URL, params=params, headers=headers)
-    lists_response.raise_for_status()
+def get_list_id(session, board_id: str, list_name: str = LIST_NAME,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                base_url: str = TRELLO_API_URL, cache_path: Path = LIST_CACHE,
+                refresh: bool = False):
+    """
+    Retourne l'ID de la liste, depuis le cache ou en lisant les listes du board.
 
-    lists = lists_response.json()
+    Args:
+        session (requests.Session): La session HTTP.
+        board_id (str): L'ID du board.
+        list_name (str): Le nom de la liste. Par défaut, LIST_NAME.
+        base_url (str): L'URL de l'API. Par défaut, TRELLO_API_URL.
+        cache_path (Path): Le fichier du cache. Par défaut, LIST_CACHE.
+        refresh (bool): Ignore le cache. Par défaut, False.
 
-    list_id = None
-    for lst in lists:
-        if lst['name'] == LIST_NAME:
-            list_id = lst['id']
-            break
+    Raises:
+        ValueError: Si la liste n'existe pas sur le board.
+        requests.RequestException: Si la lecture des listes échoue.
 
+    Returns:
+        str: L'ID de la liste.
+    """
+    key = f"{board_id}/{list_name}"
+    cache = _read_cache(cache_path)
+    if not refresh and key in cache:
+        return cache[key]
+    response = session.get(
+        f"{base_url}/boards/{board_id}/lists", params={"fields": "name"}, timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    list_id = next((lst["id"] for lst in response.json() if lst["name"] == list_name), None)
     if not list_id:
-        raise ValueError(f"La liste '{LIST_NAME}' n'existe pas sur le board Trello.")
-
-    # Récupérer le nom du dernier commit et sa description
-    repo = Repo(search_parent_directories=True)
-    last_commit = repo.head.commit
-    commit_name = last_commit.message.split('\n')[0]
-    commit_description = "\n".join(last_commit.message.split('\n')[1:])
-    commit_author = last_commit.author.name
-    commit_date = last_commit.authored_datetime.strftime('%Y-%m-%d')
-    commit_time = last_commit.authored_datetime.strftime('%H:%M')
-    
-    # Extraire les 7 premiers caractères du numéro de commit
-    short_commit_hash = last_commit.hexsha[:7]
-
-    # Créer une carte dans la liste "Releases" avec la description du commit
-    release_title = f"Release Note - {commit_date} {commit_time} - {commit_author}"
-    create_card_params = {
-        'key': TRELLO_API_KEY,
-        'token': TRELLO_TOKEN,
-        'idList': list_id,
-        'name': release_title,
-        'desc': (
+        raise ValueError(f"La liste '{list_name}' n'existe pas sur le board Trello.")
+    cache[key] = list_id
+    try:
+        cache_path.write_text(json.dumps(cache), encoding="utf-8")
+    except OSError:
+        pass
+    return list_id
+
+def get_commits(rev_range=None, repo=None):
+    """
+    Liste les commits à publier, du plus ancien au plus récent.
+
+    Args:
+        rev_range (Optional[str]): La plage de commits (par exemple v1.2.0..HEAD).
+            Par défaut, None pour le dernier commit.
+        repo (Optional[Repo]): Le dépôt git. Par défaut, celui du répertoire courant.
+
+    Returns:
+        List[Commit]: Les commits.
+    """
+    if repo is None:
+        from git import Repo  # pylint: disable=import-outside-toplevel
+        repo = Repo(search_parent_directories=True)
+    if not rev_range:
+        return [repo.head.commit]
+    return list(repo.iter_commits(rev_range, reverse=True))
+
+def build_card(commit):
+    """
+    Construit le titre et la description de la carte d'un commit.
+
+    Args:
+        commit (Commit): Le commit.
+
+    Returns:
+        dict: Les champs name et desc de la carte.
+    """
+    commit_name = commit.message.split('\n')[0]
+    commit_description = "\n".join(commit.message.split('\n')[1:])
+    commit_author = commit.author.name
+    commit_date = commit.authored_datetime.strftime('%Y-%m-%d')
+    commit_time = commit.authored_datetime.strftime('%H:%M')
+    # Les 7 premiers caractères du numéro de commit
+    short_commit_hash = commit.hexsha[:7]
+    return {
+        "name": f"Release Note - {commit_date} {commit_time} - {commit_author}",
+        "desc": (
             f"**Commit N°** {short_commit_hash}\n\n"
             f"**Auteur du commit:** {commit_author}\n\n"
             f"**Date du commit:** {commit_date}\n\n"
             f"**Heure du commit:** {commit_time}\n\n"
             f"**Description commit:** {commit_name}\n\n{commit_description}"
-        ) if commit_name else ""
+        ) if commit_name else "",
     }
 
-    create_card_response = requests.post(TRELLO_CARDS_URL, params=create_card_params)
-    create_card_response.raise_for_status()
+def post_card(session, list_id: str, card: dict, base_url: str = TRELLO_API_URL):
+    """
+    Crée une carte dans une liste.
+
+    Args:
+        session (requests.Session): La session HTTP.
+        list_id (str): L'ID de la liste.
+        card (dict): Les champs name et desc de la carte.
+        base_url (str): L'URL de l'API. Par défaut, TRELLO_API_URL.
+
+    Raises:
+        requests.RequestException: Si la création échoue.
+
+    Returns:
+        dict: La carte créée.
+    """
+    response = session.post(
+        f"{base_url}/cards", params={"idList": list_id, **card}, timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+def publish(session, list_id: str, cards, base_url: str = TRELLO_API_URL,
+            workers: int = MAX_WORKERS):
+    """
+    Crée les cartes en parallèle, avec au plus workers requêtes simultanées.
+
+    Args:
+        session (requests.Session): La session HTTP.
+        list_id (str): L'ID de la liste.
+        cards (List[dict]): Les cartes à créer.
+        base_url (str): L'URL de l'API. Par défaut, TRELLO_API_URL.
+        workers (int): Le nombre maximal de requêtes simultanées. Par défaut, MAX_WORKERS.
+
+    Returns:
+        List[Tuple[dict, Optional[Exception]]]: Pour chaque carte, dans l'ordre,
+        la carte et l'erreur de sa création, ou None.
+    """
+    def _post(card):
+        try:
+            post_card(session, list_id, card, base_url)
+        except requests.RequestException as error:
+            return card, error
+        return card, None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(_post, cards))
+
+def _list_missing(error):
+    """
+    Indique si une erreur de création vient d'un ID de liste périmé.
+
+    Args:
+        error (Optional[Exception]): L'erreur de création.
+
+    Returns:
+        bool: True pour une réponse 400 ou 404.
+    """
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in (400, 404)
+
+def place_cards(session, list_id: str, cards, base_url: str = TRELLO_API_URL):
+    """
+    Attribue à chaque carte une position (pos) croissante, après la dernière carte
+    de la liste : les cartes créées en parallèle gardent l'ordre des commits.
+
+    Args:
+        session (requests.Session): La session HTTP.
+        list_id (str): L'ID de la liste.
+        cards (List[dict]): Les cartes à créer, dans l'ordre.
+        base_url (str): L'URL de l'API. Par défaut, TRELLO_API_URL.
+
+    Raises:
+        requests.RequestException: Si la lecture des cartes de la liste échoue.
+
+    Returns:
+        List[dict]: Les cartes, avec leur champ pos.
+    """
+    response = session.get(
+        f"{base_url}/lists/{list_id}/cards", params={"fields": "pos"}, timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    last = max((float(card["pos"]) for card in response.json()), default=0)
+    return [{**card, "pos": last + POSITION_STEP * index} for index, card in enumerate(cards, 1)]
+
+def release(session, board_id: str, cards, list_name: str = LIST_NAME,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+            base_url: str = TRELLO_API_URL, workers: int = MAX_WORKERS,
+            cache_path: Path = LIST_CACHE):
+    """
+    Publie les cartes à la fin de la liste, dans l'ordre, en relisant le board si
+    l'ID de la liste en cache est périmé.
+
+    Args:
+        session (requests.Session): La session HTTP.
+        board_id (str): L'ID du board.
+        cards (List[dict]): Les cartes à créer, dans l'ordre.
+        list_name (str): Le nom de la liste. Par défaut, LIST_NAME.
+        base_url (str): L'URL de l'API. Par défaut, TRELLO_API_URL.
+        workers (int): Le nombre maximal de requêtes simultanées. Par défaut, MAX_WORKERS.
+        cache_path (Path): Le fichier du cache des listes. Par défaut, LIST_CACHE.
+
+    Raises:
+        ValueError: Si la liste n'existe pas sur le board.
+        requests.RequestException: Si la lecture de la liste échoue.
+
+    Returns:
+        List[Tuple[dict, Optional[Exception]]]: Pour chaque carte, la carte (avec sa
+        position) et l'erreur de sa création, ou None.
+    """
+    list_id = get_list_id(session, board_id, list_name, base_url, cache_path)
+    try:
+        placed = place_cards(session, list_id, cards, base_url)
+    except requests.HTTPError as error:
+        if not _list_missing(error):
+            raise
+        list_id = get_list_id(session, board_id, list_name, base_url, cache_path, refresh=True)
+        placed = place_cards(session, list_id, cards, base_url)
+    return publish(session, list_id, placed, base_url, workers)
+
+class TrelloStub(ThreadingHTTPServer):
+    """
+    Serveur HTTP local qui imite les appels Trello utilisés par ce module,
+    pour tester et mesurer la publication hors ligne.
+
+    Attributes:
+        lists (List[dict]): Les listes du board.
+        cards (List[dict]): Les cartes créées.
+        latency (float): Le délai ajouté à chaque réponse, en secondes.
+        failures (List[int]): Les statuts à renvoyer, dans l'ordre, avant de répondre normalement.
+        requests (List[Tuple[str, str]]): Les requêtes reçues (méthode, chemin).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, list_names=(LIST_NAME,)):
+        super().__init__(("127.0.0.1", port), _StubHandler)
+        self.lists = [{"id": f"list-{i}", "name": name} for i, name in enumerate(list_names)]
+        self.cards = []
+        self.latency = latency
+        self.failures = []
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        """
+        Returns:
+            str: L'URL de base de l'API du serveur.
+        """
+        return f"http://127.0.0.1:{self.server_address[1]}/1"
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """
+    Répond aux requêtes du TrelloStub.
+    """
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def _reply(self, status: int, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        server = self.server
+        with server.lock:
+            server.requests.append((method, url.path))
+            status = server.failures.pop(0) if server.failures else None
+        time.sleep(server.latency)
+        if status:
+            self._reply(status, {"error": "stub failure"})
+        elif method == "GET" and re.fullmatch(r"/1/boards/[^/]+/lists", url.path):
+            self._reply(200, server.lists)
+        elif method == "GET" and re.fullmatch(r"/1/lists/[^/]+/cards", url.path):
+            list_id = url.path.split("/")[3]
+            if list_id not in {lst["id"] for lst in server.lists}:
+                self._reply(400, {"error": "invalid id"})
+                return
+            with server.lock:
+                cards = [{"id": card["id"], "pos": card["pos"]}
+                         for card in server.cards if card["idList"] == list_id]
+            self._reply(200, cards)
+        elif method == "POST" and url.path == "/1/cards":
+            if query.get("idList") not in {lst["id"] for lst in server.lists}:
+                self._reply(400, {"error": "invalid value for idList"})
+                return
+            with server.lock:
+                card = {"id": f"card-{len(server.cards)}", **query,
+                        "pos": float(query.get("pos", len(server.cards) + 1))}
+                server.cards.append(card)
+            self._reply(200, card)
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Répond aux GET.
+        """
+        self._handle("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """
+        Répond aux POST.
+        """
+        self._handle("POST")
+
+@contextmanager
+def running_stub(**options):
+    """
+    Démarre un TrelloStub dans un thread, le temps du bloc.
+
+    Args:
+        **options: Les options de TrelloStub.
+
+    Yields:
+        TrelloStub: Le serveur démarré.
+    """
+    server = TrelloStub(**options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def main(argv=None):
+    """
+    Point d'entrée de python generate_release_note.py.
+
+    Args:
+        argv (Optional[List[str]]): Les arguments. Par défaut, ceux du processus.
+
+    Returns:
+        int: 1 si une carte n'a pas pu être créée, sinon 0.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("range", nargs="?", help="Plage de commits. Par défaut, le dernier commit.")
+    parser.add_argument("--list", default=LIST_NAME, help="Nom de la liste Trello.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Nombre maximal de cartes créées en parallèle.")
+    parser.add_argument("--base-url", default=TRELLO_API_URL, help="URL de l'API Trello.")
+    parser.add_argument("--stub", action="store_true",
+                        help="Publie sur un Trello local, sans réseau ni identifiants.")
+    parser.add_argument("--stub-latency", type=float, default=0.0,
+                        help="Délai de chaque réponse du Trello local, en secondes.")
+    args = parser.parse_args(argv)
 
-    print(f"Carte 'Release Note' créée avec succès : {release_title}")
+    from dotenv import load_dotenv  # pylint: disable=import-outside-toplevel
+    load_dotenv()
+    cards = [build_card(commit) for commit in get_commits(args.range)]
 
-except requests.exceptions.RequestException as e:
-    print(f"Une erreur s'est produite lors de la requête HTTP : {e}")
+    stub_context = running_stub(
+        latency=args.stub_latency, list_names=(args.list,)
+    ) if args.stub else nullcontext()
+    with stub_context as stub:
+        base_url = stub.url if stub else args.base_url
+        board_id = "stub" if stub else os.getenv('TRELLO_BOARD_ID')
+        session = make_session(
+            "stub" if stub else os.getenv('TRELLO_API_KEY'),
+            "stub" if stub else os.getenv('TRELLO_API_TOKEN'),
+            pool_size=args.workers,
+        )
+        start = time.perf_counter()
+        try:
+            results = release(
+                session, board_id, cards, args.list, base_url, args.workers,
+                cache_path=Path(os.devnull) if stub else LIST_CACHE,
+            )
+        except requests.RequestException as error:
+            print(f"Une erreur s'est produite lors de la requête HTTP : {error}")
+            return 1
+        except ValueError as error:
+            print(error)
+            return 1
+        elapsed = time.perf_counter() - start
 
-except ValueError as ve:
-    print(ve)
+    for card, error in results:
+        if error:
+            print(f"Échec de la création de la carte '{card['name']}' : {error}")
+        else:
+            print(f"Carte 'Release Note' créée avec succès : {card['name']}")
+    print(f"{sum(1 for _, error in results if not error)}/{len(results)} cartes en {elapsed:.2f} s")
+    return int(any(error for _, error in results))
 
-except Exception as ex:
-    print(f"Une erreur inattendue s'est produite : {ex}")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
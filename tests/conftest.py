@@ -0,0 +1,8 @@
+import pytest
+from app import cache
+
+@pytest.fixture(autouse=True)
+def clear_task_cache():
+    cache.task_cache.clear()
+    yield
+    cache.task_cache.clear()
@@ -0,0 +1,92 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import admission, metrics
+
+
+def test_budget_sheds_when_queue_is_full():
+    async def scenario():
+        budget = admission.Budget("write", limit=1, queue_size=1, timeout=1)
+        assert await budget.acquire()
+        waiter = asyncio.ensure_future(budget.acquire())
+        await asyncio.sleep(0)
+        assert budget.waiting == 1
+        assert not await budget.acquire()
+        budget.release()
+        assert await waiter
+        budget.release()
+        return budget.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2
+    assert stats["shed"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+
+
+def test_budget_times_out():
+    async def scenario():
+        budget = admission.Budget("read", limit=1, queue_size=5, timeout=0.01)
+        assert await budget.acquire()
+        assert not await budget.acquire()
+        return budget.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] > 0
+
+
+def test_budget_created_outside_the_loop():
+    budget = admission.Budget("write", limit=1, queue_size=1, timeout=1)
+
+    async def scenario():
+        assert await budget.acquire()
+        waiter = asyncio.ensure_future(budget.acquire())
+        await asyncio.sleep(0.01)
+        budget.release()
+        assert await waiter
+        budget.release()
+
+    asyncio.run(scenario())
+    asyncio.run(scenario())
+    assert budget.stats()["admitted"] == 4
+
+
+def test_controller_routes():
+    controller = admission.AdmissionController()
+    assert controller.applies("/tasks/1")
+    assert not controller.applies("/tasks/changes")
+    assert not controller.applies("/metrics")
+    assert controller.budget("HEAD") is controller.budgets["read"]
+    assert controller.budget("PATCH") is controller.budgets["write"]
+
+
+def test_admission_middleware_rejects():
+    app = FastAPI()
+
+    @app.post("/tasks/")
+    def create_task():
+        return {"id": 1}
+
+    @app.get("/")
+    def status():
+        return {"status": "running"}
+
+    write = admission.Budget("write", limit=1, queue_size=0)
+    write.in_flight, write._semaphore = 1, asyncio.Semaphore(0)
+    controller = admission.AdmissionController(write=write)
+    app.add_middleware(admission.AdmissionMiddleware, admission=controller)
+    client = TestClient(app)
+
+    response = client.post("/tasks/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(admission.ADMISSION_RETRY_AFTER)
+    assert client.get("/").status_code == 200
+    assert controller.stats()["write"]["shed"] == 1
+
+
+def test_collect_admission():
+    names = {name for name, _, _, _ in metrics.collect_admission()}
+    assert {"admission_read_shed_total", "admission_write_in_flight", "admission_read_wait_seconds_total"} <= names
@@ -0,0 +1,81 @@
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import archive, cache, controllers, events, exports, init_db, models, schemas
+from app.schemas import FileFormat
+
+
+def _session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    init_db.init_schema(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_completed_at():
+    session_factory = _session_factory()
+    with session_factory() as db:
+        task = controllers.create_task(db, schemas.TaskCreate(title="Task"))
+        assert task.completed_at is None
+        completed = controllers.patch_task(db, task.id, schemas.TaskUpdate(completed=True))
+        assert completed.completed_at is not None
+        renamed = controllers.patch_task(db, task.id, schemas.TaskUpdate(title="Renamed", completed=True))
+        assert renamed.completed_at.replace(tzinfo=None) == completed.completed_at.replace(tzinfo=None)
+        reopened = controllers.patch_task(db, task.id, schemas.TaskUpdate(completed=False))
+        assert reopened.completed_at is None
+
+
+def test_export_completed_task():
+    session_factory = _session_factory()
+    with session_factory() as db:
+        task = controllers.create_task(db, schemas.TaskCreate(title="Task"))
+        completed = controllers.patch_task(db, task.id, schemas.TaskUpdate(completed=True))
+        completed_on = completed.completed_at.date().isoformat()
+    lines = "".join(exports.stream_tasks(session_factory, FileFormat.NDJSON)).splitlines()
+    record = json.loads(lines[0])
+    assert record["completed"] is True
+    assert record["completed_at"].startswith(completed_on)
+    csv_lines = "".join(exports.stream_tasks(session_factory, FileFormat.CSV)).splitlines()
+    assert csv_lines[0] == ",".join(exports.EXPORT_COLUMNS)
+    assert len(csv_lines[1].split(",")) == len(exports.EXPORT_COLUMNS)
+
+
+def test_archive_tasks():
+    session_factory = _session_factory()
+    with session_factory() as db:
+        tasks = controllers.create_tasks(db, [
+            schemas.TaskCreate(title=f"Task {i}", completed=i % 2 == 0) for i in range(7)
+        ])
+        old = controllers._now() - timedelta(days=60)
+        db.execute(update(models.Task).where(models.Task.id != tasks[6].id).values(completed_at=old))
+        db.commit()
+        cache.task_cache.set(tasks[0].id, controllers._as_dict(tasks[0]))
+
+    events.instrument_sessions()
+    broker = events.EventBroker()
+    with patch('app.events.broker', broker):
+        assert archive.archive_tasks(session_factory, days=30, batch_size=2, pause=0) == 3
+    archived_ids = [task_id for item in broker._history for task_id in item["task_ids"]]
+    assert archived_ids == [tasks[0].id, tasks[2].id, tasks[4].id]
+
+    with session_factory() as db:
+        hot = controllers.get_tasks(db, limit=20)
+        assert [task["title"] for task in hot] == ["Task 1", "Task 3", "Task 5", "Task 6"]
+        assert controllers.get_stats(db)["total"] == 4
+        assert controllers.get_stats(db)["completed"] == 1
+        assert db.execute(select(func.count()).select_from(models.ArchivedTask)).scalar() == 3
+
+        everything = controllers.get_tasks(db, limit=20, include_archived=True)
+        assert [task["id"] for task in everything] == [task.id for task in tasks]
+        page = controllers.get_tasks(db, limit=2, after_id=tasks[1].id, include_archived=True, fields=["title"])
+        assert [task["title"] for task in page] == ["Task 2", "Task 3"]
+
+        assert controllers.get_task(db, tasks[0].id) is None
+        archived = controllers.get_task(db, tasks[0].id, include_archived=True)
+        assert archived.title == "Task 0" and archived.archived_at is not None
+
+    assert archive.archive_tasks(session_factory, days=30, batch_size=2, pause=0) == 0
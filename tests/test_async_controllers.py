@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import events, models, schemas, async_controllers
+from app.controllers import VersionMismatch
+
+@pytest.fixture
+def mock_async_session():
+    mock_session = MagicMock(spec=AsyncSession)
+    mock_session.execute = AsyncMock(return_value=MagicMock())
+    mock_session.commit = AsyncMock()
+    mock_session.delete = AsyncMock()
+    mock_session.flush = AsyncMock()
+    mock_session.info = {}
+    return mock_session
+
+def test_get_task(mock_async_session):
+    mock_task = models.Task(id=1, title="Test Task", description="Test Description", completed=False)
+    mock_async_session.execute.return_value.scalars.return_value.first.return_value = mock_task
+
+    task = asyncio.run(async_controllers.get_task(mock_async_session, task_id=1))
+    assert task == mock_task
+    mock_async_session.execute.assert_awaited_once()
+
+def test_get_tasks(mock_async_session):
+    mock_tasks = [models.Task(id=2, title="Test Task 2", description=None, completed=False)]
+    mock_async_session.execute.return_value.scalars.return_value.all.return_value = mock_tasks
+
+    tasks = asyncio.run(async_controllers.get_tasks(mock_async_session, limit=10, after_id=1))
+    assert tasks == mock_tasks
+    query = mock_async_session.execute.call_args.args[0]
+    assert "tasks.id > " in str(query)
+
+def test_create_task(mock_async_session):
+    task_create = schemas.TaskCreate(title="New Task", description="New Description", completed=False)
+
+    created_task = asyncio.run(async_controllers.create_task(mock_async_session, task_create))
+    assert created_task.title == "New Task"
+    mock_async_session.add.assert_called_once_with(created_task)
+    mock_async_session.commit.assert_awaited_once()
+
+def test_create_tasks(mock_async_session):
+    tasks_create = [schemas.TaskCreate(title="Bulk Task 1"), schemas.TaskCreate(title="Bulk Task 2")]
+
+    created_tasks = asyncio.run(async_controllers.create_tasks(mock_async_session, tasks_create))
+    assert [task.title for task in created_tasks] == ["Bulk Task 1", "Bulk Task 2"]
+    mock_async_session.add_all.assert_called_once()
+    mock_async_session.commit.assert_awaited_once()
+
+def test_delete_task(mock_async_session):
+    mock_task = models.Task(id=1, title="Task to Delete", description="To be deleted", completed=False)
+    mock_async_session.execute.return_value.scalars.return_value.first.return_value = mock_task
+
+    deleted_task = asyncio.run(async_controllers.delete_task(mock_async_session, task_id=1))
+    assert deleted_task == mock_task
+    mock_async_session.delete.assert_awaited_once_with(mock_task)
+    mock_async_session.commit.assert_awaited_once()
+
+def test_update_task_not_found(mock_async_session):
+    mock_async_session.execute.return_value.scalars.return_value.first.return_value = None
+    updated_task = schemas.TaskCreate(title="Updated Task", completed=True)
+
+    result_task = asyncio.run(async_controllers.update_task(mock_async_session, task_id=999, updated_task=updated_task))
+    assert result_task is None
+    mock_async_session.commit.assert_not_awaited()
+
+def test_writes_publish_events_and_check_version():
+    async def scenario(broker):
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(models.Base.metadata.create_all)
+        async with sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as db:
+            created = await async_controllers.create_task(db, schemas.TaskCreate(title="Async"))
+            task_id = created.id
+            with pytest.raises(VersionMismatch):
+                await async_controllers.update_task(
+                    db, task_id, schemas.TaskCreate(title="Stale"), expected_version=2
+                )
+            await db.rollback()
+            updated = await async_controllers.update_task(
+                db, task_id, schemas.TaskCreate(title="Fresh"), expected_version=1
+            )
+            assert updated.version == 2
+            with pytest.raises(VersionMismatch):
+                await async_controllers.delete_task(db, task_id, expected_version=1)
+            await db.rollback()
+            assert await async_controllers.delete_task(db, task_id, expected_version=2)
+        await engine.dispose()
+
+    events.instrument_sessions()
+    broker = events.EventBroker()
+    with patch('app.events.broker', broker):
+        asyncio.run(scenario(broker))
+    history = list(broker._history)
+    assert [item["type"] for item in history] == [events.CREATED, events.UPDATED, events.DELETED]
+    assert history[1]["task"]["title"] == "Fresh"
@@ -0,0 +1,71 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.async_main import app
+from app import database, models
+from app.controllers import VersionMismatch
+
+client = TestClient(app)
+
+@pytest.fixture(scope='function', autouse=True)
+def override_get_async_db():
+    async def _get_async_db_override():
+        yield MagicMock()
+
+    app.dependency_overrides[database.get_async_db] = _get_async_db_override
+    yield
+    app.dependency_overrides.clear()
+
+def test_api_status():
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.json() == {"status": "running"}
+
+def test_create_task():
+    mock_task = models.Task(id=1, title="Test Task", description="Test Description", completed=False)
+
+    with patch('app.async_controllers.create_task', new=AsyncMock(return_value=mock_task)):
+        response = client.post("/tasks/", json={"title": "Test Task", "description": "Test Description"})
+        assert response.status_code == 200
+        assert response.json()["id"] == 1
+
+def test_get_tasks_next_cursor():
+    mock_tasks = [models.Task(id=5, title="Test Task 5", description=None, completed=False)]
+
+    with patch('app.async_controllers.get_tasks', new=AsyncMock(return_value=mock_tasks)):
+        response = client.get("/tasks/", params={"limit": 1})
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "5"
+
+def test_get_task_not_found():
+    with patch('app.async_controllers.get_task', new=AsyncMock(return_value=None)):
+        response = client.get("/tasks/999")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Task not found"}
+
+def test_delete_task_not_found():
+    with patch('app.async_controllers.delete_task', new=AsyncMock(return_value=None)):
+        response = client.delete("/tasks/999")
+        assert response.status_code == 404
+
+def test_update_task_if_match():
+    mock_task = models.Task(id=1, title="Updated Task", description=None, completed=False, version=4)
+    body = {"title": "Updated Task"}
+
+    with patch('app.async_controllers.update_task', new=AsyncMock(return_value=mock_task)) as mock_update:
+        response = client.put("/tasks/1", json=body, headers={"If-Match": '"1-3"'})
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"1-4"'
+        assert mock_update.call_args.kwargs["expected_version"] == 3
+        assert client.put("/tasks/1", json=body, headers={"If-Match": '"2-3"'}).status_code == 412
+
+    with patch('app.async_controllers.update_task', new=AsyncMock(side_effect=VersionMismatch(1))):
+        response = client.put("/tasks/1", json=body, headers={"If-Match": '"1-3"'})
+        assert response.status_code == 412
+
+def test_lifespan_starts_listener():
+    with patch('app.events.start_listener') as start, patch('app.events.stop_listener') as stop, \
+            patch('app.async_main.get_async_engine', return_value=MagicMock(dispose=AsyncMock())):
+        with TestClient(app):
+            start.assert_called_once()
+        stop.assert_called_once()
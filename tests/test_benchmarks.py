@@ -0,0 +1,25 @@
+from benchmarks.compare import compare
+from benchmarks.run import summarize
+
+def test_summarize():
+    summary = summarize([i / 1000 for i in range(1, 101)], errors=2, elapsed=2.0)
+    assert summary["requests"] == 100
+    assert summary["errors"] == 2
+    assert summary["rps"] == 50.0
+    assert summary["p50_ms"] == 50.5
+    assert summary["p99_ms"] == 99.01
+    assert summary["max_ms"] == 100.0
+
+def test_compare_flags_regressions():
+    def result(p95, rps, errors=0):
+        return {"p95_ms": p95, "rps": rps, "errors": errors}
+    baseline = {"scenarios": {"get": result(10, 100), "list": result(10, 100),
+                              "create": result(10, 100), "removed": result(10, 100)}}
+    current = {"scenarios": {"get": result(10.5, 98), "list": result(12, 100),
+                             "create": result(10, 100, errors=1)}}
+    rows = {row["scenario"]: row for row in compare(baseline, current, threshold=10)}
+    assert set(rows) == {"get", "list", "create"}
+    assert not rows["get"]["regression"]
+    assert rows["list"]["regression"]
+    assert rows["list"]["p95_change"] == 20.0
+    assert rows["create"]["regression"]
@@ -0,0 +1,45 @@
+from app.cache import LRUCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_get_set():
+    task_cache = LRUCache(maxsize=2, ttl=10)
+    assert task_cache.get(1) is None
+    task_cache.set(1, {"id": 1})
+    assert task_cache.get(1) == {"id": 1}
+    assert task_cache.stats()["hits"] == 1
+    assert task_cache.stats()["misses"] == 1
+
+def test_lru_eviction():
+    task_cache = LRUCache(maxsize=2, ttl=10)
+    task_cache.set(1, {"id": 1})
+    task_cache.set(2, {"id": 2})
+    task_cache.get(1)
+    task_cache.set(3, {"id": 3})
+    assert task_cache.get(2) is None
+    assert task_cache.get(1) == {"id": 1}
+    assert task_cache.stats()["evictions"] == 1
+    assert task_cache.stats()["size"] == 2
+
+def test_ttl_expiration():
+    clock = FakeClock()
+    task_cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+    task_cache.set(1, {"id": 1})
+    clock.now = 11
+    assert task_cache.get(1) is None
+    assert task_cache.stats()["evictions"] == 1
+    assert task_cache.stats()["size"] == 0
+
+def test_delete_and_disabled_cache():
+    task_cache = LRUCache(maxsize=2, ttl=10)
+    task_cache.set(1, {"id": 1})
+    task_cache.delete(1)
+    assert task_cache.get(1) is None
+    disabled_cache = LRUCache(maxsize=0, ttl=10)
+    disabled_cache.set(1, {"id": 1})
+    assert disabled_cache.get(1) is None
@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
-from app import models, schemas, controllers
+from app import cache, database, models, schemas, controllers
 
 @pytest.fixture
 def mock_db_session():
@@ -20,16 +21,144 @@ def test_get_task(mock_db_session):
     filter_args, _ = mock_db_session.query.return_value.filter.call_args
     assert filter_args[0].compare(models.Task.id == 1)
 
+def test_get_task_cached(mock_db_session):
+    mock_task = models.Task(id=1, title="Test Task", description="Test Description", completed=False)
+    mock_db_session.query.return_value.filter.return_value.first.return_value = mock_task
+
+    controllers.get_task(mock_db_session, task_id=1)
+    task = controllers.get_task(mock_db_session, task_id=1)
+    assert task.title == "Test Task"
+    mock_db_session.query.assert_called_once_with(models.Task)
+    assert cache.task_cache.stats()["hits"] == 1
+
+def test_get_task_read_from(mock_db_session):
+    mock_db_session.info = {database.READ_FROM_KEY: database.READ_FROM_REPLICA}
+    mock_db_session.query.return_value.filter.return_value.first.return_value = models.Task(
+        id=1, title="Lagging Task", completed=False
+    )
+    controllers.get_task(mock_db_session, task_id=1)
+    assert cache.task_cache.get(1) is None
+
+    cache.task_cache.set(1, {"id": 1, "title": "Cached Task", "completed": False})
+    mock_db_session.info = {database.READ_FROM_KEY: database.READ_FROM_PINNED}
+    mock_db_session.query.return_value.filter.return_value.first.return_value = models.Task(
+        id=1, title="Written Task", completed=False
+    )
+    assert controllers.get_task(mock_db_session, task_id=1).title == "Written Task"
+    assert cache.task_cache.get(1)["title"] == "Written Task"
+
+def test_get_task_replica_include_archived(mock_db_session):
+    mock_db_session.info = {database.READ_FROM_KEY: database.READ_FROM_REPLICA}
+    live = models.Task(id=1, title="Live Task", completed=False)
+    mock_db_session.query.return_value.filter.return_value.first.return_value = live
+
+    assert controllers.get_task(mock_db_session, task_id=1, include_archived=True) is live
+    mock_db_session.query.assert_called_once_with(models.Task)
+
 def test_get_tasks(mock_db_session):
-    mock_tasks = [
-        models.Task(id=1, title="Test Task 1", description="Test Description 1", completed=False),
-        models.Task(id=2, title="Test Task 2", description="Test Description 2", completed=False)
+    mock_rows = [
+        ("Test Task 1", "Test Description 1", False, 1, 1),
+        ("Test Task 2", "Test Description 2", False, 2, 1)
     ]
-    mock_db_session.query.return_value.offset.return_value.limit.return_value.all.return_value = mock_tasks
+    mock_db_session.query.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = mock_rows
 
-    tasks = controllers.get_tasks(mock_db_session, skip=0, limit=10)
-    assert tasks == mock_tasks
-    mock_db_session.query.assert_called_once_with(models.Task)
+    tasks = controllers.get_tasks(mock_db_session, skip=5, limit=10)
+    assert tasks == [
+        {"title": "Test Task 1", "description": "Test Description 1", "completed": False, "id": 1, "version": 1},
+        {"title": "Test Task 2", "description": "Test Description 2", "completed": False, "id": 2, "version": 1}
+    ]
+    mock_db_session.query.assert_called_once_with(*controllers.LIST_COLUMNS)
+    mock_db_session.query.return_value.order_by.return_value.offset.assert_called_once_with(5)
+
+def test_get_tasks_fields(mock_db_session):
+    mock_db_session.query.return_value.order_by.return_value.limit.return_value.all.return_value = [("Task", False, 1, 3)]
+
+    tasks = controllers.get_tasks(mock_db_session, fields=["title", "completed"])
+    assert tasks == [{"title": "Task", "completed": False, "id": 1, "version": 3}]
+    table = models.Task.__table__
+    mock_db_session.query.assert_called_once_with(table.c.title, table.c.completed, table.c.id, table.c.version)
+
+    with pytest.raises(ValueError):
+        controllers.get_tasks(mock_db_session, fields=["title", "secret"])
+
+def test_get_tasks_after_id(mock_db_session):
+    mock_query = mock_db_session.query.return_value
+    mock_query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [("Test Task 11", None, False, 11, 2)]
+
+    tasks = controllers.get_tasks(mock_db_session, limit=10, after_id=10)
+    assert tasks == [{"title": "Test Task 11", "description": None, "completed": False, "id": 11, "version": 2}]
+    filter_args, _ = mock_query.filter.call_args
+    assert filter_args[0].compare(models.Task.id > 10)
+    mock_query.filter.return_value.order_by.return_value.offset.assert_not_called()
+
+def test_get_tasks_filters(mock_db_session):
+    mock_query = mock_db_session.query.return_value
+
+    controllers.get_tasks(mock_db_session, completed=False, title_prefix="Test_")
+    first_filter, = mock_query.filter.call_args.args
+    second_filter, = mock_query.filter.return_value.filter.call_args.args
+    assert str(first_filter.compile(compile_kwargs={"literal_binds": True})) == "tasks.completed IS false"
+    assert "LIKE" in str(second_filter)
+
+def test_get_stats(mock_db_session):
+    mock_db_session.query.return_value.filter.return_value.first.return_value = models.TaskStats(id=1, total=10, completed=4)
+
+    assert controllers.get_stats(mock_db_session) == {"total": 10, "completed": 4, "pending": 6}
+    mock_db_session.add.assert_not_called()
+
+def test_get_stats_without_row(mock_db_session):
+    mock_db_session.query.return_value.filter.return_value.first.return_value = None
+    mock_db_session.query.return_value.one.return_value = (3, 1)
+
+    assert controllers.get_stats(mock_db_session) == {"total": 3, "completed": 1, "pending": 2}
+    mock_db_session.add.assert_not_called()
+    mock_db_session.commit.assert_not_called()
+
+def test_update_task_stats(mock_db_session):
+    mock_task = models.Task(id=1, title="Old Task", description=None, completed=False)
+    mock_db_session.query.return_value.filter.return_value.first.return_value = mock_task
+
+    controllers.patch_task(mock_db_session, task_id=1, task_patch=schemas.TaskUpdate(completed=True))
+    statement = mock_db_session.execute.call_args.args[0]
+    assert str(statement).startswith("UPDATE task_stats")
+    assert statement.compile().params["completed_1"] == 1
+
+def test_search_tasks(mock_db_session):
+    mock_db_session.execute.return_value = [
+        MagicMock(_mapping={"id": 2, "title": "Milk the cow", "description": None, "completed": False, "rank": 3}),
+        MagicMock(_mapping={"id": 1, "title": "Buy milk", "description": None, "completed": False, "rank": 2})
+    ]
+
+    tasks, next_cursor = controllers.search_tasks(mock_db_session, query="milk", limit=2, cursor="3:1")
+    assert [task["id"] for task in tasks] == [2, 1]
+    assert next_cursor == "2:1"
+    statement = str(mock_db_session.execute.call_args.args[0])
+    assert "LIKE" in statement
+    assert "ORDER BY anon_1.rank DESC, anon_1.id" in statement
+
+def test_search_tasks_postgresql(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.execute.return_value = []
+
+    tasks, next_cursor = controllers.search_tasks(mock_db_session, query="buy mil", limit=2)
+    assert tasks == []
+    assert next_cursor is None
+    statement = mock_db_session.execute.call_args.args[0]
+    assert "to_tsvector('simple'" in str(statement)
+    assert "buy:* & mil:*" in statement.compile().params.values()
+
+def test_search_tasks_invalid_cursor(mock_db_session):
+    with pytest.raises(ValueError):
+        controllers.search_tasks(mock_db_session, query="milk", cursor="invalid")
+
+def test_iter_tasks(mock_db_session):
+    mock_query = mock_db_session.query.return_value.order_by.return_value.execution_options.return_value
+
+    controllers.iter_tasks(mock_db_session, chunk_size=500)
+    columns = mock_db_session.query.call_args.args
+    assert tuple(column.name for column in columns) == controllers.EXPORT_COLUMNS
+    mock_db_session.query.return_value.order_by.return_value.execution_options.assert_called_once_with(stream_results=True)
+    mock_query.yield_per.assert_called_once_with(500)
 
 def test_create_task(mock_db_session):
     task_create = schemas.TaskCreate(title="New Task", description="New Description", completed=False)
@@ -45,12 +174,72 @@ def test_create_task(mock_db_session):
         mock_db_session.commit.assert_called_once()
         mock_db_session.refresh.assert_called_once_with(mock_task)
 
+def test_create_tasks(mock_db_session):
+    tasks_create = [
+        schemas.TaskCreate(title="Bulk Task 1", description="Bulk Description 1"),
+        schemas.TaskCreate(title="Bulk Task 2", completed=True)
+    ]
+
+    created_tasks = controllers.create_tasks(mock_db_session, tasks_create)
+    assert [task.title for task in created_tasks] == ["Bulk Task 1", "Bulk Task 2"]
+    assert created_tasks[1].completed is True
+    mock_db_session.add_all.assert_called_once()
+    mock_db_session.flush.assert_called_once()
+    mock_db_session.commit.assert_called_once()
+    mock_db_session.refresh.assert_not_called()
+
+def test_create_tasks_postgresql(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    rows = [
+        models.Task(id=1, title="Bulk Task 1", description=None, completed=False),
+        models.Task(id=2, title="Bulk Task 2", description=None, completed=True)
+    ]
+    mock_db_session.execute.return_value.all.return_value = rows
+    tasks_create = [schemas.TaskCreate(title="Bulk Task 1"), schemas.TaskCreate(title="Bulk Task 2", completed=True)]
+
+    created_tasks = controllers.create_tasks(mock_db_session, tasks_create)
+    assert [task.id for task in created_tasks] == [1, 2]
+    assert mock_db_session.execute.call_count == 2
+    assert str(mock_db_session.execute.call_args.args[0]).startswith("UPDATE task_stats")
+    mock_db_session.commit.assert_called_once()
+    mock_db_session.add_all.assert_not_called()
+    mock_db_session.refresh.assert_not_called()
+
+def test_create_tasks_empty(mock_db_session):
+    assert controllers.create_tasks(mock_db_session, []) == []
+    mock_db_session.commit.assert_not_called()
+
+def test_import_tasks(mock_db_session):
+    tasks_import = [schemas.TaskCreate(title="Imported Task 1"), schemas.TaskCreate(title="Imported Task 2")]
+
+    inserted = controllers.import_tasks(mock_db_session, tasks_import)
+    assert inserted == 2
+    _, rows = mock_db_session.execute.call_args_list[0].args
+    assert [row["title"] for row in rows] == ["Imported Task 1", "Imported Task 2"]
+    mock_db_session.commit.assert_called_once()
+
+def test_import_tasks_postgresql(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_cursor = mock_db_session.connection.return_value.connection.cursor.return_value.__enter__.return_value
+    tasks_import = [schemas.TaskCreate(title="Imported, Task", description=None, completed=True)]
+
+    inserted = controllers.import_tasks(mock_db_session, tasks_import)
+    assert inserted == 1
+    statement, buffer = mock_cursor.copy_expert.call_args.args
+    assert statement.startswith("COPY tasks (title, description, completed, completed_at) FROM STDIN")
+    assert buffer.getvalue().startswith('"Imported, Task",\\N,True,20')
+    mock_db_session.execute.assert_called_once()
+    mock_db_session.commit.assert_called_once()
+
 def test_delete_task(mock_db_session):
     mock_task = models.Task(id=1, title="Task to Delete", description="To be deleted", completed=False)
     mock_db_session.query.return_value.filter.return_value.first.return_value = mock_task
 
+    cache.task_cache.set(1, {"id": 1, "title": "Task to Delete", "description": None, "completed": False})
+
     deleted_task = controllers.delete_task(mock_db_session, task_id=1)
     assert deleted_task == mock_task
+    assert cache.task_cache.get(1) is None
     mock_db_session.delete.assert_called_once_with(mock_task)
     mock_db_session.commit.assert_called_once()
 
@@ -62,18 +251,29 @@ def test_delete_task_not_found(mock_db_session):
     mock_db_session.delete.assert_not_called()
     mock_db_session.commit.assert_not_called()
 
+def test_delete_task_postgresql(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.execute.return_value.first.return_value = models.Task(id=1, title="Task to Delete", description=None, completed=False)
+
+    deleted_task = controllers.delete_task(mock_db_session, task_id=1)
+    assert deleted_task.id == 1
+    assert "DELETE FROM tasks" in str(mock_db_session.execute.call_args_list[0].args[0])
+    mock_db_session.query.assert_not_called()
+    mock_db_session.commit.assert_called_once()
+
 def test_update_task(mock_db_session):
     mock_task = models.Task(id=1, title="Old Task", description="Old Description", completed=False)
     mock_db_session.query.return_value.filter.return_value.first.return_value = mock_task
     updated_task = schemas.TaskCreate(title="Updated Task", description="Updated Description", completed=True)
 
     result_task = controllers.update_task(mock_db_session, task_id=1, updated_task=updated_task)
-    assert result_task == mock_task
-    assert mock_task.title == updated_task.title
-    assert mock_task.description == updated_task.description
-    assert mock_task.completed == updated_task.completed
+    assert result_task.id == 1
+    assert result_task.title == mock_task.title == updated_task.title
+    assert result_task.description == mock_task.description == updated_task.description
+    assert result_task.completed == mock_task.completed == updated_task.completed
+    assert cache.task_cache.get(1)["title"] == "Updated Task"
     mock_db_session.commit.assert_called_once()
-    mock_db_session.refresh.assert_called_once_with(mock_task)
+    mock_db_session.refresh.assert_not_called()
 
 def test_update_task_not_found(mock_db_session):
     mock_db_session.query.return_value.filter.return_value.first.return_value = None
@@ -82,4 +282,97 @@ def test_update_task_not_found(mock_db_session):
     result_task = controllers.update_task(mock_db_session, task_id=999, updated_task=updated_task)
     assert result_task is None
     mock_db_session.commit.assert_not_called()
-    mock_db_session.refresh.assert_not_called()
\ No newline at end of file
+    mock_db_session.refresh.assert_not_called()
+
+def test_update_task_postgresql(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.execute.return_value.first.return_value = MagicMock(
+        id=1, title="Updated Task", description=None, completed=True, previous_completed=False
+    )
+    updated_task = schemas.TaskCreate(title="Updated Task", completed=True)
+
+    result_task = controllers.update_task(mock_db_session, task_id=1, updated_task=updated_task)
+    assert result_task.title == "Updated Task"
+    statement = str(mock_db_session.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert statement.startswith("WITH previous AS")
+    assert "WHERE tasks.id = %(id_1)s FOR UPDATE)" in statement
+    assert "UPDATE tasks SET" in statement
+    assert "RETURNING" in statement
+    assert "previous.completed AS previous_completed" in statement
+    mock_db_session.query.assert_not_called()
+    mock_db_session.commit.assert_called_once()
+
+def test_update_task_postgresql_not_found(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.execute.return_value.first.return_value = None
+
+    result_task = controllers.update_task(mock_db_session, task_id=999, updated_task=schemas.TaskCreate(title="Updated Task"))
+    assert result_task is None
+    assert cache.task_cache.get(999) is None
+
+def test_patch_task(mock_db_session):
+    mock_task = models.Task(id=1, title="Old Task", description="Old Description", completed=False)
+    mock_db_session.query.return_value.filter.return_value.first.return_value = mock_task
+
+    result_task = controllers.patch_task(mock_db_session, task_id=1, task_patch=schemas.TaskUpdate(completed=True, title=None))
+    assert result_task.completed is True
+    assert result_task.title == "Old Task"
+    assert result_task.description == "Old Description"
+    mock_db_session.commit.assert_called_once()
+
+def test_patch_task_postgresql(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.execute.return_value.first.return_value = MagicMock(
+        id=1, title="Old Task", description=None, completed=True, previous_completed=True
+    )
+
+    controllers.patch_task(mock_db_session, task_id=1, task_patch=schemas.TaskUpdate(completed=True))
+    statement = mock_db_session.execute.call_args.args[0]
+    params = set(statement.compile().params)
+    assert {"completed", "id_1", "version_1"} <= params
+    assert not {"title", "description"} & params
+    assert "completed_at=CASE WHEN (tasks.completed IS true)" in str(statement)
+    assert "version=(tasks.version +" in str(statement)
+    mock_db_session.execute.assert_called_once()
+
+def test_update_task_version(mock_db_session):
+    mock_task = models.Task(id=1, title="Old Task", description=None, completed=False, version=3)
+    mock_db_session.query.return_value.filter.return_value.first.return_value = mock_task
+
+    result_task = controllers.update_task(
+        mock_db_session, task_id=1, expected_version=3,
+        updated_task=schemas.TaskCreate(title="New Task"),
+    )
+    assert result_task.version == 4
+    assert cache.task_cache.get(1)["version"] == 4
+
+def test_update_task_version_mismatch(mock_db_session):
+    mock_task = models.Task(id=1, title="Old Task", description=None, completed=False, version=3)
+    mock_db_session.query.return_value.filter.return_value.first.return_value = mock_task
+
+    with pytest.raises(controllers.VersionMismatch):
+        controllers.update_task(
+            mock_db_session, task_id=1, expected_version=2,
+            updated_task=schemas.TaskCreate(title="New Task"),
+        )
+    assert mock_task.title == "Old Task"
+    mock_db_session.commit.assert_not_called()
+
+def test_delete_task_version_mismatch_postgresql(mock_db_session):
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.execute.return_value.first.return_value = None
+    mock_db_session.query.return_value.filter.return_value.first.return_value = (1,)
+
+    with pytest.raises(controllers.VersionMismatch):
+        controllers.delete_task(mock_db_session, task_id=1, expected_version=2)
+    statement = mock_db_session.execute.call_args.args[0]
+    assert "tasks.version = :version_1" in str(statement)
+    mock_db_session.commit.assert_not_called()
+
+def test_patch_task_empty(mock_db_session):
+    mock_task = models.Task(id=1, title="Old Task", description="Old Description", completed=False)
+    mock_db_session.query.return_value.filter.return_value.first.return_value = mock_task
+
+    result_task = controllers.patch_task(mock_db_session, task_id=1, task_patch=schemas.TaskUpdate())
+    assert result_task == mock_task
+    mock_db_session.commit.assert_not_called()
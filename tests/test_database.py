@@ -23,4 +23,137 @@ def test_get_db():
             next(gen)
         except StopIteration:
             pass
-        mock_session.close.assert_called_once()
\ No newline at end of file
+        mock_session.close.assert_called_once()
+
+def test_get_async_database_url():
+    from app.database import get_async_database_url
+    assert get_async_database_url("postgresql://user:pwd@db/tasks").drivername == "postgresql+asyncpg"
+    assert get_async_database_url("sqlite:///./tasks.db").drivername == "sqlite+aiosqlite"
+
+
+def test_get_engine_options_sqlite():
+    from app.database import get_engine_options
+    assert get_engine_options("sqlite:///./tasks.db") == {"connect_args": {"check_same_thread": False}}
+    assert get_engine_options("sqlite:///./tasks.db", asynchronous=True) == {}
+
+
+def test_get_engine_options_postgresql():
+    from app.database import get_engine_options, TimedQueuePool
+    with patch('app.database.DB_POOL_SIZE', 20), patch('app.database.DB_POOL_PRE_PING', True):
+        options = get_engine_options("postgresql://user:pwd@db/tasks")
+    assert options["pool_size"] == 20
+    assert options["pool_pre_ping"] is True
+    assert options["poolclass"] is TimedQueuePool
+    assert "poolclass" not in get_engine_options("postgresql://user:pwd@db/tasks", asynchronous=True)
+
+
+def test_get_engine_options_pgbouncer():
+    from sqlalchemy.pool import NullPool
+    from app.database import get_engine_options
+    with patch('app.database.DB_PGBOUNCER', True):
+        assert get_engine_options("postgresql://user:pwd@db/tasks") == {"poolclass": NullPool}
+        options = get_engine_options("postgresql://user:pwd@db/tasks", asynchronous=True)
+    assert options["connect_args"] == {"statement_cache_size": 0}
+
+
+def test_get_pool_stats():
+    import sqlite3
+    from app.database import get_pool_stats, TimedQueuePool
+    pool_engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=2, max_overflow=0,
+                                creator=lambda: sqlite3.connect(":memory:", check_same_thread=False))
+    with pool_engine.connect():
+        stats = get_pool_stats(pool_engine)
+        assert stats["pool"] == "TimedQueuePool"
+        assert stats["checked_out"] == 1
+        assert stats["checkouts"] == 1
+        assert stats["timeouts"] == 0
+    assert get_pool_stats(pool_engine)["checked_out"] == 0
+
+
+def test_replica_router():
+    from app.database import ReplicaRouter
+    now = [0.0]
+    router = ReplicaRouter(["replica-1", "replica-2"], cooldown=10, clock=lambda: now[0])
+    assert [router.choose() for _ in range(4)] == ["replica-1", "replica-2", "replica-1", "replica-2"]
+
+    router.mark_unhealthy("replica-1")
+    assert [router.choose() for _ in range(3)] == ["replica-2", "replica-2", "replica-2"]
+    router.mark_unhealthy("replica-2")
+    assert router.choose() is None
+
+    now[0] = 11
+    assert router.choose() in ("replica-1", "replica-2")
+
+
+def _read_db(cookies=None):
+    from app.database import get_read_db
+    return get_read_db(MagicMock(cookies=cookies or {}))
+
+
+def test_get_read_db_replica():
+    from app.database import ReplicaRouter
+    replica = MagicMock()
+    router = ReplicaRouter([replica])
+    with patch('app.database.DATABASE_REPLICA_URLS', ["postgresql://replica/tasks"]), \
+            patch('app.database.get_replica_router', return_value=router), \
+            patch('app.database.ReplicaSessionLocal') as mock_replica_session_local, \
+            patch('app.database.SessionLocal') as mock_session_local:
+        db = next(_read_db())
+        mock_replica_session_local.assert_called_once_with(bind=replica)
+        db.info.__setitem__.assert_called_once_with("read_from", "replica")
+
+        router.mark_unhealthy(replica)
+        next(_read_db())
+        mock_session_local.assert_called_once_with()
+
+
+def test_get_read_db_replica_failure_falls_back_to_primary(tmp_path):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import StaticPool
+    from app.database import READ_FROM_KEY, ReplicaRouter
+    primary = create_engine("sqlite://", poolclass=StaticPool)
+    with primary.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO items (id) VALUES (7)"))
+    replica = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+    router = ReplicaRouter([replica])
+    with patch('app.database.DATABASE_REPLICA_URLS', ["sqlite:///replica.db"]), \
+            patch('app.database.get_replica_router', return_value=router), \
+            patch('app.database.get_engine', return_value=primary):
+        gen = _read_db()
+        db = next(gen)
+        assert db.execute(text("SELECT id FROM items")).scalar() == 7
+        assert READ_FROM_KEY not in db.info
+        assert router.choose() is None
+        gen.close()
+
+
+def test_get_read_db_after_write():
+    from app.database import ReplicaRouter, PRIMARY_COOKIE
+    router = ReplicaRouter([MagicMock()])
+    with patch('app.database.DATABASE_REPLICA_URLS', ["postgresql://replica/tasks"]), \
+            patch('app.database.get_replica_router', return_value=router), \
+            patch('app.database.SessionLocal') as mock_session_local:
+        db = next(_read_db({PRIMARY_COOKIE: "1"}))
+        mock_session_local.assert_called_once_with()
+        db.info.__setitem__.assert_called_once_with("read_from", "pinned")
+
+
+def test_sticky_primary_middleware():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.database import StickyPrimaryMiddleware, PRIMARY_COOKIE
+    app = FastAPI()
+    app.add_middleware(StickyPrimaryMiddleware, max_age=5)
+
+    @app.get("/")
+    def read():
+        return {}
+
+    @app.post("/")
+    def write():
+        return {}
+
+    client = TestClient(app)
+    assert PRIMARY_COOKIE not in client.get("/").headers.get("set-cookie", "")
+    assert f"{PRIMARY_COOKIE}=1; Max-Age=5" in client.post("/").headers["set-cookie"]
@@ -0,0 +1,31 @@
+import pytest
+from app import etags, models
+
+def test_task_etag():
+    assert etags.task_etag(models.Task(id=5, version=2)) == '"5-2"'
+    assert etags.task_etag({"id": 5, "version": 2}) == '"5-2"'
+
+def test_list_etag():
+    tasks = [{"id": 1, "version": 1}, {"id": 2, "version": 1}]
+    assert etags.list_etag(tasks) == etags.list_etag(list(tasks))
+    assert etags.list_etag(tasks) != etags.list_etag([{"id": 1, "version": 2}, {"id": 2, "version": 1}])
+    assert etags.list_etag(tasks) != etags.list_etag(tasks[:1])
+    assert etags.list_etag(tasks, ["id", "title"]) != etags.list_etag(tasks)
+
+def test_none_match():
+    assert etags.none_match('"1-2"', '"1-2"')
+    assert etags.none_match('W/"1-2"', '"1-2"')
+    assert etags.none_match('"1-1", "1-2"', '"1-2"')
+    assert etags.none_match("*", '"1-2"')
+    assert not etags.none_match('"1-1"', '"1-2"')
+    assert not etags.none_match(None, '"1-2"')
+
+def test_expected_version():
+    assert etags.expected_version(None, 1) is None
+    assert etags.expected_version("*", 1) is None
+    assert etags.expected_version('"1-3"', 1) == 3
+    assert etags.expected_version('"2-5", "1-3"', 1) == 3
+    with pytest.raises(ValueError):
+        etags.expected_version('W/"1-3"', 1)
+    with pytest.raises(ValueError):
+        etags.expected_version('"2-3"', 1)
@@ -0,0 +1,145 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import cache, controllers, events, init_db, models, schemas
+
+
+class FakeRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def _event(event_id, kind=events.CREATED):
+    return {"id": event_id, "type": kind, "task": {"id": 1, "title": "Task", "version": 1}}
+
+
+def test_events_published_after_commit():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    init_db.init_schema(engine)
+    events.instrument_sessions()
+    broker = events.EventBroker()
+    with patch('app.events.broker', broker), sessionmaker(bind=engine)() as db:
+        task = controllers.create_task(db, schemas.TaskCreate(title="Nouvelle"))
+        controllers.patch_task(db, task.id, schemas.TaskUpdate(completed=True))
+        controllers.delete_task(db, task.id)
+
+        cancelled = models.Task(title="Annulée")
+        db.add(cancelled)
+        db.flush()
+        events.record(db, events.CREATED, cancelled)
+        db.rollback()
+        db.commit()
+
+    history = list(broker._history)
+    assert [item["type"] for item in history] == [events.CREATED, events.UPDATED, events.DELETED]
+    assert history[0]["task"]["title"] == "Nouvelle"
+    assert history[1]["task"]["completed"] is True
+    assert history[1]["task"]["version"] == 2
+
+
+def test_events_notify_on_postgresql():
+    session = MagicMock()
+    session.info = {events.PENDING_KEY: [_event("a"), _event("b")]}
+    session.get_bind.return_value.dialect.name = "postgresql"
+    broker = events.EventBroker()
+    with patch('app.events.broker', broker):
+        events._before_commit(session)
+        events._after_commit(session)
+    session.execute.assert_called_once()
+    params = session.execute.call_args.args[1]
+    assert [json.loads(payload)["id"] for payload in params["payloads"]] == ["a", "b"]
+    assert not broker._history
+
+
+def test_bulk_created_event():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    init_db.init_schema(engine)
+    events.instrument_sessions()
+    broker = events.EventBroker()
+    tasks = [schemas.TaskCreate(title=f"Task {i}") for i in range(5)]
+    with patch('app.events.broker', broker), patch('app.events.EVENTS_BULK_THRESHOLD', 3), \
+            sessionmaker(bind=engine)() as db:
+        controllers.create_tasks(db, tasks[:3])
+        created = controllers.create_tasks(db, tasks)
+        controllers.import_tasks(db, tasks[:1])
+
+    history = list(broker._history)
+    assert [item["type"] for item in history] == [events.CREATED] * 3 + [events.BULK_CREATED] * 2
+    assert history[3]["count"] == 5
+    assert (history[3]["first_id"], history[3]["last_id"]) == (created[0].id, created[-1].id)
+    assert history[4]["count"] == 1
+
+
+def test_notifications_invalidate_cache():
+    cache.task_cache.set(1, {"id": 1})
+    cache.task_cache.set(2, {"id": 2})
+    events.invalidate_cache(_event("a", events.CREATED))
+    assert cache.task_cache.get(1) is not None
+    events.invalidate_cache(_event("b", events.UPDATED))
+    assert cache.task_cache.get(1) is None
+    assert cache.task_cache.get(2) is not None
+
+    db = MagicMock()
+    db.info = {}
+    with patch('app.events.ARCHIVED_IDS_PER_EVENT', 2):
+        events.record_archived(db, [2, 3, 4])
+    assert [item["task_ids"] for item in db.info[events.PENDING_KEY]] == [[2, 3], [4]]
+    events.invalidate_cache(db.info[events.PENDING_KEY][0])
+    assert cache.task_cache.get(2) is None
+
+
+def test_notify_payload_too_long():
+    item = _event("a")
+    item["task"]["description"] = "x" * 10000
+    payload = json.loads(events._notify_payload(item))
+    assert payload["partial"] is True
+    assert payload["task"] == {"id": 1, "version": 1}
+
+
+def test_stream_resumes_from_last_event_id():
+    async def scenario():
+        broker = events.EventBroker()
+        for event_id in ("a", "b", "c"):
+            broker.publish(_event(event_id))
+        stream = events.stream(FakeRequest(), "a", broker)
+        messages = [await stream.__anext__() for _ in range(3)]
+        broker.publish(_event("d", events.DELETED))
+        messages.append(await stream.__anext__())
+        await stream.aclose()
+        assert not broker._subscribers
+        return messages
+
+    messages = asyncio.run(scenario())
+    assert messages[0].startswith("retry: ")
+    assert messages[1].startswith("id: b\nevent: created\n")
+    assert messages[2].startswith("id: c\n")
+    assert messages[3].startswith("id: d\nevent: deleted\n")
+
+
+def test_stream_reset_when_event_id_unknown():
+    async def scenario():
+        stream = events.stream(FakeRequest(), "inconnu", events.EventBroker())
+        messages = [await stream.__anext__() for _ in range(2)]
+        await stream.aclose()
+        return messages
+
+    assert asyncio.run(scenario())[1].startswith("event: reset\n")
+
+
+def test_slow_subscriber_is_disconnected():
+    async def scenario():
+        broker = events.EventBroker(queue_size=1)
+        subscriber, missed = broker.subscribe()
+        for event_id in ("a", "b", "c"):
+            broker.publish(_event(event_id))
+        await asyncio.sleep(0)
+        return missed, [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+
+    missed, queued = asyncio.run(scenario())
+    assert missed == []
+    assert [item and item["id"] for item in queued] == ["a", None]
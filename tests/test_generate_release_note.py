@@ -0,0 +1,76 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import generate_release_note as release_note
+
+
+def _commit(message="Fix login\n\nDetails", hexsha="abcdef0123456789"):
+    return SimpleNamespace(
+        message=message, hexsha=hexsha, author=SimpleNamespace(name="Rita"),
+        authored_datetime=datetime(2024, 5, 6, 7, 8),
+    )
+
+
+def test_build_card():
+    card = release_note.build_card(_commit())
+    assert card["name"] == "Release Note - 2024-05-06 07:08 - Rita"
+    assert "**Commit N°** abcdef0" in card["desc"]
+    assert "**Description commit:** Fix login\n\n\nDetails" in card["desc"]
+
+
+def test_get_commits():
+    head = _commit()
+    repo = SimpleNamespace(head=SimpleNamespace(commit=head), iter_commits=lambda rev, **kwargs: [rev, kwargs])
+    assert release_note.get_commits(repo=repo) == [head]
+    assert release_note.get_commits("v1..HEAD", repo=repo) == ["v1..HEAD", {"reverse": True}]
+
+
+def test_release_caches_list_id(tmp_path):
+    cache_path = tmp_path / "lists.json"
+    cards = [release_note.build_card(_commit(hexsha=f"{i:040x}")) for i in range(10)]
+    with release_note.running_stub() as stub:
+        session = release_note.make_session("key", "token")
+        for _ in range(2):
+            results = release_note.release(session, "board", cards, base_url=stub.url,
+                                           workers=4, cache_path=cache_path)
+            assert all(error is None for _, error in results)
+        assert [card["name"] for card, _ in results] == [card["name"] for card in cards]
+        assert len(stub.cards) == 20
+        assert stub.requests.count(("GET", "/1/boards/board/lists")) == 1
+        # Les cartes restent dans l'ordre des commits, à la suite des précédentes.
+        by_position = sorted(stub.cards, key=lambda card: card["pos"])
+        assert [card["desc"] for card in by_position] == [card["desc"] for card in cards] * 2
+
+
+def test_release_refreshes_stale_list_id(tmp_path):
+    cache_path = tmp_path / "lists.json"
+    cache_path.write_text('{"board/Releases": "removed"}')
+    with release_note.running_stub() as stub:
+        session = release_note.make_session("key", "token")
+        results = release_note.release(session, "board", [{"name": "Card", "desc": ""}],
+                                       base_url=stub.url, cache_path=cache_path)
+        assert results[0][1] is None
+        assert stub.cards[0]["idList"] == "list-0"
+    assert "list-0" in cache_path.read_text()
+
+
+def test_post_card_retries(monkeypatch, tmp_path):
+    monkeypatch.setattr(release_note.TrelloRetry, "DEFAULT_BACKOFF_MAX", 0)
+    with release_note.running_stub() as stub:
+        session = release_note.make_session("key", "token")
+        stub.failures = [429, 429]
+        release_note.post_card(session, "list-0", {"name": "Card"}, stub.url)
+        assert len(stub.cards) == 1
+        # Un POST n'est pas rejoué sur une erreur serveur, pour ne pas créer la carte deux fois.
+        stub.failures = [503]
+        results = release_note.publish(session, "list-0", [{"name": "Other"}], stub.url)
+        assert results[0][1].response.status_code == 503
+        assert len(stub.cards) == 1
+        stub.failures = [503]
+        assert release_note.get_list_id(session, "board", base_url=stub.url,
+                                        cache_path=tmp_path / "lists.json") == "list-0"
+
+
+def test_main_with_stub(capsys):
+    assert release_note.main(["--stub"]) == 0
+    assert "1/1 cartes" in capsys.readouterr().out
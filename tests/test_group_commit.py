@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import group_commit, init_db, models, schemas
+
+
+def test_group_commit_batches_concurrent_creates():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    init_db.init_schema(engine)
+    committer = group_commit.GroupCommitter(window=0.2, max_batch=10, session_factory=sessionmaker(bind=engine))
+    batches = []
+    create_tasks = group_commit.controllers.create_tasks
+
+    def _create_tasks(db, tasks):
+        batches.append(len(tasks))
+        return create_tasks(db, tasks)
+
+    with patch('app.controllers.create_tasks', side_effect=_create_tasks):
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            created = list(executor.map(
+                committer.submit, [schemas.TaskCreate(title=f"Task {i}") for i in range(10)]
+            ))
+    committer.close()
+
+    assert batches == [10]
+    assert sorted(task.title for task in created) == [f"Task {i}" for i in range(10)]
+    assert len({task.id for task in created}) == 10
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(models.Task)).scalar() == 10
+
+
+def test_group_commit_window():
+    committer = group_commit.GroupCommitter(window=0, max_batch=10, session_factory=MagicMock())
+    with patch('app.controllers.create_tasks', side_effect=lambda db, tasks: tasks) as mock_create:
+        task = schemas.TaskCreate(title="Seule")
+        assert committer.submit(task) is task
+        committer.close()
+    mock_create.assert_called_once()
+
+
+def test_group_commit_error_reaches_callers():
+    session = MagicMock()
+    committer = group_commit.GroupCommitter(window=0.1, max_batch=2, session_factory=lambda: session)
+    with patch('app.controllers.create_tasks', side_effect=RuntimeError("database down")):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(committer.submit, schemas.TaskCreate(title="Task")) for _ in range(2)]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result()
+    committer.close()
+    assert session.__exit__.called
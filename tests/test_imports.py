@@ -0,0 +1,34 @@
+import asyncio
+from app.imports import iter_task_chunks
+from app.schemas import FileFormat
+
+def _collect(chunks, file_format, chunk_size=1000):
+    async def _body():
+        for chunk in chunks:
+            yield chunk
+
+    async def _run():
+        return [chunk async for chunk in iter_task_chunks(_body(), file_format, chunk_size)]
+
+    return asyncio.run(_run())
+
+def test_ndjson_chunks():
+    body = [b'{"title": "Task 1"}\n{"tit', b'le": "Task 2", "completed": true}\n{"title": "Task 3"}']
+    chunks = _collect(body, FileFormat.NDJSON, chunk_size=2)
+    assert [[task.title for task in tasks] for tasks, _ in chunks] == [["Task 1", "Task 2"], ["Task 3"]]
+    assert chunks[0][0][1].completed is True
+
+def test_ndjson_rejected_lines():
+    body = [b'{"title": "Task 1"}\nnot json\n\n{"description": "No title"}\n[1]\n']
+    tasks, rejected = _collect(body, FileFormat.NDJSON)[0]
+    assert [task.title for task in tasks] == ["Task 1"]
+    assert [line for line, _ in rejected] == [2, 4, 5]
+
+def test_csv_chunks():
+    body = [b'id,title,description,completed\r\n1,"Multi\nline, title",,True\r\n', b'2,Task 2,Description 2,0\r\n3,,,\r\n']
+    tasks, rejected = _collect(body, FileFormat.CSV)[0]
+    assert [task.title for task in tasks] == ["Multi\nline, title", "Task 2"]
+    assert tasks[0].description is None
+    assert tasks[0].completed is True
+    assert tasks[1].completed is False
+    assert [line for line, _ in rejected] == [5]
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from app import init_db, models
+
+def _engine():
+    return create_engine("sqlite://", poolclass=StaticPool,
+                         connect_args={"check_same_thread": False})
+
+def test_init_schema_creates_tables():
+    engine = _engine()
+    with engine.connect() as connection:
+        assert set(init_db.missing_schema(connection)) == {"tasks", "task_stats", "tasks_archive"}
+
+    assert init_db.init_schema(engine) == []
+    with engine.connect() as connection:
+        assert init_db.missing_schema(connection) == []
+
+def test_init_schema_upgrades_existing_tables():
+    engine = _engine()
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR, "
+            "description VARCHAR, completed BOOLEAN)"
+        ))
+        connection.execute(text("CREATE INDEX ix_tasks_description ON tasks (description)"))
+        connection.execute(text("INSERT INTO tasks (title, completed) VALUES ('Old Task', 0), ('Done', 1)"))
+        assert set(init_db.missing_schema(connection)) == {"tasks.version", "tasks.completed_at", "task_stats", "tasks_archive"}
+
+    assert init_db.init_schema(engine) == ["tasks.version", "tasks.completed_at"]
+    with engine.connect() as connection:
+        assert init_db.missing_schema(connection) == []
+        assert connection.execute(text("SELECT version FROM tasks")).scalar() == 1
+        assert connection.execute(text("SELECT total, completed FROM task_stats")).one() == (2, 1)
+        completed_at = dict(connection.execute(text("SELECT title, completed_at FROM tasks")).all())
+        assert completed_at["Old Task"] is None and completed_at["Done"] is not None
+        indexes = {index["name"] for index in inspect(connection).get_indexes("tasks")}
+        assert "ix_tasks_description" not in indexes
+        assert "ix_tasks_completed_at" in indexes
+
+def test_missing_stats_row():
+    engine = _engine()
+    init_db.init_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM task_stats"))
+        assert init_db.missing_schema(connection) == ["row:task_stats"]
+    init_db.init_schema(engine)
+    with engine.connect() as connection:
+        assert init_db.missing_schema(connection) == []
+
+def test_search_objects_on_postgresql():
+    connection = MagicMock()
+    connection.execute.return_value.first.return_value = None
+    connection.execute.return_value.scalars.return_value = ["ix_tasks_search"]
+    assert init_db._missing_search_objects(connection) == ["extension:pg_trgm", "tasks.ix_tasks_title_trgm"]
+
+    connection.reset_mock()
+    init_db._create_search_objects(connection)
+    statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+    assert statements[0] == "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+    assert all("IF NOT EXISTS" in statement for statement in statements[1:])
+    assert len(statements) == 1 + len(models.SEARCH_INDEXES)
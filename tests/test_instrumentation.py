@@ -0,0 +1,75 @@
+import logging
+import pytest
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app import instrumentation
+
+engine = create_engine("sqlite://")
+instrumentation.instrument_sql()
+
+def test_track_counts_statements():
+    with engine.connect() as connection:
+        with instrumentation.track() as stats:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        connection.execute(text("SELECT 3"))
+    assert stats.count == 2
+    assert stats.duration > 0
+
+def test_server_timing_format():
+    stats = instrumentation.QueryStats()
+    stats.count, stats.duration = 3, 0.0125
+    assert stats.server_timing() == 'db;desc="3 queries";dur=12.50'
+
+def test_slow_query_is_logged_with_plan(monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+        with engine.connect() as connection:
+            connection.execute(text("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY)"))
+            connection.execute(text("SELECT * FROM items WHERE id = :id"), {"id": 1})
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("SELECT * FROM items WHERE id = ?" in message and "SEARCH" in message
+               for message in messages)
+    assert not any("EXPLAIN failed" in message for message in messages)
+
+def test_failed_explain_keeps_transaction(monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    monkeypatch.setitem(instrumentation.EXPLAIN_PREFIXES, "sqlite", "EXPLAIN NOT SQL ")
+    with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+        with engine.connect() as connection:
+            connection.execute(text("CREATE TABLE IF NOT EXISTS kept (id INTEGER PRIMARY KEY)"))
+            with connection.begin():
+                connection.execute(text("INSERT INTO kept (id) VALUES (1)"))
+                connection.execute(text("WITH ids AS (SELECT id FROM kept) SELECT * FROM ids"))
+            assert connection.execute(text("SELECT count(*) FROM kept")).scalar() == 1
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith("Slow query") and "WITH ids" in message and "EXPLAIN failed" in message
+               for message in messages)
+
+def test_failed_explain_rolls_back_to_savepoint():
+    conn = MagicMock()
+    conn.dialect.name = "postgresql"
+    cursor = conn.connection.cursor.return_value
+    cursor.execute.side_effect = lambda sql, *args: sql.startswith("EXPLAIN") and 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        instrumentation._explain(conn, "SELECT 1", ())
+    assert [call.args[0] for call in cursor.execute.call_args_list] == [
+        "SAVEPOINT instrumentation_explain", "EXPLAIN SELECT 1",
+        "ROLLBACK TO SAVEPOINT instrumentation_explain", "RELEASE SAVEPOINT instrumentation_explain",
+    ]
+
+def test_middleware_adds_server_timing_header():
+    app = FastAPI()
+    app.add_middleware(instrumentation.QueryStatsMiddleware)
+
+    @app.get("/")
+    def endpoint():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        return {}
+
+    response = TestClient(app).get("/")
+    assert response.headers["server-timing"].startswith('db;desc="2 queries";dur=')
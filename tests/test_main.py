@@ -1,9 +1,12 @@
 import pytest
 import os
+import json
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from app.main import app
-from app import database, models, schemas
+from app import controllers, database, init_db, models, schemas
 
 client = TestClient(app)
 
@@ -23,12 +26,43 @@ def override_get_db(mock_db_session):
             mock_db_session.close()
 
     app.dependency_overrides[database.get_db] = _get_db_override
+    app.dependency_overrides[database.get_read_db] = _get_db_override
 
 def test_api_status():
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"status": "running"}
 
+def test_api_ready():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with patch('app.database.get_engine', return_value=engine):
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "outdated"
+
+        init_db.init_schema(engine)
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+
+def test_api_ready_unavailable():
+    engine = create_engine("sqlite:////nonexistent/directory/tasks.db")
+    with patch('app.database.get_engine', return_value=engine):
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "unavailable"
+
+def test_get_cache_stats():
+    response = client.get("/cache/stats")
+    assert response.status_code == 200
+    assert set(response.json()) >= {"hits", "misses", "evictions", "size"}
+
+def test_get_pool_stats():
+    with patch('app.database.get_pool_stats', return_value={"pool": "TimedQueuePool", "checked_out": 1}):
+        response = client.get("/db/pool")
+        assert response.status_code == 200
+        assert response.json()["checked_out"] == 1
+
 def test_create_task(mock_db_session):
     mock_task = models.Task(id=1, title="Test Task", description="Test Description", completed=False)
     mock_db_session.add.return_value = None
@@ -47,14 +81,168 @@ def test_create_task_invalid(mock_db_session):
     response = client.post("/tasks/", json={})
     assert response.status_code == 422
 
+def test_create_tasks(mock_db_session):
+    mock_tasks = [
+        models.Task(id=1, title="Bulk Task 1", description=None, completed=False),
+        models.Task(id=2, title="Bulk Task 2", description=None, completed=True)
+    ]
+
+    with patch('app.controllers.create_tasks', return_value=mock_tasks):
+        response = client.post("/tasks/bulk", json=[{"title": "Bulk Task 1"}, {"title": "Bulk Task 2", "completed": True}])
+        assert response.status_code == 200
+        assert [task["id"] for task in response.json()] == [1, 2]
+
+def test_create_tasks_invalid(mock_db_session):
+    response = client.post("/tasks/bulk", json=[{"description": "Missing title"}])
+    assert response.status_code == 422
+
 def test_get_tasks(mock_db_session):
-    mock_task = models.Task(id=1, title="Test Task", description="Test Description", completed=False)
-    mock_db_session.query.return_value.offset.return_value.limit.return_value.all.return_value = [mock_task]
+    mock_db_session.query.return_value.order_by.return_value.limit.return_value.all.return_value = [
+        ("Test Task", "Test Description", False, 1, 1)
+    ]
+
+    response = client.get("/tasks/")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [{"title": "Test Task", "description": "Test Description", "completed": False, "id": 1, "version": 1}]
+    assert "X-Next-Cursor" not in response.headers
+
+    not_modified = client.get("/tasks/", headers={"If-None-Match": response.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+def test_get_tasks_next_cursor(mock_db_session):
+    mock_tasks = [
+        {"title": "Test Task 4", "description": None, "completed": False, "id": 4, "version": 1},
+        {"title": "Test Task 7", "description": None, "completed": False, "id": 7, "version": 1}
+    ]
+
+    with patch('app.controllers.get_tasks', return_value=mock_tasks) as mock_get_tasks:
+        response = client.get("/tasks/", params={"limit": 2, "cursor": 3})
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "7"
+        assert mock_get_tasks.call_args.kwargs["after_id"] == 3
+
+def test_get_tasks_fields(mock_db_session):
+    mock_tasks = [{"title": "Test Task", "completed": False, "id": 1, "version": 1}]
+
+    with patch('app.controllers.get_tasks', return_value=mock_tasks) as mock_get_tasks:
+        response = client.get("/tasks/", params={"fields": "id,title,completed"})
+        assert response.status_code == 200
+        assert response.json() == [{"title": "Test Task", "completed": False, "id": 1}]
+        assert mock_get_tasks.call_args.kwargs["fields"] == ["id", "title", "completed"]
+
+    with patch('app.controllers.get_tasks', side_effect=ValueError("Unknown fields: secret")):
+        assert client.get("/tasks/", params={"fields": "secret"}).status_code == 422
+
+def test_get_tasks_gzip(mock_db_session):
+    mock_tasks = [
+        {"title": f"Task {i}", "description": "x" * 100, "completed": False, "id": i, "version": 1}
+        for i in range(20)
+    ]
+
+    with patch('app.controllers.get_tasks', return_value=mock_tasks):
+        response = client.get("/tasks/", params={"limit": 20}, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json() == mock_tasks
+
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+def _task_rows():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        return connection.execute(text(
+            "SELECT 1 AS id, 'Task, 1' AS title, NULL AS description, 0 AS completed, "
+            "NULL AS completed_at "
+            "UNION ALL SELECT 2, 'Task 2', 'Description 2', 1, '2024-05-06 07:08:00'"
+        )).all()
+
+def test_get_tasks_filters(mock_db_session):
+    with patch('app.controllers.get_tasks', return_value=[]) as mock_get_tasks:
+        response = client.get("/tasks/", params={"completed": "false", "title_prefix": "Test"})
+        assert response.status_code == 200
+        assert mock_get_tasks.call_args.kwargs["completed"] is False
+        assert mock_get_tasks.call_args.kwargs["title_prefix"] == "Test"
+
+def test_get_stats(mock_db_session):
+    with patch('app.controllers.get_stats', return_value={"total": 3, "completed": 1, "pending": 2}):
+        response = client.get("/tasks/stats")
+        assert response.status_code == 200
+        assert response.json() == {"total": 3, "completed": 1, "pending": 2}
+
+def test_search_tasks(mock_db_session):
+    mock_tasks = [{"id": 1, "title": "Buy milk", "description": None, "completed": False, "rank": 2}]
+
+    with patch('app.controllers.search_tasks', return_value=(mock_tasks, "2:1")):
+        response = client.get("/tasks/search", params={"q": "milk", "limit": 1})
+        assert response.status_code == 200
+        assert response.json()[0]["rank"] == 2
+        assert response.headers["X-Next-Cursor"] == "2:1"
+
+def test_search_tasks_invalid_cursor(mock_db_session):
+    with patch('app.controllers.search_tasks', side_effect=ValueError("Invalid cursor: bad")):
+        response = client.get("/tasks/search", params={"q": "milk", "cursor": "bad"})
+        assert response.status_code == 422
+        assert response.json() == {"detail": "Invalid cursor: bad"}
+
+def test_export_tasks_ndjson(mock_db_session):
+    with patch('app.controllers.iter_tasks', return_value=_task_rows()):
+        response = client.get("/tasks/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id"] for line in lines] == [1, 2]
+        assert lines[0]["title"] == "Task, 1"
+    mock_db_session.close.assert_called()
 
-    with patch('app.controllers.get_tasks', return_value=[mock_task]):
-        response = client.get("/tasks/")
+def test_export_tasks_csv(mock_db_session):
+    with patch('app.controllers.iter_tasks', return_value=_task_rows()):
+        response = client.get("/tasks/export", params={"format": "csv"})
         assert response.status_code == 200
-        assert isinstance(response.json(), list)
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text.splitlines() == [
+            "id,title,description,completed,completed_at",
+            '1,"Task, 1",,0,',
+            "2,Task 2,Description 2,1,2024-05-06 07:08:00",
+        ]
+
+def test_export_tasks_invalid_format():
+    response = client.get("/tasks/export", params={"format": "xml"})
+    assert response.status_code == 422
+
+def test_import_tasks(mock_db_session):
+    body = '{"title": "Imported Task 1"}\n{"description": "No title"}\n{"title": "Imported Task 2"}\n'
+
+    with patch('app.controllers.import_tasks', side_effect=lambda db, tasks: len(tasks)) as mock_import:
+        response = client.post("/tasks/import", content=body)
+        assert response.status_code == 200
+        assert response.json()["inserted"] == 2
+        assert response.json()["rejected"] == 1
+        assert response.json()["chunks"] == [{"chunk": 1, "inserted": 2, "rejected": 1}]
+        assert response.json()["errors"][0]["line"] == 2
+        mock_import.assert_called_once()
+
+def test_import_tasks_json_string(mock_db_session):
+    body = '"str"\n{"title": "Imported Task"}\n{bad\n'
+
+    with patch('app.controllers.import_tasks', side_effect=lambda db, tasks: len(tasks)):
+        response = client.post("/tasks/import", content=body)
+        assert response.status_code == 200
+        errors = response.json()["errors"]
+        assert errors[0] == {"line": 1, "error": "Expected a JSON object"}
+        assert errors[1]["line"] == 3 and errors[1]["error"].startswith("Invalid JSON")
+
+
+def test_import_tasks_invalid_utf8(mock_db_session):
+    for body, params in ((b'{"title": "\xff"}\n{"title": "Imported Task"}\n', {}),
+                         (b'title\n\xff\nImported Task\n', {"format": "csv"})):
+        with patch('app.controllers.import_tasks', side_effect=lambda db, tasks: len(tasks)):
+            response = client.post("/tasks/import", content=body, params=params)
+            assert response.status_code == 200
+            assert response.json()["inserted"] == 1
+            errors = response.json()["errors"]
+            assert errors[0]["error"].startswith("Invalid UTF-8")
 
 def test_get_task(mock_db_session):
     mock_task = models.Task(id=1, title="Another Task", description="Another Description", completed=False)
@@ -65,6 +253,18 @@ def test_get_task(mock_db_session):
         assert response.status_code == 200
         assert response.json()["id"] == 1
 
+def test_get_task_etag(mock_db_session):
+    mock_task = models.Task(id=1, title="Task", description=None, completed=False, version=3)
+
+    with patch('app.controllers.get_task', return_value=mock_task):
+        response = client.get("/tasks/1")
+        assert response.headers["ETag"] == '"1-3"'
+        not_modified = client.get("/tasks/1", headers={"If-None-Match": 'W/"1-2", "1-3"'})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == '"1-3"'
+        assert client.get("/tasks/1", headers={"If-None-Match": '"1-2"'}).status_code == 200
+
 def test_get_task_not_found(mock_db_session):
     mock_db_session.query.return_value.filter_by.return_value.first.return_value = None
 
@@ -86,6 +286,21 @@ def test_update_task(mock_db_session):
         assert response.json()["description"] == "Updated Description"
         assert response.json()["completed"] is True
 
+def test_update_task_if_match(mock_db_session):
+    mock_task = models.Task(id=1, title="Updated Task", description=None, completed=True, version=4)
+    body = {"title": "Updated Task", "completed": True}
+
+    with patch('app.controllers.update_task', return_value=mock_task) as mock_update_task:
+        response = client.put("/tasks/1", json=body, headers={"If-Match": '"1-3"'})
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"1-4"'
+        assert mock_update_task.call_args.kwargs["expected_version"] == 3
+        assert client.put("/tasks/1", json=body, headers={"If-Match": '"2-3"'}).status_code == 412
+
+    with patch('app.controllers.update_task', side_effect=controllers.VersionMismatch(1)):
+        response = client.put("/tasks/1", json=body, headers={"If-Match": '"1-3"'})
+        assert response.status_code == 412
+
 def test_update_task_not_found(mock_db_session):
     mock_db_session.query.return_value.filter_by.return_value.first.return_value = None
 
@@ -94,6 +309,21 @@ def test_update_task_not_found(mock_db_session):
         assert response.status_code == 404
         assert response.json() == {"detail": "Task not found"}
 
+def test_patch_task(mock_db_session):
+    mock_task = models.Task(id=1, title="Task", description="Description", completed=True)
+
+    with patch('app.controllers.patch_task', return_value=mock_task) as mock_patch_task:
+        response = client.patch("/tasks/1", json={"completed": True})
+        assert response.status_code == 200
+        assert response.json()["completed"] is True
+        assert mock_patch_task.call_args.kwargs["task_patch"].dict(exclude_unset=True) == {"completed": True}
+
+def test_patch_task_not_found(mock_db_session):
+    with patch('app.controllers.patch_task', return_value=None):
+        response = client.patch("/tasks/999", json={"completed": True})
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Task not found"}
+
 def test_delete_task(mock_db_session):
     mock_task = models.Task(id=1, title="Delete Task", description="To be deleted", completed=False)
     mock_db_session.query.return_value.filter_by.return_value.first.return_value = mock_task
@@ -104,10 +334,58 @@ def test_delete_task(mock_db_session):
         assert response.status_code == 200
         assert response.json()["id"] == 1
 
+def test_delete_task_if_match(mock_db_session):
+    with patch('app.controllers.delete_task', side_effect=controllers.VersionMismatch(1)) as mock_delete_task:
+        response = client.delete("/tasks/1", headers={"If-Match": '"1-2"'})
+        assert response.status_code == 412
+        assert mock_delete_task.call_args.kwargs["expected_version"] == 2
+
 def test_delete_task_not_found(mock_db_session):
     mock_db_session.query.return_value.filter_by.return_value.first.return_value = None
 
     with patch('app.controllers.delete_task', return_value=None):
         response = client.delete("/tasks/999")
         assert response.status_code == 404
-        assert response.json() == {"detail": "Task not found"}
\ No newline at end of file
+        assert response.json() == {"detail": "Task not found"}
+def test_create_task_group_commit(mock_db_session):
+    task = models.Task(id=1, title="Groupée", description=None, completed=False, version=1)
+    committer = MagicMock()
+    committer.submit.return_value = task
+    with patch('app.group_commit.GROUP_COMMIT', True), \
+            patch('app.group_commit.get_group_committer', return_value=committer):
+        response = client.post("/tasks/", json={"title": "Groupée"})
+    assert response.status_code == 200
+    assert response.json()["id"] == 1
+    committer.submit.assert_called_once()
+    mock_db_session.add.assert_not_called()
+
+def test_task_changes():
+    async def _stream(request, last_event_id):
+        yield f"id: {last_event_id}\n\n"
+
+    with patch('app.events.stream', side_effect=_stream) as mock_stream, \
+            patch('app.events.start_listener') as mock_start_listener:
+        response = client.get("/tasks/changes", headers={"Last-Event-ID": "abc"})
+    mock_start_listener.assert_called_once()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == "id: abc\n\n"
+    assert mock_stream.call_args.args[1] == "abc"
+
+def test_get_admission_stats():
+    response = client.get("/admission/stats")
+    assert response.status_code == 200
+    assert set(response.json()) == {"enabled", "read", "write"}
+
+def test_get_task_include_archived(mock_db_session):
+    archived = models.ArchivedTask(id=3, title="Archivée", description=None, completed=True, version=2)
+
+    with patch('app.controllers.get_task', return_value=archived) as mock_get_task:
+        response = client.get("/tasks/3", params={"include_archived": "true"})
+        assert response.status_code == 200
+        assert response.json()["title"] == "Archivée"
+        assert mock_get_task.call_args.kwargs["include_archived"] is True
+
+    with patch('app.controllers.get_tasks', return_value=[]) as mock_get_tasks:
+        client.get("/tasks/", params={"include_archived": "true"})
+        assert mock_get_tasks.call_args.kwargs["include_archived"] is True
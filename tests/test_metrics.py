@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app import metrics
+from app.main import app
+
+client = TestClient(app)
+
+def test_histogram_render():
+    registry = metrics.Registry()
+    histogram = registry.histogram("test_duration_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    histogram.labels("/tasks/").observe(0.05)
+    histogram.labels("/tasks/").observe(0.5)
+    histogram.labels("/tasks/").observe(5)
+    rendered = registry.render()
+    assert '# TYPE test_duration_seconds histogram' in rendered
+    assert 'test_duration_seconds_bucket{route="/tasks/",le="0.1"} 1' in rendered
+    assert 'test_duration_seconds_bucket{route="/tasks/",le="1.0"} 2' in rendered
+    assert 'test_duration_seconds_bucket{route="/tasks/",le="+Inf"} 3' in rendered
+    assert 'test_duration_seconds_count{route="/tasks/"} 3' in rendered
+
+def test_counter_gauge_and_collector_render():
+    registry = metrics.Registry()
+    registry.counter("test_total", "Test.", ("status",)).labels('2"00').inc()
+    gauge = registry.gauge("test_in_flight", "Test.")
+    gauge.labels().inc()
+    gauge.labels().dec()
+    registry.add_collector(lambda: [("test_size", "gauge", "Test.", 3)])
+    rendered = registry.render()
+    assert 'test_total{status="2\\"00"} 1.0' in rendered
+    assert "test_in_flight 0.0" in rendered
+    assert "test_size 3" in rendered
+
+def test_middleware_records_route_template():
+    client.get("/")
+    client.get("/does-not-exist")
+    with patch('app.database.DATABASE_URL', "sqlite://"), \
+            patch('app.database.get_pool_stats', return_value={"pool": "QueuePool", "size": 5}):
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in response.text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in response.text
+    assert 'http_requests_in_flight{method="GET",route="/metrics"} 1.0' in response.text
+    assert "task_cache_hits_total" in response.text
+    assert "db_pool_size 5" in response.text
+
+def test_collect_pool_without_database():
+    with patch('app.database.DATABASE_URL', None):
+        assert metrics.collect_pool() == []
+
+def test_sql_statement_timing():
+    metrics.instrument_sql()
+    engine = create_engine("sqlite://")
+    before = sum(metrics.SQL_STATEMENT_DURATION.labels("SELECT").counts)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+    after = sum(metrics.SQL_STATEMENT_DURATION.labels("SELECT").counts)
+    assert after == before + 1
+    assert metrics.SQL_ERRORS.labels("SELECT").value >= 1
+
+def test_operation():
+    assert metrics._operation("  select 1") == "SELECT"
+    assert metrics._operation("INSERT INTO tasks") == "INSERT"
+    assert metrics._operation("WITH x AS (SELECT 1) SELECT * FROM x") == "OTHER"
+    assert metrics._operation("") == "OTHER"
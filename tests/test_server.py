@@ -0,0 +1,38 @@
+from unittest.mock import patch
+from app import server
+
+def test_available_cpus_quota(tmp_path):
+    cpu_max = tmp_path / "cpu.max"
+    with patch('os.sched_getaffinity', return_value=set(range(8))):
+        cpu_max.write_text("250000 100000\n")
+        assert server.available_cpus(cpu_max) == 3
+        cpu_max.write_text("max 100000\n")
+        assert server.available_cpus(cpu_max) == 8
+        assert server.available_cpus(tmp_path / "missing") == 8
+
+def test_worker_count():
+    with patch('app.server.available_cpus', return_value=4):
+        with patch('app.server.WEB_CONCURRENCY', None):
+            assert server.worker_count() == 4
+            with patch('app.server.WORKERS_PER_CORE', 2.0), patch('app.server.MAX_WORKERS', "6"):
+                assert server.worker_count() == 6
+        with patch('app.server.WEB_CONCURRENCY', "3"):
+            assert server.worker_count() == 3
+
+def test_gunicorn_options():
+    with patch('app.server.worker_count', return_value=4):
+        options = server.gunicorn_options()
+    assert options["workers"] == 4
+    assert options["worker_class"].endswith("UvicornWorker")
+    assert options["preload_app"] is True
+    assert options["graceful_timeout"] == server.GRACEFUL_TIMEOUT
+    assert options["forwarded_allow_ips"] == "127.0.0.1"
+
+def test_uvicorn_options():
+    with patch('app.server.worker_count', return_value=2), patch('app.server.find_spec', return_value=None):
+        options = server.uvicorn_options()
+    assert options["workers"] == 2
+    assert options["loop"] == "asyncio"
+    assert options["http"] == "h11"
+    assert options["timeout_graceful_shutdown"] == server.GRACEFUL_TIMEOUT
+    assert options["forwarded_allow_ips"] == "127.0.0.1"